@@ -1,58 +1,79 @@
-CREATE DATABASE IF NOT EXISTS cinedb;
+-- Esquema de cinedb para PostgreSQL
+-- Se puede aplicar varias veces sobre la misma base de datos (gadget setup)
 
-USE cinedb;
+-- updated_at automático
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
 
-CREATE TABLE cinema (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+-- Tipos enumerados
+DO $$
+BEGIN
+    CREATE TYPE seat_status AS ENUM ('available', 'reserved', 'occupied');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+-- Cines y salas
+CREATE TABLE IF NOT EXISTS cinema (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     location VARCHAR(255),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
-CREATE TABLE room (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    cinema_id INT,
+CREATE TABLE IF NOT EXISTS room (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    cinema_id INT REFERENCES cinema(id),
     name VARCHAR(255) NOT NULL,
     capacity INT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (cinema_id) REFERENCES cinema(id)
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
-CREATE TABLE admin_user (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+-- Claves naturales con las que el scraper resuelve cines y salas
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cinema_name ON cinema (name);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_room_cinema_name ON room (cinema_id, name);
+
+-- Usuarios y administración
+CREATE TABLE IF NOT EXISTS admin_user (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     username VARCHAR(255) UNIQUE NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
     admin_level INT NOT NULL
 );
 
-CREATE TABLE manage (
-    admin_id INT,
-    cinema_id INT,
-    PRIMARY KEY (admin_id, cinema_id),
-    FOREIGN KEY (admin_id) REFERENCES admin_user(id),
-    FOREIGN KEY (cinema_id) REFERENCES cinema(id)
+CREATE TABLE IF NOT EXISTS manage (
+    admin_id INT REFERENCES admin_user(id),
+    cinema_id INT REFERENCES cinema(id),
+    PRIMARY KEY (admin_id, cinema_id)
 );
 
-CREATE TABLE user (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+-- "user" es palabra reservada en PostgreSQL: el nombre va siempre entre comillas
+CREATE TABLE IF NOT EXISTS "user" (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     username VARCHAR(255) UNIQUE NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
     birthdate DATE
 );
 
-CREATE TABLE booking (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    user_id INT,
-    booking_id VARCHAR(255) UNIQUE NOT NULL,
-    FOREIGN KEY (user_id) REFERENCES user(id)
+CREATE TABLE IF NOT EXISTS booking (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id INT REFERENCES "user"(id),
+    booking_id VARCHAR(255) UNIQUE NOT NULL
 );
 
-CREATE TABLE movie (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+-- Películas y sesiones
+CREATE TABLE IF NOT EXISTS movie (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    external_id VARCHAR(255),
     title VARCHAR(255) NOT NULL,
     synopsis TEXT,
     duration INT NOT NULL,
@@ -61,57 +82,95 @@ CREATE TABLE movie (
     photo_url VARCHAR(255)
 );
 
-CREATE TABLE functions (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    movie_id INT,
-    room_id INT,
+-- Bases de datos creadas antes de que existiera external_id
+ALTER TABLE movie ADD COLUMN IF NOT EXISTS external_id VARCHAR(255);
+
+-- Clave natural con la que la carga fusiona las películas; con nombre propio
+-- para que aplicar el esquema otra vez no cree otro índice
+CREATE UNIQUE INDEX IF NOT EXISTS uq_movie_external_id ON movie (external_id);
+-- Restricción sin nombre de versiones anteriores de este esquema: la cubre uq_movie_external_id
+ALTER TABLE movie DROP CONSTRAINT IF EXISTS movie_external_id_key;
+
+CREATE TABLE IF NOT EXISTS functions (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    movie_id INT REFERENCES movie(id),
+    room_id INT REFERENCES room(id),
     date DATE NOT NULL,
     time TIME NOT NULL,
-    FOREIGN KEY (movie_id) REFERENCES movie(id),
-    FOREIGN KEY (room_id) REFERENCES room(id)
+    format VARCHAR(100),
+    purchase_url TEXT
 );
 
-CREATE TABLE seat (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    function_id INT,
+-- Bases de datos creadas antes de que se guardaran formato y enlace de compra
+ALTER TABLE functions ADD COLUMN IF NOT EXISTS format VARCHAR(100);
+ALTER TABLE functions ADD COLUMN IF NOT EXISTS purchase_url TEXT;
+
+-- Una película no se proyecta dos veces a la misma hora en la misma sala
+CREATE UNIQUE INDEX IF NOT EXISTS uq_functions_movie_room_date_time ON functions (movie_id, room_id, date, time);
+
+CREATE TABLE IF NOT EXISTS seat (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    function_id BIGINT REFERENCES functions(id),
     number INT NOT NULL,
     seat_row VARCHAR(10) NOT NULL,
-    status ENUM('available', 'reserved', 'occupied') NOT NULL,
-    FOREIGN KEY (function_id) REFERENCES functions(id)
+    status seat_status NOT NULL DEFAULT 'available'
 );
 
-CREATE TABLE booking_seat (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    booking_id INT,
-    seat_id INT,
-    FOREIGN KEY (booking_id) REFERENCES booking(id),
-    FOREIGN KEY (seat_id) REFERENCES seat(id)
+CREATE TABLE IF NOT EXISTS booking_seat (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    booking_id INT REFERENCES booking(id),
+    seat_id BIGINT REFERENCES seat(id)
 );
 
-CREATE TABLE genre (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+-- Géneros y reparto
+CREATE TABLE IF NOT EXISTS genre (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     name VARCHAR(255) UNIQUE NOT NULL
 );
 
-CREATE TABLE movie_genre (
-    movie_id INT,
-    genre_id INT,
-    PRIMARY KEY (movie_id, genre_id),
-    FOREIGN KEY (movie_id) REFERENCES movie(id),
-    FOREIGN KEY (genre_id) REFERENCES genre(id)
+CREATE TABLE IF NOT EXISTS movie_genre (
+    movie_id INT REFERENCES movie(id),
+    genre_id INT REFERENCES genre(id),
+    PRIMARY KEY (movie_id, genre_id)
 );
 
-CREATE TABLE actor (
-    id INT PRIMARY KEY AUTO_INCREMENT,
+CREATE TABLE IF NOT EXISTS actor (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     biography TEXT,
     photo_url VARCHAR(255)
 );
 
-CREATE TABLE movie_actor (
-    movie_id INT,
-    actor_id INT,
-    PRIMARY KEY (movie_id, actor_id),
-    FOREIGN KEY (movie_id) REFERENCES movie(id),
-    FOREIGN KEY (actor_id) REFERENCES actor(id)
+CREATE TABLE IF NOT EXISTS movie_actor (
+    movie_id INT REFERENCES movie(id),
+    actor_id INT REFERENCES actor(id),
+    PRIMARY KEY (movie_id, actor_id)
 );
+
+-- Triggers de updated_at
+DROP TRIGGER IF EXISTS cinema_updated_at ON cinema;
+CREATE TRIGGER cinema_updated_at BEFORE UPDATE ON cinema
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS room_updated_at ON room;
+CREATE TRIGGER room_updated_at BEFORE UPDATE ON room
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Índices
+-- Sesiones de una película por fecha y hora ("todas las sesiones de la película Y esta semana")
+CREATE INDEX IF NOT EXISTS idx_functions_movie_date_time ON functions (movie_id, date, time);
+-- Sesiones de una sala en un día ("qué hay hoy en el cine X", a través de room)
+CREATE INDEX IF NOT EXISTS idx_functions_room_date ON functions (room_id, date);
+-- Butacas libres/ocupadas de una sesión
+CREATE INDEX IF NOT EXISTS idx_seat_function_status ON seat (function_id, status);
+
+-- Claves foráneas que no quedan cubiertas por otra clave o índice
+-- room (cinema_id) ya lo cubre uq_room_cinema_name
+DROP INDEX IF EXISTS idx_room_cinema;
+CREATE INDEX IF NOT EXISTS idx_manage_cinema ON manage (cinema_id);
+CREATE INDEX IF NOT EXISTS idx_booking_user ON booking (user_id);
+CREATE INDEX IF NOT EXISTS idx_booking_seat_booking ON booking_seat (booking_id);
+CREATE INDEX IF NOT EXISTS idx_booking_seat_seat ON booking_seat (seat_id);
+CREATE INDEX IF NOT EXISTS idx_movie_genre_genre ON movie_genre (genre_id);
+CREATE INDEX IF NOT EXISTS idx_movie_actor_actor ON movie_actor (actor_id);
+CREATE INDEX IF NOT EXISTS idx_actor_name ON actor (name);
@@ -10,8 +10,6 @@ import sys
 import subprocess
 import shutil
 import datetime
-import gzip
-import psycopg2
 from pathlib import Path
 import importlib.util
 from scrapers.cinesa_movie_extractor import CinesaMovieExtractor
@@ -19,6 +17,7 @@ from scrapers.cinesa_movie_extractor import CinesaMovieExtractor
 # Importar el cargador de configuración desde utils
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.config_loader import load_config
+from utils import db
 
 class GadgetCLI:
     """CLI principal para gestionar el scraper y la base de datos"""
@@ -26,6 +25,7 @@ class GadgetCLI:
     def __init__(self):
         self.config = load_config()
         self.db_config = self.config.get("database", {})
+        self.db = db.configurar(self.config)
         self.backup_dir = Path("backups")
         self.backup_dir.mkdir(exist_ok=True)
         
@@ -59,105 +59,68 @@ class GadgetCLI:
         print("🗄️ Configurando base de datos PostgreSQL...")
         
         try:
-            # Conectar a PostgreSQL
-            conn = psycopg2.connect(
-                host=self.db_config.get("host", "localhost"),
-                port=self.db_config.get("port", 5432),
-                user=self.db_config.get("user", "postgres"),
-                password=self.db_config.get("password", "postgres"),
-                # Conectar a 'postgres' por defecto para crear nuestra base de datos
-                database="postgres"
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
-            
-            # Crear la base de datos si no existe
-            db_name = self.db_config.get("name", "cinedb")
-            cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'")
-            if not cursor.fetchone():
-                cursor.execute(f"CREATE DATABASE {db_name}")
-                print(f"✅ Base de datos '{db_name}' creada")
-            else:
-                print(f"✅ Base de datos '{db_name}' ya existe")
-            
-            # Cerrar conexión a 'postgres'
-            cursor.close()
-            conn.close()
-            
-            # Reconectar a nuestra base de datos
-            conn = psycopg2.connect(
-                host=self.db_config.get("host", "localhost"),
-                port=self.db_config.get("port", 5432),
-                user=self.db_config.get("user", "postgres"),
-                password=self.db_config.get("password", "postgres"),
-                database=db_name
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
-            
-            # Aplicar esquema si existe
-            schema_path = Path("config/schema.sql")
-            if schema_path.exists():
-                print("📊 Aplicando esquema de base de datos...")
-                with open(schema_path, "r") as f:
-                    schema_sql = f.read()
-                cursor.execute(schema_sql)
-                print("✅ Esquema aplicado correctamente")
-            
-            cursor.close()
-            conn.close()
+            # Crear la base de datos si no existe (desde 'postgres', fuera del pool)
+            db_name = self.db.nombre
+            with self.db.conexion_mantenimiento() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,))
+                if not cursor.fetchone():
+                    cursor.execute(f'CREATE DATABASE "{db_name}"')
+                    print(f"✅ Base de datos '{db_name}' creada")
+                else:
+                    print(f"✅ Base de datos '{db_name}' ya existe")
             
+            self.apply_schema()
             return True
             
         except Exception as e:
             print(f"❌ Error configurando la base de datos: {e}")
             return False
     
-    def backup_db(self):
-        """Realiza backup de la base de datos PostgreSQL"""
+    def apply_schema(self):
+        """Aplica config/schema.sql (idempotente) sobre la base de datos configurada"""
+        schema_path = Path("config/schema.sql")
+        if not schema_path.exists():
+            return
+        print("📊 Aplicando esquema de base de datos...")
+        with open(schema_path, "r", encoding="utf-8") as f:
+            schema_sql = f.read()
+        with self.db.cursor() as cursor:
+            # Crear índices sobre tablas grandes puede superar el límite por sentencia del pool
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.execute(schema_sql)
+        print("✅ Esquema aplicado correctamente")
+    
+    def backup_db(self, args):
+        """Realiza backup de la base de datos PostgreSQL (SQL comprimido en streaming o directorio en paralelo)"""
+        from utils import db_backup
+        
         print("💾 Creando backup de la base de datos...")
         
         try:
-            # Configuración de la base de datos
-            db_host = self.db_config.get("host", "localhost")
-            db_port = self.db_config.get("port", 5432)
-            db_user = self.db_config.get("user", "postgres")
-            db_password = self.db_config.get("password", "postgres")
-            db_name = self.db_config.get("name", "cinedb")
-            
-            # Nombre del archivo de backup
+            db_name = self.db.nombre
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = self.backup_dir / f"backup_{db_name}_{timestamp}.sql"
             
-            # Configurar entorno para pg_dump
-            env = os.environ.copy()
-            env["PGPASSWORD"] = db_password
-            
-            # Ejecutar pg_dump
-            result = subprocess.run(
-                [
-                    "pg_dump",
-                    "-h", str(db_host),
-                    "-p", str(db_port),
-                    "-U", db_user,
-                    "-d", db_name,
-                    "-f", str(backup_file)
-                ],
-                env=env,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            # Comprimir el backup
-            with open(backup_file, 'rb') as f_in:
-                with gzip.open(f"{backup_file}.gz", 'wb') as f_out:
-                    f_out.writelines(f_in)
-            
-            # Eliminar el archivo sin comprimir
-            backup_file.unlink()
+            if args.formato == "directorio":
+                # Tamaño de la base de datos como referencia de compresión
+                with self.db.cursor() as cursor:
+                    cursor.execute("SELECT pg_database_size(current_database())")
+                    tamano = cursor.fetchone()[0]
+                destino = self.backup_dir / f"backup_{db_name}_{timestamp}.dir"
+                resultado = db_backup.volcar_directorio(
+                    self.db_config, destino, procesos=args.procesos, nivel=args.nivel, tamano_base_datos=tamano
+                )
+                referencia = "de la base de datos"
+            else:
+                destino = self.backup_dir / f"backup_{db_name}_{timestamp}.sql.gz"
+                resultado = db_backup.volcar_comprimido(self.db_config, str(destino), nivel=args.nivel)
+                referencia = "del SQL"
             
-            print(f"✅ Backup guardado en: {backup_file}.gz")
+            comprimidos = resultado['bytes_comprimidos']
+            originales = resultado['bytes_originales']
+            print(f"✅ Backup guardado en: {resultado['ruta']}")
+            print(f"⏱️ {resultado['segundos']:.1f} segundos, {comprimidos / 1024 / 1024:.1f} MB"
+                  + (f" ({comprimidos / originales:.1%} {referencia}, "
+                     f"{originales / 1024 / 1024:.1f} MB)" if originales else ""))
             return True
             
         except Exception as e:
@@ -169,69 +132,269 @@ class GadgetCLI:
         print("🔥 Purgando la base de datos...")
         
         try:
-            # Configuración de la base de datos
-            db_host = self.db_config.get("host", "localhost")
-            db_port = self.db_config.get("port", 5432)
-            db_user = self.db_config.get("user", "postgres")
-            db_password = self.db_config.get("password", "postgres")
-            db_name = self.db_config.get("name", "cinedb")
+            db_name = self.db.nombre
             
-            # Conectar a PostgreSQL (base de datos postgres)
-            conn = psycopg2.connect(
-                host=db_host,
-                port=db_port,
-                user=db_user,
-                password=db_password,
-                database="postgres"
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
+            # Las conexiones del pool apuntan a la base de datos que se va a eliminar
+            self.db.cerrar()
             
-            # Eliminar conexiones activas
-            cursor.execute(f"""
-                SELECT pg_terminate_backend(pg_stat_activity.pid)
-                FROM pg_stat_activity
-                WHERE pg_stat_activity.datname = '{db_name}'
-                AND pid <> pg_backend_pid()
-            """)
+            with self.db.conexion_mantenimiento() as conn, conn.cursor() as cursor:
+                self._terminate_connections(cursor, db_name)
+                
+                # Eliminar la base de datos
+                cursor.execute(f'DROP DATABASE IF EXISTS "{db_name}"')
+                print(f"💀 Base de datos '{db_name}' eliminada")
+                
+                # Recrear la base de datos
+                cursor.execute(f'CREATE DATABASE "{db_name}"')
+                print(f"✅ Base de datos '{db_name}' recreada")
             
-            # Eliminar la base de datos
-            cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
-            print(f"💀 Base de datos '{db_name}' eliminada")
+            self.apply_schema()
+            return True
             
-            # Recrear la base de datos
-            cursor.execute(f"CREATE DATABASE {db_name}")
-            print(f"✅ Base de datos '{db_name}' recreada")
+        except Exception as e:
+            print(f"❌ Error purgando la base de datos: {e}")
+            return False
+    
+    def _terminate_connections(self, cursor, db_name):
+        """Cierra las conexiones activas a una base de datos (cursor de mantenimiento)"""
+        cursor.execute("""
+            SELECT pg_terminate_backend(pg_stat_activity.pid)
+            FROM pg_stat_activity
+            WHERE pg_stat_activity.datname = %s
+            AND pid <> pg_backend_pid()
+        """, (db_name,))
+    
+    def _latest_backup(self):
+        """Backup más reciente de backups/ (fichero .sql.gz/.dump o directorio .dir)"""
+        candidatos = [p for p in self.backup_dir.glob("backup_*") if not p.name.endswith(".partial")]
+        return max(candidatos, key=lambda p: p.stat().st_mtime, default=None)
+    
+    def restore_db(self, args):
+        """Restaura un backup; con --temporal se restaura aparte y se intercambia al terminar"""
+        from utils import db_backup
+        
+        ruta = Path(args.backup) if args.backup else self._latest_backup()
+        if ruta is None or not ruta.exists():
+            print(f"❌ No se encontró el backup: {ruta or self.backup_dir}")
+            return False
+        
+        db_name = self.db.nombre
+        destino = f"{db_name}_restore" if args.temporal else db_name
+        
+        try:
+            print(f"♻️ Restaurando {ruta} ({db_backup.detectar_formato(ruta)}) en '{destino}'...")
             
-            cursor.close()
-            conn.close()
+            # Las conexiones del pool apuntan a la base de datos que se va a sustituir
+            self.db.cerrar()
             
-            # Aplicar esquema si existe
-            schema_path = Path("config/schema.sql")
-            if schema_path.exists():
-                conn = psycopg2.connect(
-                    host=db_host,
-                    port=db_port,
-                    user=db_user,
-                    password=db_password,
-                    database=db_name
-                )
-                conn.autocommit = True
-                cursor = conn.cursor()
-                
-                print("📊 Aplicando esquema de base de datos...")
-                with open(schema_path, "r") as f:
-                    schema_sql = f.read()
-                cursor.execute(schema_sql)
+            with self.db.conexion_mantenimiento() as conn, conn.cursor() as cursor:
+                if not args.temporal:
+                    self._terminate_connections(cursor, db_name)
+                cursor.execute(f'DROP DATABASE IF EXISTS "{destino}"')
+                cursor.execute(f'CREATE DATABASE "{destino}"')
+            
+            resultado = db_backup.restaurar(self.db_config, ruta, destino, procesos=args.procesos)
+            print(f"✅ Restaurado en {resultado['segundos']:.1f} segundos")
+            
+            if args.temporal:
+                # La base de datos actual se conserva con otro nombre por si hay que volver atrás
+                anterior = f"{db_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                with self.db.conexion_mantenimiento() as conn, conn.cursor() as cursor:
+                    self._terminate_connections(cursor, db_name)
+                    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,))
+                    if cursor.fetchone():
+                        cursor.execute(f'ALTER DATABASE "{db_name}" RENAME TO "{anterior}"')
+                        print(f"📦 Base de datos anterior conservada como '{anterior}'")
+                    cursor.execute(f'ALTER DATABASE "{destino}" RENAME TO "{db_name}"')
+                print(f"🔀 '{destino}' ahora es '{db_name}'")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error restaurando el backup: {e}")
+            return False
+    
+    def _snapshot_store(self):
+        """Almacén de instantáneas de películas según ``scraper.almacen``"""
+        from utils.snapshot_store import SnapshotStore
+        return SnapshotStore.desde_config(self.config, "data")
+    
+    def load_db(self, args):
+        """Carga las películas del almacén en la base de datos con COPY y una fusión por conjuntos"""
+        from utils.db_loader import CatalogLoader
+        from utils.sessions_writer import SessionsWriter
+        
+        almacen = self._snapshot_store()
+        print(f"📥 Cargando películas desde {almacen.directorio}...")
+        try:
+            with self.db.conexion() as conn:
+                inicio = datetime.datetime.now()
+                loader = CatalogLoader(conn)
+                resultado = loader.cargar(almacen, desde=args.desde)
+                duracion = (datetime.datetime.now() - inicio).total_seconds()
                 
-                cursor.close()
-                conn.close()
+                sesiones = None
+                if loader.sesiones:
+                    inicio = datetime.datetime.now()
+                    sesiones = SessionsWriter(conn).escribir(loader.sesiones)
+                    duracion_sesiones = (datetime.datetime.now() - inicio).total_seconds()
             
+            print(f"✅ {resultado['peliculas']} películas de {resultado['registros']} registros "
+                  f"({resultado['nuevas']} nuevas, {resultado['actualizadas']} actualizadas, "
+                  f"{resultado['descartados']} descartados) en {duracion:.2f} segundos")
+            if sesiones:
+                print(f"✅ {sesiones['sesiones']} sesiones ({sesiones['insertadas']} nuevas, "
+                      f"{sesiones['actualizadas']} actualizadas, {sesiones['eliminadas']} eliminadas, "
+                      f"{sesiones['sin_pelicula']} sin película) en {duracion_sesiones:.2f} segundos")
             return True
             
         except Exception as e:
-            print(f"❌ Error purgando la base de datos: {e}")
+            print(f"❌ Error cargando películas: {e}")
+            return False
+    
+    def reparse(self, args):
+        """Vuelve a extraer las películas de las páginas archivadas, sin visitar el sitio"""
+        from scrapers import cinesa_reparse
+        
+        archivo_config = self.config.get("scraper", {}).get("archivo", {}) or {}
+        directorio_archivo = Path("data") / archivo_config.get("directorio", "archivo")
+        if not directorio_archivo.exists():
+            print(f"❌ No existe el archivo de páginas: {directorio_archivo}")
+            return False
+        
+        print(f"🔁 Re-extrayendo películas desde {directorio_archivo}...")
+        inicio = datetime.datetime.now()
+        almacen = self._snapshot_store()
+        try:
+            resultado = cinesa_reparse.reparsear(
+                str(directorio_archivo), almacen,
+                procesos=args.procesos, desde=args.desde, todas=args.todas
+            )
+        finally:
+            almacen.cerrar()
+        duracion = (datetime.datetime.now() - inicio).total_seconds()
+        print(f"✅ {resultado['peliculas']} películas re-extraídas de {resultado['paginas']} páginas "
+              f"({resultado['sin_marcado']} sin el marcado esperado) en {duracion:.1f} segundos")
+        return True
+    
+    def query(self, args):
+        """Consulta las películas del almacén con el índice invertido en memoria"""
+        import json
+        from utils.movie_index import MovieIndex
+        
+        inicio = datetime.datetime.now()
+        indice = MovieIndex.cargar(self._snapshot_store(), usar_cache=not args.sin_cache)
+        carga = (datetime.datetime.now() - inicio).total_seconds() * 1000
+        
+        try:
+            desde = datetime.date.fromisoformat(args.desde) if args.desde else None
+            hasta = datetime.date.fromisoformat(args.hasta) if args.hasta else None
+        except ValueError as e:
+            print(f"❌ Fecha no válida (AAAA-MM-DD): {e}")
             return False
+        
+        inicio = datetime.datetime.now()
+        peliculas = indice.consultar(
+            genero=args.genero, actor=args.actor, director=args.director,
+            clasificacion=args.clasificacion, mes=args.mes, anio=args.anio,
+            desde=desde, hasta=hasta, titulo=args.titulo
+        )
+        consulta = (datetime.datetime.now() - inicio).total_seconds() * 1000
+        
+        if args.json:
+            print(json.dumps(peliculas, ensure_ascii=False, indent=2))
+            return True
+        
+        for pelicula in peliculas[:args.limite or None]:
+            generos = ", ".join(pelicula['generos'])
+            print(f"  {pelicula['fecha_estreno'] or '----------'}  {pelicula['titulo']}" + (f"  [{generos}]" if generos else ""))
+        print(f"🔎 {len(peliculas)} de {len(indice.peliculas)} películas "
+              f"(índice {carga:.1f} ms, consulta {consulta:.2f} ms)")
+        return True
+    
+    def showtimes(self, args):
+        """Próximas sesiones desde la tabla columnar en memoria"""
+        from utils.showtime_table import ShowtimeTable
+        
+        try:
+            desde = datetime.datetime.fromisoformat(args.desde) if args.desde else datetime.datetime.now()
+        except ValueError as e:
+            print(f"❌ Fecha no válida (AAAA-MM-DD o AAAA-MM-DD HH:MM): {e}")
+            return False
+        
+        inicio = datetime.datetime.now()
+        almacen = self._snapshot_store()
+        try:
+            tabla = ShowtimeTable.desde_almacen(almacen)
+        finally:
+            almacen.cerrar()
+        carga = (datetime.datetime.now() - inicio).total_seconds() * 1000
+        
+        inicio = datetime.datetime.now()
+        sesiones = tabla.proximas(args.limite, desde, cine=args.cine, pelicula=args.pelicula)
+        consulta = (datetime.datetime.now() - inicio).total_seconds() * 1000
+        
+        for sesion in sesiones:
+            formato = f"  ({sesion['formato']})" if sesion['formato'] else ""
+            print(f"  {sesion['inicio']:%Y-%m-%d %H:%M}  {sesion['cine']}  {sesion['titulo']}{formato}")
+        print(f"🎬 {len(sesiones)} de {len(tabla)} sesiones en {len(tabla.cines)} cines "
+              f"({tabla.memoria() / 1024:.0f} KB; tabla {carga:.0f} ms, consulta {consulta:.2f} ms)")
+        return True
+    
+    def search(self, args):
+        """Búsqueda de texto completo (FTS5) en título, sinopsis, dirección y reparto"""
+        import sqlite3
+        from utils.search_index import SearchIndex
+        
+        buscador = SearchIndex.desde_config(self.config, "data")
+        if buscador is None:
+            print("❌ La búsqueda está desactivada (scraper.busqueda.enabled)")
+            return False
+        
+        almacen = self._snapshot_store()
+        try:
+            reindexadas = buscador.sincronizar(almacen)
+            if reindexadas:
+                print(f"📚 Índice de búsqueda actualizado con {reindexadas} películas")
+            
+            inicio = datetime.datetime.now()
+            try:
+                resultados = buscador.buscar(args.texto, limite=args.limite, avanzada=args.avanzada)
+            except sqlite3.OperationalError as e:
+                print(f"❌ Consulta no válida: {e}")
+                return False
+            consulta = (datetime.datetime.now() - inicio).total_seconds() * 1000
+        finally:
+            buscador.cerrar()
+            almacen.cerrar()
+        
+        for resultado in resultados:
+            print(f"  {resultado['fecha_estreno'] or '----------'}  {resultado['titulo']}")
+            print(f"      {resultado['fragmento']}")
+        print(f"🔎 {len(resultados)} resultados en {consulta:.2f} ms")
+        return True
+    
+    def compact(self, args):
+        """Compacta el almacén de instantáneas (y opcionalmente importa JSON del formato anterior)"""
+        from utils.movie_normalizer import tipar_almacen
+        from utils.snapshot_store import importar_json
+        
+        almacen = self._snapshot_store()
+        if args.importar:
+            print(f"📥 Importando JSON de películas desde {args.importar}...")
+            importados = importar_json(almacen, args.importar)
+            print(f"✅ {importados['importados']} de {importados['ficheros']} ficheros importados")
+        
+        # Las instantáneas anteriores a los campos tipados se completan antes de compactar
+        tipadas = tipar_almacen(almacen)
+        if tipadas:
+            print(f"🔢 Campos tipados añadidos a {tipadas} películas")
+        almacen.cerrar()
+        
+        print(f"🗜️ Compactando {almacen.directorio}...")
+        resultado = almacen.compactar()
+        print(f"✅ {resultado['segmentos']} segmentos -> 1 con {resultado['registros']} registros "
+              f"({resultado['bytes_antes'] / 1024:.1f} KB -> {resultado['bytes_despues'] / 1024:.1f} KB)")
+        return True
     
     def clean(self):
         """Limpia archivos temporales y caché"""
@@ -283,8 +446,9 @@ class GadgetCLI:
                 print(f"🔍 Extrayendo detalles de: {url_pelicula}")
                 movie_data = extractor.extract_movie_details(url_pelicula)
                 
-                # Cerrar navegador
+                # Cerrar navegador y descargador de imágenes
                 driver.quit()
+                extractor.cerrar()
                 
                 if movie_data:
                     print(f"✅ Detalles extraídos correctamente para: {movie_data.get('titulo', 'Película desconocida')}")
@@ -310,6 +474,10 @@ class GadgetCLI:
                 cmd.extend(["--hilos", str(args.hilos)])
             if args.demora:
                 cmd.extend(["--demora", str(args.demora)])
+            if args.http:
+                cmd.append("--http")
+            if args.incremental:
+                cmd.append("--incremental")
             
             # Ejecutar el scraper
             subprocess.run(cmd, check=True)
@@ -335,9 +503,67 @@ def main():
     scrape_parser.add_argument("--hilos", "-t", type=int, help="Número de hilos para procesamiento")
     scrape_parser.add_argument("--demora", "-d", type=int, help="Demora entre peticiones en segundos")
     scrape_parser.add_argument("--pelicula", "-p", type=str, help="URL o ID de una película específica")
+    scrape_parser.add_argument("--http", action="store_true", help="Obtener detalles por HTTP con Selenium como respaldo")
+    scrape_parser.add_argument("--incremental", action="store_true", help="Saltar las películas que no han cambiado desde la última ejecución")
+    
+    # Comando: load
+    load_parser = subparsers.add_parser("load", help="Cargar las películas del almacén en la base de datos")
+    load_parser.add_argument("--desde", type=str, help="Fecha mínima de los segmentos (AAAAMMDD)")
+    
+    # Comando: reparse
+    reparse_parser = subparsers.add_parser("reparse", help="Re-extraer películas desde el archivo de páginas")
+    reparse_parser.add_argument("--procesos", "-j", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    reparse_parser.add_argument("--desde", type=str, help="Fecha mínima de las páginas (AAAAMMDD)")
+    reparse_parser.add_argument("--todas", action="store_true", help="Procesar todas las versiones archivadas de cada página")
+    
+    # Comando: query (los filtros se combinan con Y; se pueden repetir)
+    query_parser = subparsers.add_parser("query", help="Consultar las películas scrapeadas por género, reparto, estreno...")
+    query_parser.add_argument("--genero", "-g", action="append", help="Género (p. ej. Drama)")
+    query_parser.add_argument("--actor", "-a", action="append", help="Actor o actriz (nombre completo)")
+    query_parser.add_argument("--director", "-d", action="append", help="Director o directora (nombre completo)")
+    query_parser.add_argument("--clasificacion", "-c", action="append", help="Edad mínima (7, 12, 16, 18), TP o pendiente")
+    query_parser.add_argument("--mes", help="Mes de estreno (número o nombre, p. ej. junio)")
+    query_parser.add_argument("--anio", type=int, help="Año de estreno")
+    query_parser.add_argument("--desde", help="Estrenadas desde esta fecha (AAAA-MM-DD)")
+    query_parser.add_argument("--hasta", help="Estrenadas hasta esta fecha (AAAA-MM-DD)")
+    query_parser.add_argument("--titulo", "-t", help="Palabras del título")
+    query_parser.add_argument("--limite", "-n", type=int, default=0, help="Mostrar como máximo N películas (0 = todas)")
+    query_parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    query_parser.add_argument("--sin-cache", action="store_true", help="Reconstruir el índice sin usar ni escribir la caché")
+    
+    # Comando: showtimes
+    showtimes_parser = subparsers.add_parser("showtimes", help="Próximas sesiones de las películas scrapeadas")
+    showtimes_parser.add_argument("--cine", help="Nombre del cine")
+    showtimes_parser.add_argument("--pelicula", "-p", help="Palabras del título")
+    showtimes_parser.add_argument("--desde", help="A partir de esta fecha y hora (default: ahora)")
+    showtimes_parser.add_argument("--limite", "-n", type=int, default=10, help="Mostrar como máximo N sesiones (default: 10)")
+    
+    # Comando: search
+    search_parser = subparsers.add_parser("search", help="Buscar texto en título, sinopsis, dirección y reparto")
+    search_parser.add_argument("texto", help="Palabras a buscar (la última también como prefijo)")
+    search_parser.add_argument("--limite", "-n", type=int, default=10, help="Mostrar como máximo N resultados (default: 10)")
+    search_parser.add_argument("--avanzada", action="store_true",
+                               help="Usar la sintaxis de FTS5 tal cual (AND, OR, NOT, NEAR, actores:...)")
+    
+    # Comando: compact
+    compact_parser = subparsers.add_parser("compact", help="Compactar el almacén de instantáneas de películas")
+    compact_parser.add_argument("--importar", type=str, metavar="DIRECTORIO",
+                                help="Importar antes los JSON de película del formato anterior (p. ej. data/peliculas)")
     
     # Comando: backup
     backup_parser = subparsers.add_parser("backup", help="Crear backup de la base de datos")
+    backup_parser.add_argument("--formato", choices=["sql", "directorio"], default="sql",
+                               help="sql: volcado SQL comprimido en streaming; directorio: pg_dump -Fd en paralelo (default: sql)")
+    backup_parser.add_argument("--procesos", "-j", type=int, default=4, help="Trabajos en paralelo del formato directorio (default: 4)")
+    backup_parser.add_argument("--nivel", type=int, default=6, choices=range(1, 10), metavar="1-9", help="Nivel de compresión (default: 6)")
+    
+    # Comando: restore
+    restore_parser = subparsers.add_parser("restore", help="Restaurar un backup de la base de datos")
+    restore_parser.add_argument("backup", nargs="?", help="Fichero o directorio del backup (default: el más reciente de backups/)")
+    restore_parser.add_argument("--procesos", "-j", type=int, default=os.cpu_count() or 4,
+                                help="Trabajos en paralelo de pg_restore (default: núcleos disponibles)")
+    restore_parser.add_argument("--temporal", action="store_true",
+                                help="Restaurar en una base de datos aparte e intercambiarla al terminar")
     
     # Comando: purge
     purge_parser = subparsers.add_parser("purge", help="Purgar la base de datos")
@@ -355,8 +581,22 @@ def main():
         success = cli.setup_venv() and cli.setup_db()
     elif args.command == "scrape":
         success = cli.run_scraper(args)
+    elif args.command == "load":
+        success = cli.load_db(args)
+    elif args.command == "reparse":
+        success = cli.reparse(args)
+    elif args.command == "query":
+        success = cli.query(args)
+    elif args.command == "showtimes":
+        success = cli.showtimes(args)
+    elif args.command == "search":
+        success = cli.search(args)
+    elif args.command == "compact":
+        success = cli.compact(args)
     elif args.command == "backup":
-        success = cli.backup_db()
+        success = cli.backup_db(args)
+    elif args.command == "restore":
+        success = cli.restore_db(args)
     elif args.command == "purge":
         success = cli.purge_db()
     elif args.command == "clean":
@@ -365,6 +605,7 @@ def main():
         parser.print_help()
         return 0
     
+    cli.db.cerrar()
     return 0 if success else 1
 
 if __name__ == "__main__":
@@ -3,20 +3,27 @@ Extractor específico para detalles de películas de Cinesa
 """
 
 import os
-import re
+import functools
+import urllib.parse
 import logging
-import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from PIL import Image
+from selenium.common.exceptions import NoSuchElementException
 from io import BytesIO
 from datetime import datetime
-import time
-import random
+from concurrent.futures import Future
+from utils.config_loader import load_config
+from utils.wait_engine import WaitEngine
+from utils import rate_limiter
+from utils import http_cache
+from utils.image_fetcher import AsyncImageFetcher
+from utils.image_processor import ImageProcessor
+from utils.poster_store import PosterStore
+from utils.snapshot_store import SnapshotStore
+from utils.movie_normalizer import tipar_pelicula
+from scrapers import cinesa_parser
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,7 +32,7 @@ logger = logging.getLogger("CinesaExtractor")
 class CinesaMovieExtractor:
     """Clase para extraer información detallada de películas de Cinesa"""
     
-    def __init__(self, driver=None, base_url="https://www.cinesa.es", data_dir="data"):
+    def __init__(self, driver=None, base_url="https://www.cinesa.es", data_dir="data", waits=None):
         """
         Inicializar el extractor
         
@@ -33,17 +40,17 @@ class CinesaMovieExtractor:
             driver: WebDriver de Selenium (opcional)
             base_url: URL base de Cinesa
             data_dir: Directorio para guardar datos
+            waits: WaitEngine para las esperas por condición (opcional)
         """
         self.driver = driver
         self.base_url = base_url
+        self.waits = waits or WaitEngine()
         
         # Directorios para guardar datos
         self.data_dir = data_dir
-        self.movies_dir = os.path.join(data_dir, "peliculas")
         self.images_dir = os.path.join(data_dir, "imagenes")
         
         # Crear directorios si no existen
-        os.makedirs(self.movies_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
         
         # Headers para requests
@@ -52,6 +59,30 @@ class CinesaMovieExtractor:
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
             "Accept-Language": "es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3",
         }
+        
+        # Limitador adaptativo y caché condicional compartidos del proceso: el
+        # extractor navega con Selenium y solo descarga por HTTP las imágenes,
+        # que pasan por ambos dentro de AsyncImageFetcher
+        config = load_config()
+        rate_limiter.configurar(config)
+        self.cache = http_cache.configurar(config)
+        
+        # Descargas de imágenes en segundo plano hacia el almacén por contenido
+        self.imagenes = AsyncImageFetcher(headers=self.headers, cache=self.cache)
+        self.posters = PosterStore(self.images_dir)
+        self.procesador = ImageProcessor.desde_config(config)
+        
+        # Películas en el almacén de instantáneas compartido con el scraper
+        self.snapshots = SnapshotStore.desde_config(config, data_dir)
+    
+    def cerrar(self):
+        """Espera las descargas y optimizaciones pendientes y guarda los índices de pósters y películas"""
+        self.imagenes.cerrar()
+        self.procesador.cerrar()
+        self.posters.guardar_indice()
+        self.snapshots.cerrar()
+        if self.cache:
+            self.cache.log_resumen()
     
     def extract_movie_details(self, url):
         """
@@ -72,17 +103,19 @@ class CinesaMovieExtractor:
                 return None
             
             # Navegar a la URL
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 4))  # Esperar carga
+            rate_limiter.navegar(self.driver, url)
+            marcado = self.waits.selectores(self.driver, [".v-film-title__text", "h1.film-title", ".movie-title h1"], paso='detalle')
+            rate_limiter.confirmar_navegacion(url, bool(marcado))
             
             # Manejar cookies si aparecen
-            try:
-                cookie_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
-                )
+            cookie_button = self.waits.esperar(
+                self.driver, 'cookies',
+                EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
+            )
+            if cookie_button:
                 cookie_button.click()
-                time.sleep(1)
-            except (TimeoutException, NoSuchElementException):
+                self.waits.esperar(self.driver, 'cookies', EC.invisibility_of_element_located((By.ID, "onetrust-accept-btn-handler")))
+            else:
                 logger.info("No se encontró el botón de cookies o ya estaban aceptadas")
             
             # Extraer título
@@ -95,10 +128,16 @@ class CinesaMovieExtractor:
                 [".v-film-image__img img", ".film-poster img", ".movie-poster img"]
             )
             
-            # Descargar y guardar la imagen
-            poster_path = None
+            # Extraer ID de la película
+            movie_id = None
+            url_parts = url.rstrip('/').split('/')
+            if url_parts and len(url_parts) >= 2:
+                movie_id = url_parts[-1]
+            
+            # Encolar la descarga de la imagen mientras se extrae el resto
+            poster_download = None
             if poster_url:
-                poster_path = self._download_image(poster_url, titulo)
+                poster_download = self._download_image(poster_url, titulo, movie_id)
             
             # Extraer duración
             duracion = self._extract_element_text(
@@ -136,11 +175,11 @@ class CinesaMovieExtractor:
                 [".v-film-synopsis .v-display-text-part", ".film-synopsis", ".synopsis"]
             )
             
-            # Extraer ID de la película
-            movie_id = None
-            url_parts = url.rstrip('/').split('/')
-            if url_parts and len(url_parts) >= 2:
-                movie_id = url_parts[-1]
+            # Esperar a la descarga del póster y a su optimización (se guarda la versión optimizada si la hay)
+            poster_path = poster_download.result() if poster_download else None
+            if poster_path:
+                self.procesador.esperar(poster_path, timeout=60)
+                poster_path = self.posters.ruta_preferida(poster_path)
             
             # Construir el objeto de película
             movie_data = {
@@ -200,76 +239,68 @@ class CinesaMovieExtractor:
             try:
                 element = self.driver.find_element(By.CSS_SELECTOR, selector)
                 if element:
-                    return element.get_attribute("src")
+                    actual, src, srcset, data_src = self.driver.execute_script(
+                        "var img = arguments[0];"
+                        "return [img.currentSrc, img.getAttribute('src'), img.getAttribute('srcset'), img.getAttribute('data-src')];",
+                        element
+                    )
+                    url = cinesa_parser.elegir_url_imagen(src, srcset, data_src, actual)
+                    return urllib.parse.urljoin(self.driver.current_url, url) if url else None
             except NoSuchElementException:
                 continue
         return None
     
-    def _download_image(self, image_url, title):
-        """Descarga y guarda una imagen"""
+    def _download_image(self, image_url, title, movie_id=None):
+        """
+        Encola la descarga de una imagen en el almacén de pósters
+        
+        Returns:
+            concurrent.futures.Future con la ruta local (None si falla), o None
+        """
         if not image_url:
             return None
             
         try:
-            # Crear nombre de archivo seguro
-            safe_title = re.sub(r'[^\w\s-]', '', title).strip().replace(' ', '_')
-            if not safe_title:
-                safe_title = 'imagen_sin_titulo'
+            # Verificar si la URL ya se descargó antes
+            image_path = self.posters.buscar_url(image_url)
+            if image_path:
+                logger.info(f"La imagen para '{title}' ya existe: {image_path}")
+                if movie_id:
+                    self.posters.asociar_pelicula(movie_id, image_path)
+                existing = Future()
+                existing.set_result(image_path)
+                return existing
                 
             # Extraer extensión o usar .jpg
             extension = os.path.splitext(image_url.split('?')[0])[1]
             if not extension:
                 extension = '.jpg'
                 
-            image_path = os.path.join(self.images_dir, f"{safe_title}{extension}")
-            
-            # Verificar si ya existe
-            if os.path.exists(image_path):
-                logger.info(f"La imagen para '{title}' ya existe: {image_path}")
-                return image_path
-                
-            # Descargar la imagen
-            response = requests.get(image_url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            # Guardar la imagen
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
-                
-            # Optimizar la imagen
-            try:
-                img = Image.open(image_path)
-                img.save(image_path, optimize=True, quality=85)
-            except Exception as e:
-                logger.warning(f"No se pudo optimizar la imagen: {e}")
-                
-            logger.info(f"Imagen guardada para '{title}': {image_path}")
-            return image_path
+            # Descargar, guardar y optimizar en segundo plano
+            logger.info(f"Descarga de la imagen para '{title}' encolada: {image_url}")
+            return self.imagenes.encolar(
+                image_url,
+                functools.partial(self._store_image, url=image_url, movie_id=movie_id, extension=extension)
+            )
             
         except Exception as e:
             logger.error(f"Error al descargar imagen para '{title}': {e}")
             return None
     
+    def _store_image(self, content, url=None, movie_id=None, extension='.jpg'):
+        """Guarda una imagen en el almacén por contenido y encola su optimización si no se hizo ya"""
+        image_path, _ = self.posters.guardar(content, url=url, id_pelicula=movie_id, extension=extension)
+        if not self.posters.optimizada(image_path):
+            self.procesador.encolar(content, image_path, self.posters.marcar_optimizada)
+        return image_path
+    
     def _save_movie_data(self, movie_data):
-        """Guarda los datos de la película en un archivo JSON"""
-        import json
-        
-        # Crear nombre de archivo seguro
+        """Añade los datos de la película al almacén de instantáneas"""
         title = movie_data.get("titulo", "pelicula_sin_titulo")
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip().replace(' ', '_')
-        if not safe_title:
-            safe_title = 'pelicula_sin_titulo'
-            
-        # Añadir fecha al nombre del archivo
-        date_str = datetime.now().strftime("%Y%m%d")
-        file_path = os.path.join(self.movies_dir, f"{safe_title}_{date_str}.json")
-        
-        # Guardar como JSON
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(movie_data, f, ensure_ascii=False, indent=2)
-            logger.info(f"Datos guardados para '{title}': {file_path}")
-            return file_path
+            key = self.snapshots.guardar(tipar_pelicula(movie_data))
+            logger.info(f"Datos guardados para '{title}' ({key})")
+            return key
         except Exception as e:
             logger.error(f"Error al guardar datos para '{title}': {e}")
             return None 
\ No newline at end of file
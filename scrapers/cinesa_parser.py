@@ -0,0 +1,266 @@
+"""
+Funciones de análisis del HTML de las páginas de Cinesa
+
+No dependen de Selenium: reciben el HTML (o un BeautifulSoup ya construido)
+y devuelven los datos extraídos, de modo que sirven igual para páginas
+descargadas con requests que para el ``page_source`` de un navegador.
+
+Los textos se leen con ``texto_visible``, que imita al ``.text`` de
+Selenium: omite los nodos ocultos y separa con un espacio el texto de
+elementos hijos distintos (``.text`` de bs4 lo pega sin separador).
+"""
+
+import re
+import urllib.parse
+from collections import namedtuple
+
+import soupsieve
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+# Selectores de las tarjetas de película del listado, en orden de preferencia
+SELECTORES_LISTADO = [
+    "li.v-film-list-film",
+    ".v-film-list-film",
+    ".film-list-item",
+    ".v-film-grid__item",
+    ".movie-container"
+]
+
+# Selectores alternativos de cada campo, en orden de preferencia
+SELECTORES_TITULO = ['.v-film-title__text', '.film-title', 'h1']
+SELECTORES_DURACION = ['.v-film-runtime .v-display-text-part', '.film-runtime', '.duration']
+SELECTORES_FECHA_ESTRENO = ['.v-film-release-date .v-display-text-part', '.release-date', '.film-release-date']
+SELECTORES_GENEROS = ['.v-film-genres__list .v-description-list-item__description', '.film-genres span', '.genres']
+SELECTORES_CLASIFICACION = ['.v-film-classification-description .v-description-list-item__description', '.film-classification', '.rating']
+SELECTORES_DIRECTORES = ['.v-film-directors .v-display-text-part', '.film-directors', '.directors']
+SELECTORES_ACTORES = ['.v-film-actors .v-display-text-part', '.film-actors', '.actors']
+SELECTORES_SINOPSIS = ['.v-film-synopsis .v-display-text-part', '.film-synopsis', '.synopsis']
+SELECTORES_POSTER = ['.v-film-image__img img', '.film-poster img', '.movie-poster img']
+
+# Marcado que debe tener una página de detalle completa (renderizada o no)
+SELECTORES_MARCADO_DETALLE = ['.v-film-title__text', '.v-film-synopsis', '.v-film-runtime']
+
+# Plan de selectores de sesiones, compilado una sola vez al importar el módulo
+PlanSesiones = namedtuple('PlanSesiones', ['cine', 'nombre_cine', 'fecha', 'boton', 'hora', 'formato'])
+PLAN_SESIONES = PlanSesiones(
+    cine=soupsieve.compile('.v-cinema-showtime-list__item, .cinema-container'),
+    nombre_cine=soupsieve.compile('.v-cinema-showtime-list__cinema-name, .cinema-name'),
+    fecha=soupsieve.compile('.v-showtime-list__date, .date'),
+    boton=soupsieve.compile('.v-showtime-button, .showtime'),
+    hora=soupsieve.compile('.v-showtime-button__time, .time'),
+    formato=soupsieve.compile('.v-showtime-button__attributes, .format'),
+)
+
+# Elementos cuyo contenido nunca se pinta
+ETIQUETAS_SIN_TEXTO = {'script', 'style', 'template', 'noscript'}
+
+# "filmId": "HO00002126" o "movieId": "..." dentro de los scripts de la página
+PATRON_ID_PELICULA = re.compile(r'"(filmId|movieId)"[:\s]+"([^"]+)"')
+
+
+def id_pelicula_desde_url(url_pelicula):
+    """ID de la película (p. ej. HO00002052) a partir de su URL"""
+    match = re.search(r'/peliculas/[^/]+/([^/?#]+)', url_pelicula or '')
+    return match.group(1) if match else None
+
+
+def crear_soup(html):
+    """Construye un BeautifulSoup a partir del HTML de una página"""
+    return BeautifulSoup(html, 'html.parser')
+
+
+def _oculto(elem):
+    if elem.name in ETIQUETAS_SIN_TEXTO or elem.has_attr('hidden'):
+        return True
+    estilo = (elem.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in estilo or 'visibility:hidden' in estilo
+
+
+def _partes_visibles(elem):
+    for hijo in elem.children:
+        if isinstance(hijo, Tag):
+            if not _oculto(hijo):
+                yield from _partes_visibles(hijo)
+        elif type(hijo) is NavigableString:
+            # Solo texto: los comentarios, CDATA... son subclases de NavigableString
+            yield hijo
+
+
+def texto_visible(elem):
+    """
+    Texto visible de un elemento, como el ``.text`` de Selenium
+
+    Equivale a ``get_text(' ', strip=True)`` sin los nodos ocultos (atributo
+    ``hidden``, ``display:none``/``visibility:hidden`` en línea, scripts...)
+    y con los espacios colapsados.
+    """
+    if elem is None or _oculto(elem):
+        return ''
+    return ' '.join(' '.join(_partes_visibles(elem)).split())
+
+
+def _texto(soup, selectores, defecto=None):
+    """Texto del primer elemento que coincide con alguno de los selectores"""
+    for selector in selectores:
+        elem = soup.select_one(selector)
+        if elem:
+            return texto_visible(elem)
+    return defecto
+
+
+def _textos(soup, selectores):
+    """Textos de todos los elementos del primer selector que coincide"""
+    for selector in selectores:
+        elems = soup.select(selector)
+        if elems:
+            return [texto_visible(elem) for elem in elems]
+    return []
+
+
+def tiene_marcado_detalle(soup):
+    """Indica si el HTML contiene el marcado esperado de una página de película"""
+    return soup.select_one(SELECTORES_MARCADO_DETALLE[0]) is not None and any(
+        soup.select_one(selector) is not None for selector in SELECTORES_MARCADO_DETALLE[1:]
+    )
+
+
+def mejor_url_srcset(srcset):
+    """URL del candidato de mayor resolución de un atributo srcset, o None"""
+    mejor, mejor_valor = None, -1.0
+    for candidato in (srcset or '').split(','):
+        partes = candidato.split()
+        if not partes:
+            continue
+        descriptor = partes[1] if len(partes) > 1 else '1x'
+        try:
+            valor = float(descriptor[:-1])
+        except ValueError:
+            continue
+        if valor > mejor_valor:
+            mejor, mejor_valor = partes[0], valor
+    return mejor
+
+
+def elegir_url_imagen(src=None, srcset=None, data_src=None, actual=None):
+    """
+    URL original de una imagen a partir de sus atributos
+
+    Se prefiere el candidato más grande de ``srcset``; después la fuente que
+    el navegador está mostrando (``currentSrc``), ``src`` y, para imágenes
+    de carga diferida, ``data-src``.
+    """
+    for url in (mejor_url_srcset(srcset), actual, src, data_src):
+        if url:
+            return url
+    return None
+
+
+def extraer_url_poster(soup):
+    """URL del póster de la película, o None si no aparece en el HTML"""
+    for selector in SELECTORES_POSTER:
+        elem = soup.select_one(selector)
+        url = elem and elegir_url_imagen(elem.get('src'), elem.get('srcset'), elem.get('data-src'))
+        if url:
+            return url
+    return None
+
+
+# Campos de la ficha que devuelve parsear_detalles (los datos estáticos de la película)
+CAMPOS_DETALLES = (
+    'titulo', 'duracion', 'fecha_estreno', 'generos',
+    'clasificacion', 'directores', 'actores', 'sinopsis',
+)
+
+
+def parsear_detalles(soup):
+    """
+    Extrae los datos de una página de detalle de película
+
+    Args:
+        soup: BeautifulSoup de la página de la película
+
+    Returns:
+        dict: titulo, duracion, fecha_estreno, generos, clasificacion,
+        directores, actores y sinopsis
+    """
+    actores_text = _texto(soup, SELECTORES_ACTORES)
+    actores = [a.strip() for a in actores_text.split(',')] if actores_text is not None else []
+
+    return {
+        'titulo': _texto(soup, SELECTORES_TITULO, "Título no disponible"),
+        'duracion': _texto(soup, SELECTORES_DURACION),
+        'fecha_estreno': _texto(soup, SELECTORES_FECHA_ESTRENO),
+        'generos': _textos(soup, SELECTORES_GENEROS),
+        'clasificacion': _texto(soup, SELECTORES_CLASIFICACION),
+        'directores': _texto(soup, SELECTORES_DIRECTORES),
+        'actores': actores,
+        'sinopsis': _texto(soup, SELECTORES_SINOPSIS, "Sinopsis no disponible"),
+    }
+
+
+def extraer_id_pelicula(html, url_pelicula=None):
+    """
+    ID de la película (p. ej. HO00002052) en una sola pasada sobre el HTML
+
+    Busca ``"filmId": "..."`` (o ``"movieId"`` si no hay filmId) en los
+    scripts embebidos y, si no aparece, lo toma de la URL.
+    """
+    id_movie = None
+    for match in PATRON_ID_PELICULA.finditer(html or ''):
+        if match.group(1) == 'filmId':
+            return match.group(2)
+        if id_movie is None:
+            id_movie = match.group(2)
+    return id_movie or id_pelicula_desde_url(url_pelicula)
+
+
+def extraer_sesiones(soup, url_pelicula=None):
+    """
+    Extrae las sesiones por cine del HTML de una página de película
+
+    Recorre el árbol una sola vez con el plan de selectores compilado, sin
+    ninguna llamada al navegador. Si se indica ``url_pelicula``, las URLs de
+    compra se resuelven como absolutas, igual que ``get_attribute('href')``.
+
+    Returns:
+        list: [{'nombre_cine', 'sesiones': [{fecha, hora, formato, url_compra}]}]
+    """
+    plan = PLAN_SESIONES
+    resultado_sesiones = []
+
+    for container in plan.cine.select(soup):
+        nombre_cine_elem = plan.nombre_cine.select_one(container)
+        if not nombre_cine_elem:
+            continue
+        nombre_cine = texto_visible(nombre_cine_elem)
+
+        sesiones_cine = []
+        for fecha_elem in plan.fecha.select(container):
+            fecha = texto_visible(fecha_elem)
+            sesiones_elem = fecha_elem.find_next_sibling()
+            if sesiones_elem is None:
+                continue
+
+            for boton in plan.boton.select(sesiones_elem):
+                hora_elem = plan.hora.select_one(boton)
+                if not hora_elem:
+                    continue
+                formato_elem = plan.formato.select_one(boton)
+                url_compra = boton.get('href') or ""
+                if url_compra and url_pelicula:
+                    url_compra = urllib.parse.urljoin(url_pelicula, url_compra)
+
+                sesiones_cine.append({
+                    'fecha': fecha,
+                    'hora': texto_visible(hora_elem),
+                    'formato': texto_visible(formato_elem),
+                    'url_compra': url_compra
+                })
+
+        if sesiones_cine:
+            resultado_sesiones.append({
+                'nombre_cine': nombre_cine,
+                'sesiones': sesiones_cine
+            })
+
+    return resultado_sesiones
@@ -0,0 +1,100 @@
+"""
+Re-extracción de películas a partir del archivo de páginas
+
+Vuelve a pasar ``cinesa_parser`` por las páginas de detalle guardadas en el
+archivo (``utils.page_archive``) repartiendo el análisis entre varios
+procesos, sin hacer ninguna petición al sitio. Sirve para regenerar las
+películas del almacén de instantáneas después de corregir un selector.
+"""
+
+import concurrent.futures
+import logging
+
+from scrapers import cinesa_parser
+from utils import page_archive
+from utils.movie_normalizer import tipar_pelicula
+from utils.snapshot_store import clave_pelicula
+
+logger = logging.getLogger("CinesaReparse")
+
+
+def _extraer(registro):
+    """Analiza una página archivada (se ejecuta en un proceso del pool)"""
+    url, fecha, contenido = registro
+    html = contenido.decode('utf-8', errors='replace')
+    soup = cinesa_parser.crear_soup(html)
+    if not cinesa_parser.tiene_marcado_detalle(soup):
+        return None
+    return {
+        **cinesa_parser.parsear_detalles(soup),
+        'url': url,
+        'id_pelicula': cinesa_parser.extraer_id_pelicula(html, url),
+        'sesiones': cinesa_parser.extraer_sesiones(soup, url),
+        'fecha_scraping': fecha,
+    }
+
+
+def registros_detalle(directorio, desde=None, todas=False):
+    """
+    Páginas de detalle del archivo como tuplas (url, fecha, contenido)
+
+    Args:
+        directorio: Directorio del archivo de páginas
+        desde: Fecha 'AAAAMMDD' mínima de los ficheros a leer
+        todas: Devolver todas las versiones de cada URL y no solo la última
+    """
+    ultimas = {}
+    for ruta in page_archive.ficheros_archivo(directorio, desde):
+        for registro in page_archive.leer_registros(ruta):
+            if registro['tipo'] != 'detalle' or not registro['url']:
+                continue
+            tupla = (registro['url'], registro['fecha'], registro['contenido'])
+            if todas:
+                yield tupla
+            else:
+                ultimas[registro['url']] = tupla
+    yield from ultimas.values()
+
+
+def guardar_resultado(pelicula, almacen):
+    """Guarda la película re-extraída conservando los campos que no salen del HTML
+
+    Se parte de la última versión guardada de la película: se mantienen el
+    póster y el resto de campos, y las sesiones solo se sustituyen si la
+    página traía alguna (las del endpoint JSON no están en el HTML).
+
+    Returns:
+        str: Clave de la película en el almacén
+    """
+    existente = almacen.obtener(clave_pelicula(pelicula)) or {}
+    if not pelicula['sesiones'] and existente.get('sesiones'):
+        pelicula = {**pelicula, 'sesiones': existente['sesiones']}
+    return almacen.guardar(tipar_pelicula({**existente, **pelicula}))
+
+
+def reparsear(directorio_archivo, almacen, procesos=None, desde=None, todas=False):
+    """
+    Re-extrae las películas del archivo en paralelo
+
+    Args:
+        directorio_archivo: Directorio del archivo de páginas
+        almacen: SnapshotStore donde guardar las películas
+        procesos: Procesos del pool (por defecto, uno por núcleo)
+        desde: Fecha 'AAAAMMDD' mínima de los ficheros a leer
+        todas: Procesar todas las versiones de cada URL
+
+    Returns:
+        dict: {'paginas', 'peliculas', 'sin_marcado'}
+    """
+    resultado = {'paginas': 0, 'peliculas': 0, 'sin_marcado': 0}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=procesos) as executor:
+        for pelicula in executor.map(_extraer, registros_detalle(directorio_archivo, desde, todas), chunksize=4):
+            resultado['paginas'] += 1
+            if pelicula is None:
+                resultado['sin_marcado'] += 1
+                continue
+            guardar_resultado(pelicula, almacen)
+            resultado['peliculas'] += 1
+
+    return resultado
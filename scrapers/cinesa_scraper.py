@@ -1,7 +1,6 @@
 import time
 import random
 import os
-import json
 import yaml
 import argparse
 from datetime import datetime
@@ -9,19 +8,38 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import requests
 from bs4 import BeautifulSoup
-import re
 import logging
 import threading
 import concurrent.futures
 import urllib.parse
-from PIL import Image
 from io import BytesIO
 import base64
+import functools
+import sys
+
+# Añadir el directorio raíz del proyecto a sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.driver_pool import DriverPool
+from utils.wait_engine import WaitEngine, PolitenessDelay
+from utils import rate_limiter
+from utils import http_cache
+from utils.image_fetcher import AsyncImageFetcher
+from utils.image_processor import ImageProcessor
+from utils.poster_store import PosterStore
+from utils import scrape_manifest
+from utils.scrape_manifest import ScrapeManifest
+from utils.page_archive import PageArchive
+from utils.movie_normalizer import tipar_pelicula
+from utils.search_index import SearchIndex
+from utils.snapshot_store import SnapshotStore
+from utils.write_behind import WriteBehindWriter
+from scrapers import cinesa_parser
+from scrapers.cinesa_showtimes_api import CinesaShowtimesClient
 
 # Configurar logging
 logging.basicConfig(
@@ -35,7 +53,7 @@ logging.basicConfig(
 logger = logging.getLogger("CinesaScraper")
 
 class CinesaScraper:
-    def __init__(self):
+    def __init__(self, num_drivers=1, modo_http=False, incremental=False):
         # Cargar configuración
         config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.yaml')
         try:
@@ -64,12 +82,18 @@ class CinesaScraper:
         
         # Seleccionar un User-Agent aleatorio
         user_agent = random.choice(self.user_agents)
-        chrome_options.add_argument(f'user-agent={user_agent}')
+        self.chrome_options = chrome_options
         
-        # Inicializar navegador
-        logger.info("Inicializando navegador Chrome...")
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 15)
+        # Pool de navegadores: cada hilo usa su propia sesión de Chrome
+        self.pool = DriverPool(self.crear_driver, tamano=num_drivers)
+        
+        # Esperas por condición y pausas de cortesía (configurables por separado)
+        self.waits = WaitEngine.desde_config(self.config)
+        self.cortesia = PolitenessDelay.desde_config(self.config)
+        
+        # Modo HTTP: detalles con requests y Selenium solo como respaldo
+        self.modo_http = modo_http
+        self.timeout = self.config.get('scraper', {}).get('timeout', 10)
         
         self.base_url = "https://www.cinesa.es"
         self.headers = {
@@ -85,147 +109,265 @@ class CinesaScraper:
             "Cache-Control": "max-age=0"
         }
         
-        # Crear directorio para guardar películas individuales e imágenes
-        self.directorio_peliculas = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'peliculas')
-        self.directorio_imagenes = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'imagenes')
-        os.makedirs(self.directorio_peliculas, exist_ok=True)
+        # Crear directorio para guardar datos e imágenes
+        self.directorio_datos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+        self.directorio_imagenes = os.path.join(self.directorio_datos, 'imagenes')
         os.makedirs(self.directorio_imagenes, exist_ok=True)
         
+        # Películas e índice del listado en segmentos JSONL, uno por ejecución,
+        # escritos por un único hilo para que los hilos de scraping no esperen al disco
+        self.almacen = SnapshotStore.desde_config(self.config, self.directorio_datos)
+        # El índice de búsqueda se actualiza desde el mismo hilo, tras cada lote
+        self.buscador = SearchIndex.desde_config(self.config, self.directorio_datos)
+        self.escritor = WriteBehindWriter(
+            self.almacen, al_escribir=self._indexar_lote if self.buscador else None
+        )
+        
         # Mantener una sesión para las solicitudes
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
-        # Semáforo para controlar acceso concurrente al WebDriver
-        self.driver_lock = threading.Lock()
-    
+        # Limitador adaptativo compartido por todas las peticiones a cinesa.es
+        self.limitador = rate_limiter.configurar(self.config)
+        rate_limiter.montar_en_sesion(self.session, pool_maxsize=max(10, num_drivers * 2))
+        
+        # Caché de validadores (ETag/Last-Modified): un 304 sirve el cuerpo guardado
+        self.cache = http_cache.configurar(self.config)
+        http_cache.montar_en_sesion(self.session, self.cache)
+        
+        # Descargas de imágenes en segundo plano (asyncio, keep-alive, HTTP/2)
+        self.imagenes = AsyncImageFetcher(headers=self.headers, cache=self.cache)
+        
+        # Pósters guardados por contenido, con índice por URL y por película
+        self.posters = PosterStore(self.directorio_imagenes)
+        
+        # Optimización y variantes de los pósters en un pool de procesos
+        self.procesador = ImageProcessor.desde_config(self.config)
+        
+        # Endpoint JSON de sesiones (el recorrido del DOM queda como respaldo)
+        self.showtimes_api = CinesaShowtimesClient.desde_config(self.session, self.config)
+        
+        # Archivo comprimido de todas las páginas descargadas (para re-extraer sin visitar el sitio)
+        self.archivo = PageArchive.desde_config(self.config, self.directorio_datos)
+        
+        # Modo incremental: huellas de la última extracción de cada película
+        self.manifiesto = None
+        if incremental:
+            self.manifiesto = ScrapeManifest.desde_config(self.config, self.directorio_datos)
+        self.resultados_incrementales = {'sin_cambios': 0, 'solo_sesiones': 0, 'completas': 0}
+        self._resultados_lock = threading.Lock()
+        
     def __del__(self):
-        # Cerrar el navegador al finalizar
-        if hasattr(self, 'driver'):
-            self.driver.quit()
-            logger.info("Navegador cerrado")
+        self.cerrar()
+    
+    def crear_driver(self):
+        """Inicializa un navegador Chrome nuevo con un User-Agent aleatorio"""
+        logger.info("Inicializando navegador Chrome...")
+        chrome_options = Options()
+        for argumento in self.chrome_options.arguments:
+            chrome_options.add_argument(argumento)
+        chrome_options.add_argument(f'user-agent={random.choice(self.user_agents)}')
+        return webdriver.Chrome(options=chrome_options)
+    
+    def cerrar(self):
+        """Cierra todos los navegadores del pool y espera las descargas pendientes"""
+        if getattr(self, '_cerrado', False):
+            return
+        self._cerrado = True
+        if hasattr(self, 'pool'):
+            self.pool.cerrar()
+        if hasattr(self, 'imagenes'):
+            self.imagenes.cerrar()
+        if hasattr(self, 'procesador'):
+            self.procesador.cerrar()
+        if hasattr(self, 'posters'):
+            self.posters.guardar_indice()
+        # El manifiesto se guarda cuando ya está todo escrito, y sin las películas
+        # que no llegaron al almacén, para que la próxima ejecución no las salte
+        if hasattr(self, 'escritor'):
+            self.escritor.cerrar()
+        if getattr(self, 'manifiesto', None):
+            if hasattr(self, 'escritor'):
+                olvidadas = self.manifiesto.olvidar_claves(self.escritor.claves_fallidas)
+                if olvidadas:
+                    logger.warning(f"{olvidadas} películas sin guardar se quitan del manifiesto")
+            self.manifiesto.guardar()
+        if getattr(self, 'buscador', None):
+            self.buscador.cerrar()
+        if hasattr(self, 'almacen'):
+            self.almacen.cerrar()
+    
+    def _indexar_lote(self, lote):
+        """Añade al índice de búsqueda un lote recién guardado (hilo escritor)"""
+        self.buscador.actualizar(lote, self.almacen.version())
     
     def rotar_user_agent(self):
         """Cambiar el User-Agent para evitar bloqueos"""
+        if self.modo_http:
+            # Las cookies del navegador van ligadas a su User-Agent
+            return self.headers["User-Agent"]
         new_user_agent = random.choice(self.user_agents)
         self.headers["User-Agent"] = new_user_agent
         self.session.headers.update({"User-Agent": new_user_agent})
         logger.info(f"User-Agent rotado: {new_user_agent}")
         return new_user_agent
 
-    def esperar_aleatoriamente(self, min_segundos=3, max_segundos=10):
-        """Esperar un tiempo aleatorio para simular comportamiento humano"""
-        tiempo_espera = random.uniform(min_segundos, max_segundos)
-        logger.info(f"Esperando {tiempo_espera:.2f} segundos...")
-        time.sleep(tiempo_espera)
-    
-    def descargar_imagen(self, imagen_url, titulo):
-        """Descarga y guarda una imagen localmente"""
+    def aceptar_cookies(self, driver):
+        """Acepta el banner de cookies si aparece y espera a que desaparezca"""
+        boton_cookies = self.waits.esperar(
+            driver, 'cookies',
+            EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
+        )
+        if not boton_cookies:
+            logger.info("No se encontró el botón de cookies o ya estaban aceptadas")
+            return False
+        
+        boton_cookies.click()
+        self.waits.esperar(driver, 'cookies', EC.invisibility_of_element_located((By.ID, "onetrust-accept-btn-handler")))
+        logger.info("Aceptadas las cookies")
+        return True
+    
+    def guardar_poster(self, contenido, url=None, id_pelicula=None, extension='.jpg'):
+        """Guarda un póster en el almacén por contenido y encola su optimización si no se hizo ya"""
+        ruta_imagen, _ = self.posters.guardar(contenido, url=url, id_pelicula=id_pelicula, extension=extension)
+        if not self.posters.optimizada(ruta_imagen):
+            self.procesador.encolar(contenido, ruta_imagen, self.posters.marcar_optimizada)
+        return ruta_imagen
+    
+    def descargar_imagen(self, imagen_url, titulo, id_pelicula=None):
+        """Descarga y guarda una imagen localmente
+        
+        Returns:
+            La ruta local si la URL ya estaba en el almacén, o un Future con la
+            ruta si la descarga se ha encolado (ver ``resolver_imagen``)
+        """
         if not imagen_url:
             logger.warning(f"URL de imagen no proporcionada para {titulo}")
             return None
             
         try:
-            # Crear nombre de archivo seguro
-            titulo_seguro = re.sub(r'[^\w\s-]', '', titulo).strip().replace(' ', '_')
-            if not titulo_seguro:
-                titulo_seguro = 'imagen_sin_titulo'
+            # Si la URL ya se descargó en otra ejecución, no repetir la descarga
+            ruta_imagen = self.posters.buscar_url(imagen_url)
+            if ruta_imagen:
+                logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
+                if id_pelicula:
+                    self.posters.asociar_pelicula(id_pelicula, ruta_imagen)
+                return ruta_imagen
                 
             # Extraer extensión de archivo o usar .jpg por defecto
             extension = os.path.splitext(urllib.parse.urlparse(imagen_url).path)[1]
             if not extension:
                 extension = '.jpg'
                 
-            nombre_archivo = f"{titulo_seguro}{extension}"
-            ruta_imagen = os.path.join(self.directorio_imagenes, nombre_archivo)
-            
-            # Verificar si la imagen ya existe
-            if os.path.exists(ruta_imagen):
-                logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
-                return ruta_imagen
-                
-            # Rotar User-Agent para evitar bloqueos
-            user_agent = self.rotar_user_agent()
-            headers = self.headers.copy()
-            
-            # Descargar la imagen
-            response = requests.get(imagen_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Guardar la imagen
-            with open(ruta_imagen, 'wb') as f:
-                f.write(response.content)
-                
-            logger.info(f"Imagen para '{titulo}' descargada correctamente: {ruta_imagen}")
-            
-            # Optimizar imagen para reducir tamaño
-            try:
-                img = Image.open(ruta_imagen)
-                img.save(ruta_imagen, optimize=True, quality=85)
-            except Exception as e:
-                logger.warning(f"No se pudo optimizar la imagen: {e}")
-                
-            return ruta_imagen
+            # Encolar la descarga: se hace en segundo plano mientras seguimos con la página
+            logger.info(f"Descarga de la imagen para '{titulo}' encolada: {imagen_url}")
+            return self.imagenes.encolar(
+                imagen_url,
+                functools.partial(self.guardar_poster, url=imagen_url, id_pelicula=id_pelicula, extension=extension)
+            )
             
         except Exception as e:
             logger.error(f"Error al descargar imagen para '{titulo}': {e}")
             return None
     
-    def descargar_imagen_selenium(self, selector, titulo):
+    def resolver_imagen(self, poster, timeout=60):
+        """Devuelve la ruta local de un póster, esperando a su descarga si está encolada
+        
+        Si la optimización del póster sigue en cola se espera también (en otro
+        proceso, sin gastar CPU en este hilo) para guardar la ruta de la
+        versión optimizada cuando la hay.
+        """
+        if isinstance(poster, concurrent.futures.Future):
+            try:
+                poster = poster.result(timeout=timeout)
+            except Exception as e:
+                logger.error(f"Error al esperar la descarga de un póster: {e}")
+                return None
+        if not poster:
+            return poster
+        self.procesador.esperar(poster, timeout=timeout)
+        return self.posters.ruta_preferida(poster)
+    
+    def capturar_imagen(self, driver, img_element, titulo, id_pelicula=None):
+        """Obtiene la imagen de un elemento <img> descargando su URL original
+        
+        Lee ``currentSrc``/``srcset``/``src`` en una sola llamada al navegador
+        y descarga los bytes originales por HTTP, sin desplazar la página ni
+        esperar a que se pinte. Las imágenes en línea (data:) se decodifican
+        directamente; el canvas y la captura de pantalla solo se usan para
+        las que no tienen una URL descargable (blob:, sin fuente).
+        
+        La URL se lee siempre, aunque el póster ya esté en el almacén: se
+        guarda en el listado y forma parte de su huella. Un póster conocido
+        se busca primero por URL (si cambia, se descarga el nuevo) y solo
+        por película cuando la imagen no tiene URL descargable.
+        
+        Returns:
+            tuple: (URL de la imagen o None, ruta local / Future / None)
+        """
+        try:
+            actual, src, srcset, data_src = driver.execute_script(
+                "var img = arguments[0];"
+                "return [img.currentSrc, img.getAttribute('src'), img.getAttribute('srcset'), img.getAttribute('data-src')];",
+                img_element
+            )
+        except Exception as e:
+            logger.warning(f"No se pudieron leer los atributos de la imagen de '{titulo}': {e}")
+            actual = src = srcset = data_src = None
+        
+        imagen_url = cinesa_parser.elegir_url_imagen(src, srcset, data_src, actual)
+        if imagen_url and not imagen_url.startswith(('data:', 'blob:')):
+            imagen_url = urllib.parse.urljoin(driver.current_url, imagen_url)
+            return imagen_url, self.descargar_imagen(imagen_url, titulo, id_pelicula)
+        
+        ruta_imagen = self.posters.buscar_pelicula(id_pelicula) if id_pelicula else None
+        if ruta_imagen:
+            logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
+            return None, ruta_imagen
+        
+        if imagen_url and imagen_url.startswith('data:') and ';base64,' in imagen_url:
+            try:
+                cabecera, datos = imagen_url.split(',', 1)
+                extension = '.png' if 'image/png' in cabecera else '.jpg'
+                return None, self.guardar_poster(base64.b64decode(datos), id_pelicula=id_pelicula, extension=extension)
+            except Exception as e:
+                logger.warning(f"No se pudo decodificar la imagen en línea de '{titulo}': {e}")
+        
+        # Último recurso: dibujar la imagen desde el navegador
+        return None, self.descargar_imagen_base64(driver, img_element, titulo, id_pelicula)
+    
+    def descargar_imagen_selenium(self, driver, selector, titulo, id_pelicula=None):
         """Descarga imagen directamente desde Selenium"""
         try:
+            # Verificar si la imagen ya existe
+            ruta_imagen = self.posters.buscar_pelicula(id_pelicula) if id_pelicula else None
+            if ruta_imagen:
+                logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
+                return ruta_imagen
+            
             # Buscar elemento de imagen
-            img_elem = self.driver.find_element(By.CSS_SELECTOR, selector)
+            img_elem = driver.find_element(By.CSS_SELECTOR, selector)
             if not img_elem:
                 logger.warning(f"No se encontró imagen para '{titulo}' con selector {selector}")
                 return None
                 
-            # Crear nombre de archivo seguro
-            titulo_seguro = re.sub(r'[^\w\s-]', '', titulo).strip().replace(' ', '_')
-            if not titulo_seguro:
-                titulo_seguro = 'imagen_sin_titulo'
-                
-            # Usar .jpg como formato por defecto
-            extension = '.jpg'
-            nombre_archivo = f"{titulo_seguro}{extension}"
-            ruta_imagen = os.path.join(self.directorio_imagenes, nombre_archivo)
-            
-            # Verificar si la imagen ya existe
-            if os.path.exists(ruta_imagen):
-                logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
-                return ruta_imagen
-                
             # Capturar la imagen directamente desde el navegador
             logger.info(f"Capturando imagen para '{titulo}' directamente desde el navegador")
-            img_elem.screenshot(ruta_imagen)
-            
-            # Optimizar imagen
-            try:
-                img = Image.open(ruta_imagen)
-                img.save(ruta_imagen, optimize=True, quality=85)
-            except Exception as e:
-                logger.warning(f"No se pudo optimizar la imagen: {e}")
-                
-            return ruta_imagen
+            return self.guardar_poster(img_elem.screenshot_as_png, id_pelicula=id_pelicula, extension='.png')
             
         except Exception as e:
             logger.error(f"Error al capturar imagen para '{titulo}': {e}")
             return None
     
-    def descargar_imagen_base64(self, img_element, titulo):
-        """Descarga imagen desde un elemento <img> obteniendo su base64 o src"""
+    def descargar_imagen_base64(self, driver, img_element, titulo, id_pelicula=None):
+        """Captura una imagen desde el navegador mediante un canvas o una captura de pantalla
+        
+        Es el respaldo de ``capturar_imagen`` para imágenes sin URL descargable.
+        """
         try:
-            # Crear nombre de archivo seguro
-            titulo_seguro = re.sub(r'[^\w\s-]', '', titulo).strip().replace(' ', '_')
-            if not titulo_seguro:
-                titulo_seguro = 'imagen_sin_titulo'
-                
-            # Usar .jpg como formato por defecto
-            extension = '.jpg'
-            nombre_archivo = f"{titulo_seguro}{extension}"
-            ruta_imagen = os.path.join(self.directorio_imagenes, nombre_archivo)
-            
             # Verificar si la imagen ya existe
-            if os.path.exists(ruta_imagen):
+            ruta_imagen = self.posters.buscar_pelicula(id_pelicula) if id_pelicula else None
+            if ruta_imagen:
                 logger.info(f"La imagen para '{titulo}' ya existe, omitiendo descarga")
                 return ruta_imagen
             
@@ -242,33 +384,23 @@ class CinesaScraper:
             
             try:
                 # Asegurarse de que la imagen esté cargada
-                self.driver.execute_script("arguments[0].scrollIntoView();", img_element)
-                time.sleep(1)
+                driver.execute_script("arguments[0].scrollIntoView();", img_element)
+                self.waits.imagen_cargada(driver, img_element)
                 
                 # Intentar obtener la imagen como base64
-                img_data = self.driver.execute_script(script, img_element)
+                img_data = driver.execute_script(script, img_element)
                 
                 if img_data and img_data.startswith('data:image'):
                     # Extraer la parte base64 y guardarla
-                    img_data = img_data.split(',')[1]
-                    with open(ruta_imagen, 'wb') as f:
-                        f.write(base64.b64decode(img_data))
+                    ruta_imagen = self.guardar_poster(base64.b64decode(img_data.split(',')[1]), id_pelicula=id_pelicula)
                     logger.info(f"Imagen para '{titulo}' guardada desde base64")
                     return ruta_imagen
             except Exception as e:
                 logger.warning(f"No se pudo obtener imagen como base64: {e}")
             
             # Si no funciona el base64, intentar con captura de pantalla
-            img_element.screenshot(ruta_imagen)
+            ruta_imagen = self.guardar_poster(img_element.screenshot_as_png, id_pelicula=id_pelicula, extension='.png')
             logger.info(f"Imagen para '{titulo}' guardada con screenshot")
-            
-            # Optimizar imagen
-            try:
-                img = Image.open(ruta_imagen)
-                img.save(ruta_imagen, optimize=True, quality=85)
-            except Exception as e:
-                logger.warning(f"No se pudo optimizar la imagen: {e}")
-                
             return ruta_imagen
             
         except Exception as e:
@@ -277,44 +409,47 @@ class CinesaScraper:
     
     def obtener_peliculas(self):
         """Obtiene la lista de películas usando Selenium"""
+        with self.pool.driver() as driver:
+            return self._obtener_peliculas(driver)
+    
+    def _obtener_peliculas(self, driver):
+        """Obtiene la lista de películas con el navegador indicado"""
         url = "https://www.cinesa.es/peliculas/"
         peliculas = []
         
         try:
             logger.info(f"Navegando a: {url}")
-            self.driver.get(url)
+            rate_limiter.navegar(driver, url)
             
-            # Esperar más tiempo para que cargue la página
-            self.esperar_aleatoriamente(8, 12)
+            # Esperar a que aparezcan las películas y termine la carga
+            listado = self.waits.selectores(driver, cinesa_parser.SELECTORES_LISTADO, paso='listado')
+            rate_limiter.confirmar_navegacion(url, bool(listado))
+            self.waits.red_inactiva(driver)
             
             # Manejar posibles ventanas de cookies
-            try:
-                boton_cookies = self.driver.find_element(By.ID, "onetrust-accept-btn-handler")
-                boton_cookies.click()
-                logger.info("Aceptadas las cookies")
-                time.sleep(2)
-            except Exception:
-                logger.info("No se encontró el botón de cookies o ya estaban aceptadas")
+            self.aceptar_cookies(driver)
             
-            # Guardar HTML para depuración
+            # Pasar cookies y User-Agent del navegador a la sesión HTTP
+            if self.modo_http:
+                try:
+                    self.sincronizar_sesion(driver)
+                except Exception as e:
+                    logger.warning(f"No se pudo sincronizar la sesión HTTP: {e}")
+            
+            # Guardar HTML para depuración y en el archivo de páginas
+            html_listado = driver.page_source
             with open('debug_cinesa_page.html', 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
+                f.write(html_listado)
             logger.info("Guardado HTML para depuración en debug_cinesa_page.html")
+            if self.archivo:
+                self.archivo.guardar_seguro(url, html_listado, tipo='listado')
             
             # Intentar con diferentes selectores para películas
             logger.info("Buscando elementos de película...")
-            selectores = [
-                "li.v-film-list-film", 
-                ".v-film-list-film", 
-                ".film-list-item",
-                ".v-film-grid__item",
-                ".movie-container"
-            ]
-            
-            for selector in selectores:
+            for selector in cinesa_parser.SELECTORES_LISTADO:
                 try:
                     logger.info(f"Probando selector: {selector}")
-                    pelicula_items = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    pelicula_items = driver.find_elements(By.CSS_SELECTOR, selector)
                     if pelicula_items:
                         logger.info(f"Se encontraron {len(pelicula_items)} elementos con selector {selector}")
                         break
@@ -344,7 +479,9 @@ class CinesaScraper:
                             titulo = titulo_elem.text.strip() if titulo_elem else url_pelicula.split('/')[-1].replace('-', ' ').title()
                             
                             imagen = item.find('img')
-                            imagen_url = imagen['src'] if imagen and 'src' in imagen.attrs else None
+                            imagen_url = imagen and cinesa_parser.elegir_url_imagen(
+                                imagen.get('src'), imagen.get('srcset'), imagen.get('data-src')
+                            )
                             
                             peliculas.append({
                                 'titulo': titulo,
@@ -417,10 +554,12 @@ class CinesaScraper:
                         except NoSuchElementException:
                             continue
                     
-                    # Capturar y guardar la imagen inmediatamente si la encontramos
-                    imagen_local = None
+                    # Encolar la descarga de la imagen si la encontramos
+                    imagen_url, imagen_local = None, None
                     if imagen:
-                        imagen_local = self.descargar_imagen_base64(imagen, titulo)
+                        imagen_url, imagen_local = self.capturar_imagen(
+                            driver, imagen, titulo, cinesa_parser.id_pelicula_desde_url(url_pelicula)
+                        )
                     
                     # Otras informaciones que pudieran estar disponibles
                     info_adicional = {}
@@ -435,183 +574,84 @@ class CinesaScraper:
                     peliculas.append({
                         'titulo': titulo,
                         'url': url_pelicula,
-                        'imagen_local': imagen_local,  # Solo guardamos la ruta local
+                        'imagen_url': imagen_url,
+                        'imagen_local': imagen_local,
                         **info_adicional
                     })
                     
                 except Exception as e:
                     logger.error(f"Error al procesar una película: {e}")
             
+            # Las descargas han ido en paralelo con el recorrido: recoger las rutas
+            for pelicula in peliculas:
+                pelicula['imagen_local'] = self.resolver_imagen(pelicula['imagen_local'])
+            
             return peliculas
             
         except Exception as e:
             logger.error(f"Error al obtener lista de películas: {e}")
             return []
     
-    def obtener_detalles_pelicula(self, url_pelicula):
-        """Obtiene los detalles de una película específica usando Selenium"""
+    def obtener_detalles_pelicula(self, url_pelicula, anterior=None):
+        """Obtiene los detalles de una película específica
+        
+        En modo HTTP se intenta primero una petición simple con la sesión de
+        requests; Selenium solo se usa si la respuesta es un 403 o la página
+        no trae el marcado esperado.
+        
+        Args:
+            url_pelicula: URL de la película
+            anterior: Entrada del manifiesto de la extracción previa; si la
+                ficha no ha cambiado se reutiliza su póster sin capturarlo
+        """
         logger.info(f"Obteniendo detalles para: {url_pelicula}")
         
         try:
-            with self.driver_lock:  # Bloqueo para acceso seguro en multithreading
+            if self.modo_http:
+                detalles = self.obtener_detalles_pelicula_http(url_pelicula, anterior)
+                if detalles is not None:
+                    return detalles
+                logger.info(f"Recurriendo a Selenium para: {url_pelicula}")
+            
+            with self.pool.driver() as driver:  # Cada hilo usa su propio navegador
                 # Rotar User-Agent
                 self.rotar_user_agent()
                 
                 # Usar Selenium en lugar de requests para evitar el bloqueo 403
-                self.driver.get(url_pelicula)
-                self.esperar_aleatoriamente(3, 5)  # Reducido el tiempo de espera
-                
-                # Guardar HTML para depuración
-                html_content = self.driver.page_source
-                
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Extraer título
-                titulo_selectores = [
-                    '.v-film-title__text',
-                    '.film-title',
-                    'h1'
-                ]
-                
-                titulo = "Título no disponible"
-                for selector in titulo_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        titulo = elem.text.strip()
-                        break
-                
-                # Duración
-                duracion_selectores = [
-                    '.v-film-runtime .v-display-text-part',
-                    '.film-runtime',
-                    '.duration'
-                ]
-                
-                duracion = None
-                for selector in duracion_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        duracion = elem.text.strip()
-                        break
-                
-                # Fecha de estreno
-                fecha_estreno_selectores = [
-                    '.v-film-release-date .v-display-text-part',
-                    '.release-date',
-                    '.film-release-date'
-                ]
-                
-                fecha_estreno = None
-                for selector in fecha_estreno_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        fecha_estreno = elem.text.strip()
-                        break
-                
-                # Géneros
-                generos_selectores = [
-                    '.v-film-genres__list .v-description-list-item__description',
-                    '.film-genres span',
-                    '.genres'
-                ]
-                
-                generos = []
-                for selector in generos_selectores:
-                    elems = soup.select(selector)
-                    if elems:
-                        generos = [elem.text.strip() for elem in elems]
-                        break
-                
-                # Clasificación
-                clasificacion_selectores = [
-                    '.v-film-classification-description .v-description-list-item__description',
-                    '.film-classification',
-                    '.rating'
-                ]
-                
-                clasificacion = None
-                for selector in clasificacion_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        clasificacion = elem.text.strip()
-                        break
-                
-                # Directores
-                directores_selectores = [
-                    '.v-film-directors .v-display-text-part',
-                    '.film-directors',
-                    '.directors'
-                ]
-                
-                directores = None
-                for selector in directores_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        directores = elem.text.strip()
-                        break
-                
-                # Actores
-                actores_selectores = [
-                    '.v-film-actors .v-display-text-part',
-                    '.film-actors',
-                    '.actors'
-                ]
-                
-                actores = []
-                for selector in actores_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        actores_text = elem.text.strip()
-                        actores = [a.strip() for a in actores_text.split(',')]
-                        break
-                
-                # Sinopsis
-                sinopsis_selectores = [
-                    '.v-film-synopsis .v-display-text-part',
-                    '.film-synopsis',
-                    '.synopsis'
-                ]
-                
-                sinopsis = "Sinopsis no disponible"
-                for selector in sinopsis_selectores:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        sinopsis = elem.text.strip()
-                        break
-                
-                # Poster
-                poster_selectores = [
-                    '.v-film-image__img img',
-                    '.film-poster img',
-                    '.movie-poster img'
-                ]
-                
-                # Buscar y guardar el póster inmediatamente
-                poster_ruta_local = None
+                self.cortesia.esperar()
+                rate_limiter.navegar(driver, url_pelicula)
+                self.waits.selectores(driver, cinesa_parser.SELECTORES_TITULO[:1], paso='detalle')
+                self.waits.red_inactiva(driver)
+                
+                html_content = driver.page_source
+                if self.archivo:
+                    self.archivo.guardar_seguro(url_pelicula, html_content)
+                soup = cinesa_parser.crear_soup(html_content)
+                rate_limiter.confirmar_navegacion(url_pelicula, cinesa_parser.tiene_marcado_detalle(soup))
+                detalles = cinesa_parser.parsear_detalles(soup)
+                
+                # Buscar y guardar el póster inmediatamente (salvo que la ficha no haya cambiado)
+                poster_ruta_local = self.poster_reutilizable(detalles, anterior)
                 poster_elem = None
-                for selector in poster_selectores:
-                    try:
-                        poster_elem = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if poster_elem:
-                            break
-                    except NoSuchElementException:
-                        continue
+                if poster_ruta_local is None:
+                    for selector in cinesa_parser.SELECTORES_POSTER:
+                        try:
+                            poster_elem = driver.find_element(By.CSS_SELECTOR, selector)
+                            if poster_elem:
+                                break
+                        except NoSuchElementException:
+                            continue
                 
                 if poster_elem:
-                    poster_ruta_local = self.descargar_imagen_base64(poster_elem, titulo)
-                
-                # Extraer sesiones (usando Selenium para esto también)
-                sesiones = self.obtener_sesiones_pelicula_selenium(url_pelicula)
+                    _, poster_ruta_local = self.capturar_imagen(
+                        driver, poster_elem, detalles['titulo'], cinesa_parser.id_pelicula_desde_url(url_pelicula)
+                    )
+            
+            # Extraer sesiones de la misma instantánea del HTML, sin más llamadas al navegador
+            sesiones = self.obtener_sesiones_pelicula(url_pelicula, html_content, soup)
             
             return {
-                'titulo': titulo,
-                'duracion': duracion,
-                'fecha_estreno': fecha_estreno,
-                'generos': generos,
-                'clasificacion': clasificacion,
-                'directores': directores,
-                'actores': actores,
-                'sinopsis': sinopsis,
+                **detalles,
                 'poster_local': poster_ruta_local,  # Solo guardamos la ruta local
                 'sesiones': sesiones,
                 'fecha_scraping': datetime.now().isoformat()
@@ -623,114 +663,132 @@ class CinesaScraper:
                 'error': str(e),
                 'fecha_scraping': datetime.now().isoformat()
             }
+    
+    def obtener_detalles_pelicula_http(self, url_pelicula, anterior=None):
+        """Obtiene los detalles de una película con una petición HTTP simple
+        
+        Returns:
+            dict con los detalles, o None si hay que recurrir a Selenium
+        """
+        try:
+            self.cortesia.esperar()
+            respuesta = self.session.get(url_pelicula, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"Error HTTP al obtener {url_pelicula}: {e}")
+            return None
+        
+        if respuesta.status_code == 403:
+            logger.warning(f"Acceso denegado (403) a {url_pelicula}")
+            return None
+        if respuesta.status_code != 200:
+            logger.warning(f"Respuesta {respuesta.status_code} al obtener {url_pelicula}")
+            return None
+        
+        if self.archivo:
+            self.archivo.guardar_seguro(url_pelicula, respuesta.text)
+        soup = cinesa_parser.crear_soup(respuesta.text)
+        if not cinesa_parser.tiene_marcado_detalle(soup):
+            logger.info(f"La página {url_pelicula} no contiene el marcado esperado")
+            return None
+        
+        detalles = cinesa_parser.parsear_detalles(soup)
+        
+        poster_url = cinesa_parser.extraer_url_poster(soup)
+        poster_ruta_local = self.poster_reutilizable(detalles, anterior)
+        if poster_url and poster_ruta_local is None:
+            poster_ruta_local = self.descargar_imagen(
+                urllib.parse.urljoin(url_pelicula, poster_url),
+                detalles['titulo'],
+                cinesa_parser.id_pelicula_desde_url(url_pelicula)
+            )
+        
+        return {
+            **detalles,
+            'poster_local': poster_ruta_local,  # Solo guardamos la ruta local
+            'sesiones': self.obtener_sesiones_pelicula(url_pelicula, respuesta.text, soup),
+            'fecha_scraping': datetime.now().isoformat()
+        }
+    
+    def huella_estatica(self, detalles):
+        """Huella de los datos estáticos (la ficha) de una película"""
+        return scrape_manifest.huella({campo: detalles.get(campo) for campo in cinesa_parser.CAMPOS_DETALLES})
+    
+    def poster_reutilizable(self, detalles, anterior):
+        """Ruta del póster de la extracción anterior si la ficha no ha cambiado, o None"""
+        if not anterior or anterior.get('huella') != self.huella_estatica(detalles):
+            return None
+        poster = anterior.get('poster_local')
+        return poster if poster and os.path.exists(poster) else None
+    
+    def sincronizar_sesion(self, driver):
+        """Copia las cookies y el User-Agent del navegador a la sesión de requests"""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        if user_agent:
+            self.headers["User-Agent"] = user_agent
+            self.session.headers.update({"User-Agent": user_agent})
+        
+        cookies = driver.get_cookies()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/')
+            )
+        logger.info(f"Sesión HTTP sincronizada con el navegador ({len(cookies)} cookies)")
 
-    def obtener_sesiones_pelicula_selenium(self, url_pelicula):
-        """Obtiene sesiones usando Selenium para evitar bloqueos"""
+    def obtener_sesiones_api(self, url_pelicula, id_pelicula=None):
+        """Obtiene sesiones del endpoint JSON; devuelve None si no está disponible"""
+        if not self.showtimes_api or not self.showtimes_api.disponible:
+            return None
+        return self.showtimes_api.obtener_sesiones(id_pelicula or cinesa_parser.id_pelicula_desde_url(url_pelicula))
+    
+    def precargar_sesiones(self, peliculas):
+        """Descarga en bloque las sesiones de todas las películas del listado"""
+        if not self.showtimes_api:
+            return False
+        ids = [cinesa_parser.id_pelicula_desde_url(p.get('url')) for p in peliculas]
+        return self.showtimes_api.precargar(ids)
+    
+    def obtener_sesiones_pelicula(self, url_pelicula, html, soup=None):
+        """Obtiene las sesiones de una película a partir del HTML de su página
+        
+        Primero se consulta el endpoint JSON con el ID de la película; si no
+        está disponible o no tiene sesiones de esta película, se analiza el
+        HTML en una sola pasada. Las sesiones se guardan tal como llegan: las
+        fechas de uno y otro camino se unifican al cargarlas
+        (``normalizar_sesiones``).
+        """
         try:
-            # Ya estamos en la página de la película, no necesitamos navegar de nuevo
-            # Intentar encontrar el ID de la película
-            id_pelicula = None
-            script_tags = self.driver.find_elements(By.TAG_NAME, 'script')
-            
-            for script in script_tags:
-                try:
-                    contenido = script.get_attribute('innerHTML')
-                    if 'filmId' in contenido or 'movieId' in contenido:
-                        # Buscar patrones como "filmId": "HO00002126" o similar
-                        match = re.search(r'"filmId"[:\s]+"([^"]+)"', contenido)
-                        if match:
-                            id_pelicula = match.group(1)
-                            break
-                        
-                        match = re.search(r'"movieId"[:\s]+"([^"]+)"', contenido)
-                        if match:
-                            id_pelicula = match.group(1)
-                            break
-                except:
-                    continue
-            
-            # Si no encontramos el ID, intentar extraerlo de la URL
-            if not id_pelicula and '/peliculas/' in url_pelicula:
-                match = re.search(r'/peliculas/[^/]+/([^/]+)', url_pelicula)
-                if match:
-                    id_pelicula = match.group(1)
-            
-            resultado_sesiones = []
-            
-            # Si tenemos el ID, pero no queremos arriesgarnos con la API,
-            # buscar las sesiones directamente en el HTML
-            sesiones_containers = self.driver.find_elements(By.CSS_SELECTOR, '.v-cinema-showtime-list__item, .cinema-container')
+            id_pelicula = cinesa_parser.extraer_id_pelicula(html, url_pelicula)
             
-            if sesiones_containers:
-                for container in sesiones_containers:
-                    try:
-                        nombre_cine_elem = container.find_element(By.CSS_SELECTOR, '.v-cinema-showtime-list__cinema-name, .cinema-name')
-                        nombre_cine = nombre_cine_elem.text.strip()
-                        
-                        sesiones_cine = []
-                        fecha_elems = container.find_elements(By.CSS_SELECTOR, '.v-showtime-list__date, .date')
-                        
-                        for fecha_elem in fecha_elems:
-                            fecha = fecha_elem.text.strip()
-                            try:
-                                sesiones_elem = fecha_elem.find_element(By.XPATH, 'following-sibling::*[1]')
-                                sesion_botones = sesiones_elem.find_elements(By.CSS_SELECTOR, '.v-showtime-button, .showtime')
-                                
-                                for boton in sesion_botones:
-                                    hora_elem = boton.find_element(By.CSS_SELECTOR, '.v-showtime-button__time, .time')
-                                    hora = hora_elem.text.strip()
-                                    
-                                    formato = ""
-                                    try:
-                                        formato_elem = boton.find_element(By.CSS_SELECTOR, '.v-showtime-button__attributes, .format')
-                                        formato = formato_elem.text.strip()
-                                    except:
-                                        pass
-                                    
-                                    url_compra = boton.get_attribute('href') or ""
-                                    
-                                    sesiones_cine.append({
-                                        'fecha': fecha,
-                                        'hora': hora,
-                                        'formato': formato,
-                                        'url_compra': url_compra
-                                    })
-                            except:
-                                continue
-                        
-                        if sesiones_cine:
-                            resultado_sesiones.append({
-                                'nombre_cine': nombre_cine,
-                                'sesiones': sesiones_cine
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error al procesar sesiones para un cine: {e}")
+            sesiones_api = self.obtener_sesiones_api(url_pelicula, id_pelicula)
+            if sesiones_api:
+                return sesiones_api
             
-            return resultado_sesiones
+            if soup is None:
+                soup = cinesa_parser.crear_soup(html)
+            return cinesa_parser.extraer_sesiones(soup, url_pelicula)
             
         except Exception as e:
             logger.error(f"Error al obtener sesiones de película: {e}")
             return []
     
     def guardar_pelicula(self, pelicula):
-        """Guarda una película individual en un archivo JSON"""
-        # Generar nombre de archivo seguro a partir del título
-        titulo_seguro = re.sub(r'[^\w\s-]', '', pelicula.get('titulo', '')).strip().replace(' ', '_')
-        if not titulo_seguro:
-            titulo_seguro = 'pelicula_sin_titulo'
-            
-        fecha_actual = datetime.now().strftime("%Y%m%d")
+        """Encola una película para el segmento JSONL de esta ejecución
         
-        ruta_archivo = os.path.join(self.directorio_peliculas, f"{titulo_seguro}_{fecha_actual}.json")
+        La escribe el hilo escritor; aquí solo se espera si la cola está llena.
         
+        Returns:
+            str: Clave de la película en el almacén, o None si falló
+        """
         try:
-            with open(ruta_archivo, 'w', encoding='utf-8') as f:
-                json.dump(pelicula, f, ensure_ascii=False, indent=4)
-            logger.info(f"Película '{pelicula.get('titulo', 'Sin título')}' guardada en {ruta_archivo}")
-            return True
+            clave = self.escritor.encolar(tipar_pelicula(pelicula))
+            logger.info(f"Película '{pelicula.get('titulo', 'Sin título')}' encolada para guardar ({clave})")
+            return clave
         except Exception as e:
             logger.error(f"Error al guardar película '{pelicula.get('titulo', 'Sin título')}': {e}")
-            return False
+            return None
     
     def guardar_indice_peliculas(self, peliculas):
         """Guarda un índice con información básica de todas las películas"""
@@ -743,13 +801,9 @@ class CinesaScraper:
                 'imagen_url': pelicula.get('imagen_url')
             })
         
-        fecha_actual = datetime.now().strftime("%Y%m%d_%H%M%S")
-        ruta_archivo = os.path.join(os.path.dirname(self.directorio_peliculas), f"cinesa_indice_{fecha_actual}.json")
-        
         try:
-            with open(ruta_archivo, 'w', encoding='utf-8') as f:
-                json.dump(indice, f, ensure_ascii=False, indent=4)
-            logger.info(f"Índice de películas guardado en {ruta_archivo}")
+            self.escritor.encolar(indice, clave='listado', tipo='listado')
+            logger.info(f"Índice de películas guardado ({len(indice)} películas)")
             return True
         except Exception as e:
             logger.error(f"Error al guardar índice de películas: {e}")
@@ -757,15 +811,92 @@ class CinesaScraper:
 
     def procesar_pelicula_completa(self, pelicula):
         """Procesa una película completa: obtiene detalles y guarda"""
+        if self.manifiesto:
+            return self.procesar_pelicula_incremental(pelicula)
         try:
             logger.info(f"Procesando película: {pelicula.get('titulo', 'Sin título')}")
             detalles = self.obtener_detalles_pelicula(pelicula['url'])
+            if 'poster_local' in detalles:
+                detalles['poster_local'] = self.resolver_imagen(detalles['poster_local'])
             pelicula.update(detalles)
             self.guardar_pelicula(pelicula)
             return pelicula
         except Exception as e:
             logger.error(f"Error al procesar película {pelicula.get('titulo', 'Sin título')}: {e}")
             return None
+    
+    def procesar_pelicula_incremental(self, pelicula):
+        """Procesa una película solo en la medida en que haya cambiado
+        
+        Si la ficha sigue vigente en el manifiesto y la tarjeta del listado no
+        ha cambiado, no se abre la página: se comparan solo las sesiones del
+        endpoint JSON y, si difieren, se guarda la versión anterior con las
+        nuevas. En otro caso se extrae la página, pero el póster solo se
+        vuelve a capturar y la película solo se guarda si algo ha cambiado.
+        """
+        url = pelicula['url']
+        titulo = pelicula.get('titulo', 'Sin título')
+        try:
+            anterior = self.manifiesto.obtener(url)
+            huella_listado = scrape_manifest.huella({'titulo': pelicula.get('titulo'), 'imagen_url': pelicula.get('imagen_url')})
+            
+            if anterior and anterior.get('huella_listado') == huella_listado and self.manifiesto.vigente(anterior):
+                previa = self._cargar_pelicula_guardada(anterior.get('clave'))
+                sesiones = self.obtener_sesiones_api(url) if previa else None
+                if sesiones is not None:
+                    huella_sesiones = scrape_manifest.huella(sesiones)
+                    if huella_sesiones == anterior.get('huella_sesiones'):
+                        logger.info(f"Sin cambios: {titulo}")
+                        self._contar_resultado('sin_cambios')
+                        return previa
+                    
+                    logger.info(f"Solo han cambiado las sesiones: {titulo}")
+                    previa.update(sesiones=sesiones, fecha_scraping=datetime.now().isoformat())
+                    clave = self.guardar_pelicula(previa)
+                    self.manifiesto.actualizar(
+                        url, huella_sesiones=huella_sesiones,
+                        clave=clave or anterior.get('clave'), actualizado=time.time()
+                    )
+                    self._contar_resultado('solo_sesiones')
+                    return previa
+            
+            logger.info(f"Procesando película: {titulo}")
+            detalles = self.obtener_detalles_pelicula(url, anterior)
+            if 'poster_local' in detalles:
+                detalles['poster_local'] = self.resolver_imagen(detalles['poster_local'])
+            pelicula.update(detalles)
+            if 'error' in detalles:
+                self.guardar_pelicula(pelicula)
+                return pelicula
+            
+            ahora = time.time()
+            huella_estatica = self.huella_estatica(detalles)
+            huella_sesiones = scrape_manifest.huella(detalles.get('sesiones', []))
+            if (anterior and anterior.get('huella') == huella_estatica
+                    and anterior.get('huella_sesiones') == huella_sesiones
+                    and anterior.get('clave') and self.almacen.contiene(anterior['clave'])):
+                logger.info(f"Sin cambios tras revalidar: {titulo}")
+                self.manifiesto.actualizar(url, huella_listado=huella_listado, verificado=ahora)
+                self._contar_resultado('sin_cambios')
+                return pelicula
+            
+            clave = self.guardar_pelicula(pelicula)
+            self.manifiesto.actualizar(
+                url, huella=huella_estatica, huella_sesiones=huella_sesiones, huella_listado=huella_listado,
+                poster_local=detalles.get('poster_local'), clave=clave, verificado=ahora, actualizado=ahora
+            )
+            self._contar_resultado('completas')
+            return pelicula
+        except Exception as e:
+            logger.error(f"Error al procesar película {titulo}: {e}")
+            return None
+    
+    def _cargar_pelicula_guardada(self, clave):
+        return self.almacen.obtener(clave) if clave else None
+    
+    def _contar_resultado(self, resultado):
+        with self._resultados_lock:
+            self.resultados_incrementales[resultado] += 1
 
 # Función principal para ejecutar el scraper
 def main():
@@ -773,11 +904,15 @@ def main():
     parser.add_argument('--solo-lista', '-l', action='store_true', help='Obtener solo la lista de películas sin detalles')
     parser.add_argument('--pelicula', '-p', type=str, help='URL o ID de una película específica para scrapear')
     parser.add_argument('--max', '-m', type=int, default=0, help='Número máximo de películas a procesar (0 = todas)')
-    parser.add_argument('--demora', '-d', type=int, default=2, help='Demora mínima entre películas en segundos (default: 2)')
+    parser.add_argument('--demora', '-d', type=float, help='Pausa de cortesía mínima entre películas en segundos (default: scraper.politeness)')
     parser.add_argument('--hilos', '-t', type=int, default=3, help='Número de hilos para procesar películas (default: 3)')
+    parser.add_argument('--http', action='store_true', help='Obtener detalles por HTTP y usar Selenium solo como respaldo')
+    parser.add_argument('--incremental', '-i', action='store_true', help='Saltar las películas que no han cambiado desde la última ejecución')
     args = parser.parse_args()
     
-    scraper = CinesaScraper()
+    scraper = CinesaScraper(num_drivers=max(1, args.hilos), modo_http=args.http, incremental=args.incremental)
+    if args.demora is not None:
+        scraper.cortesia = PolitenessDelay(args.demora, args.demora * 1.5)
     
     # Caso de película individual
     if args.pelicula:
@@ -787,8 +922,12 @@ def main():
         
         logger.info(f"Obteniendo detalles para: {url_pelicula}")
         pelicula = scraper.obtener_detalles_pelicula(url_pelicula)
+        if 'poster_local' in pelicula:
+            pelicula['poster_local'] = scraper.resolver_imagen(pelicula['poster_local'])
         pelicula['url'] = url_pelicula
         scraper.guardar_pelicula(pelicula)
+        scraper.cerrar()
+        scraper.waits.log_resumen()
         return
     
     # Caso de lista de películas
@@ -804,6 +943,10 @@ def main():
     # Guardar índice de películas
     scraper.guardar_indice_peliculas(peliculas)
     
+    # Descargar en bloque las sesiones de todas las películas
+    if not args.solo_lista and peliculas:
+        scraper.precargar_sesiones(peliculas)
+    
     # Si no se solicita solo la lista, obtener detalles de películas con multithreading
     if not args.solo_lista and peliculas:
         logger.info(f"Obteniendo detalles de películas usando {args.hilos} hilos...")
@@ -815,9 +958,8 @@ def main():
         with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
             # Enviar trabajos al pool
             futures = []
+            # El ritmo lo marca el limitador compartido, no una pausa entre envíos
             for pelicula in peliculas:
-                # Añadir un pequeño retraso entre envíos para evitar sobrecarga
-                time.sleep(0.5)
                 futures.append(executor.submit(scraper.procesar_pelicula_completa, pelicula))
             
             # Procesar resultados a medida que se completan
@@ -828,6 +970,28 @@ def main():
                         logger.info(f"Completado procesamiento de: {result.get('titulo', 'Sin título')}")
                 except Exception as e:
                     logger.error(f"Error en ejecución de hilo: {e}")
+    
+    # Cerrar todos los navegadores del pool
+    scraper.cerrar()
+    
+    # Resumen del tiempo pasado esperando
+    scraper.waits.log_resumen()
+    logger.info(f"Tiempo total en pausas de cortesía: {scraper.cortesia.total:.2f} segundos")
+    limite = scraper.limitador.resumen()
+    logger.info(
+        f"Limitador: {limite['peticiones']} peticiones, tasa final {limite['tasa']:.2f}/s, "
+        f"{limite['frenadas']} frenadas, {limite['tiempo_esperando']:.2f} s esperando turno"
+    )
+    if scraper.cache:
+        scraper.cache.log_resumen()
+    if scraper.archivo:
+        scraper.archivo.log_resumen()
+    if scraper.manifiesto:
+        resultados = scraper.resultados_incrementales
+        logger.info(
+            f"Incremental: {resultados['sin_cambios']} sin cambios, {resultados['solo_sesiones']} solo sesiones, "
+            f"{resultados['completas']} extraídas de nuevo"
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Cliente del endpoint JSON de sesiones de Cinesa
+
+La web de Cinesa pinta las sesiones a partir de un endpoint de horarios
+por fecha de negocio (estilo Vista OCAPI). Este cliente lo consulta en
+bloque para muchas películas y cines a la vez y traduce la respuesta al
+mismo formato que produce el recorrido del DOM:
+
+    [{'nombre_cine': str, 'sesiones': [{'fecha', 'hora', 'formato', 'url_compra'}]}]
+
+con ``fecha`` en ISO (AAAA-MM-DD) en lugar del texto de la página ('sáb 24
+may'); ``normalizar_sesiones`` acepta ambos al cargar. Si la respuesta trae
+la sala, la sesión lleva además ``sala``.
+
+Formato de respuesta esperado::
+
+    {
+        "showtimes": [{"id", "filmId", "siteId", "screenId"?, "schedule": {"businessDate", "startsAt"},
+                       "attributeIds": [...], "bookingUrl"?}],
+        "relatedData": {"sites": [{"id", "name": {"text"}}],
+                        "screens"?: [{"id", "name": {"text"}}],
+                        "attributes": [{"id", "shortName": {"text"}}]}
+    }
+"""
+
+import logging
+import threading
+import urllib.parse
+from datetime import date, timedelta
+
+import requests
+
+logger = logging.getLogger("CinesaShowtimesAPI")
+
+RUTA_POR_DEFECTO = "/ocapi/v1/showtimes/by-business-date/{fecha}"
+URL_COMPRA_POR_DEFECTO = "/compra/?showtimeId={showtime_id}&cinemaId={site_id}"
+
+
+class CinesaShowtimesClient:
+    """Cliente en bloque del endpoint de sesiones, con caché por película"""
+
+    def __init__(self, session, base_url="https://www.cinesa.es", ruta=RUTA_POR_DEFECTO,
+                 dias=7, cines=None, url_compra=URL_COMPRA_POR_DEFECTO, timeout=10):
+        """
+        Inicializar el cliente
+
+        Args:
+            session: requests.Session a reutilizar (cookies y cabeceras del scraper)
+            base_url: URL base del endpoint
+            ruta: Ruta del endpoint; ``{fecha}`` se sustituye por la fecha AAAA-MM-DD
+            dias: Número de días a consultar a partir de hoy
+            cines: Lista de IDs de cine a consultar (None = todos)
+            url_compra: Plantilla de URL de compra si la respuesta no la incluye
+            timeout: Timeout de cada petición en segundos
+        """
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.ruta = ruta
+        self.dias = dias
+        self.cines = list(cines) if cines else []
+        self.url_compra = url_compra
+        self.timeout = timeout
+
+        # filmId -> {nombre_cine: [sesiones]}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.disponible = True
+
+    @classmethod
+    def desde_config(cls, session, config):
+        """Crea el cliente a partir de la sección ``scraper.showtimes_api`` de la configuración"""
+        api_config = (config or {}).get('scraper', {}).get('showtimes_api', {}) or {}
+        if not api_config.get('enabled', True):
+            return None
+        return cls(
+            session,
+            base_url=api_config.get('base_url', "https://www.cinesa.es"),
+            ruta=api_config.get('path', RUTA_POR_DEFECTO),
+            dias=int(api_config.get('dias', 7)),
+            cines=api_config.get('cines'),
+            url_compra=api_config.get('url_compra', URL_COMPRA_POR_DEFECTO),
+            timeout=(config or {}).get('scraper', {}).get('timeout', 10),
+        )
+
+    def _fechas(self):
+        hoy = date.today()
+        return [(hoy + timedelta(days=i)).isoformat() for i in range(self.dias)]
+
+    def _consultar_fecha(self, fecha, film_ids):
+        """Descarga las sesiones de una fecha para un lote de películas"""
+        url = self.base_url + self.ruta.format(fecha=fecha)
+        params = {'filmIds': ','.join(film_ids)}
+        if self.cines:
+            params['siteIds'] = ','.join(self.cines)
+
+        respuesta = self.session.get(url, params=params, timeout=self.timeout,
+                                     headers={'Accept': 'application/json'})
+        respuesta.raise_for_status()
+        return respuesta.json()
+
+    def _mapear(self, datos):
+        """Agrupa la respuesta JSON por película y cine en el formato del scraper"""
+        relacionados = datos.get('relatedData') or {}
+        nombres_cine = {
+            site.get('id'): (site.get('name') or {}).get('text') or str(site.get('id'))
+            for site in relacionados.get('sites') or []
+        }
+        nombres_sala = {
+            screen.get('id'): (screen.get('name') or {}).get('text') or str(screen.get('id'))
+            for screen in relacionados.get('screens') or []
+        }
+        nombres_atributo = {
+            attr.get('id'): (attr.get('shortName') or {}).get('text') or ''
+            for attr in relacionados.get('attributes') or []
+        }
+
+        por_pelicula = {}
+        for showtime in datos.get('showtimes') or []:
+            horario = showtime.get('schedule') or {}
+            inicio = horario.get('startsAt') or ''
+            site_id = showtime.get('siteId')
+
+            url_compra = showtime.get('bookingUrl') or self.url_compra.format(
+                showtime_id=showtime.get('id', ''), site_id=site_id or ''
+            )
+            sesion = {
+                'fecha': horario.get('businessDate') or inicio[:10],
+                'hora': inicio[11:16],
+                'formato': ' '.join(
+                    nombre for nombre in (nombres_atributo.get(a, '') for a in showtime.get('attributeIds') or [])
+                    if nombre
+                ),
+                'url_compra': urllib.parse.urljoin(self.base_url + '/', url_compra),
+            }
+            if showtime.get('screenId') is not None:
+                sesion['sala'] = nombres_sala.get(showtime['screenId'], str(showtime['screenId']))
+
+            nombre_cine = nombres_cine.get(site_id, str(site_id))
+            por_pelicula.setdefault(showtime.get('filmId'), {}).setdefault(nombre_cine, []).append(sesion)
+
+        return por_pelicula
+
+    def precargar(self, film_ids):
+        """
+        Descarga en bloque las sesiones de varias películas para todos los días
+
+        Hace una petición por fecha con todas las películas a la vez.
+
+        Returns:
+            bool: True si se pudieron descargar todas las fechas
+        """
+        film_ids = sorted({f for f in film_ids if f})
+        if not film_ids or not self.disponible:
+            return False
+
+        nuevos = {film_id: {} for film_id in film_ids}
+        try:
+            for fecha in self._fechas():
+                for film_id, cines in self._mapear(self._consultar_fecha(fecha, film_ids)).items():
+                    if film_id in nuevos:
+                        for nombre_cine, sesiones in cines.items():
+                            nuevos[film_id].setdefault(nombre_cine, []).extend(sesiones)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"No se pudo consultar el endpoint de sesiones, se usará el DOM: {e}")
+            self.disponible = False
+            return False
+
+        with self._lock:
+            self._cache.update(nuevos)
+        logger.info(f"Sesiones precargadas para {len(film_ids)} películas y {self.dias} días")
+        return True
+
+    def obtener_sesiones(self, film_id):
+        """
+        Sesiones de una película agrupadas por cine
+
+        Returns:
+            list en el formato del scraper, o None si el endpoint no está disponible
+        """
+        if not film_id:
+            return None
+
+        with self._lock:
+            cines = self._cache.get(film_id)
+        if cines is None:
+            if not self.precargar([film_id]):
+                return None
+            with self._lock:
+                cines = self._cache.get(film_id, {})
+
+        return [
+            {
+                'nombre_cine': nombre_cine,
+                'sesiones': sorted(sesiones, key=lambda s: (s['fecha'], s['hora']))
+            }
+            for nombre_cine, sesiones in sorted(cines.items())
+        ]
@@ -0,0 +1,216 @@
+"""
+Benchmark de las consultas de sesiones sobre datos sintéticos
+
+Crea una base de datos aparte con el esquema de config/schema.sql, la llena
+en el propio servidor (generate_series) con millones de sesiones y mide las
+dos consultas más habituales:
+
+    - qué hay hoy en el cine X
+    - todas las sesiones de la película Y esta semana
+
+Uso:
+    python scripts/benchmark_showtimes.py --sesiones 10000000
+    python scripts/benchmark_showtimes.py --sin-indices   # mismas consultas sin los índices compuestos
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+# Añadir el directorio raíz del proyecto a sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_loader import load_config
+from utils.db import parametros_conexion
+
+RUTA_ESQUEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'schema.sql')
+FECHA_INICIAL = date(2024, 1, 1)
+HORAS_SESION = ['16:00', '17:15', '18:30', '19:45', '20:15', '21:30', '22:00', '22:45']
+INDICES_COMPUESTOS = {
+    'idx_functions_movie_date_time': 'functions (movie_id, date, time)',
+    'idx_functions_room_date': 'functions (room_id, date)',
+}
+
+CONSULTA_CINE_HOY = """
+SELECT f.time, m.title, r.name
+FROM functions f
+JOIN room r ON r.id = f.room_id
+JOIN movie m ON m.id = f.movie_id
+WHERE r.cinema_id = %s AND f.date = %s
+ORDER BY f.time, r.name
+"""
+
+CONSULTA_PELICULA_SEMANA = """
+SELECT f.date, f.time, c.name, r.name
+FROM functions f
+JOIN room r ON r.id = f.room_id
+JOIN cinema c ON c.id = r.cinema_id
+WHERE f.movie_id = %s AND f.date BETWEEN %s AND %s
+ORDER BY f.date, f.time
+"""
+
+
+def conectar(db_config, nombre):
+    conn = psycopg2.connect(**parametros_conexion(db_config, database=nombre))
+    conn.autocommit = True
+    return conn
+
+
+def preparar_base_datos(db_config, nombre):
+    """Crea la base de datos de benchmark si no existe y le aplica el esquema"""
+    conn = conectar(db_config, "postgres")
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (nombre,))
+        if not cursor.fetchone():
+            cursor.execute(f'CREATE DATABASE "{nombre}"')
+    conn.close()
+
+    conn = conectar(db_config, nombre)
+    with conn.cursor() as cursor, open(RUTA_ESQUEMA, 'r', encoding='utf-8') as f:
+        cursor.execute(f.read())
+    return conn
+
+
+def generar_datos(conn, sesiones, cines, salas, peliculas):
+    """Llena cines, salas, películas y sesiones; devuelve los días generados"""
+    salas_totales = cines * salas
+    dias = -(-sesiones // (salas_totales * len(HORAS_SESION)))
+    with conn.cursor() as cursor:
+        print(f"Generando {cines} cines, {salas_totales} salas, {peliculas} películas "
+              f"y {sesiones:,} sesiones en {dias} días...")
+        inicio = time.perf_counter()
+        cursor.execute("TRUNCATE functions, room, cinema, movie RESTART IDENTITY CASCADE")
+        cursor.execute(
+            "INSERT INTO cinema (name, location) "
+            "SELECT 'Cine ' || i, 'Ciudad ' || (i %% 20) FROM generate_series(1, %s) AS i",
+            (cines,)
+        )
+        cursor.execute(
+            "INSERT INTO room (cinema_id, name, capacity) "
+            "SELECT c, 'Sala ' || s, 100 + (s * 37) %% 200 "
+            "FROM generate_series(1, %s) AS c, generate_series(1, %s) AS s ORDER BY c, s",
+            (cines, salas)
+        )
+        cursor.execute(
+            "INSERT INTO movie (external_id, title, duration) "
+            "SELECT 'BENCH' || i, 'Película ' || i, 80 + i %% 90 FROM generate_series(1, %s) AS i",
+            (peliculas,)
+        )
+        # Cada sala proyecta cada día una película distinta en cada pase
+        cursor.execute(
+            "INSERT INTO functions (movie_id, room_id, date, time) "
+            "SELECT 1 + (sala * 7919 + dia * 104729 + h.n * 31) %% %s, sala, "
+            "       %s::date + dia, h.hora::time "
+            "FROM generate_series(0, %s - 1) AS dia, "
+            "     generate_series(1, %s) AS sala, "
+            "     unnest(%s::text[]) WITH ORDINALITY AS h(hora, n) "
+            "LIMIT %s",
+            (peliculas, FECHA_INICIAL, dias, salas_totales, HORAS_SESION, sesiones)
+        )
+        cursor.execute("VACUUM ANALYZE functions")
+        cursor.execute("ANALYZE room; ANALYZE cinema; ANALYZE movie")
+        print(f"Datos generados en {time.perf_counter() - inicio:.1f} segundos")
+    return dias
+
+
+def contar_sesiones(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*), max(date) - min(date) + 1 FROM functions")
+        return cursor.fetchone()
+
+
+def ajustar_indices(conn, con_indices):
+    """Crea o elimina los índices compuestos de functions"""
+    with conn.cursor() as cursor:
+        for nombre, definicion in INDICES_COMPUESTOS.items():
+            if con_indices:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+            else:
+                cursor.execute(f"DROP INDEX IF EXISTS {nombre}")
+        cursor.execute("ANALYZE functions")
+
+
+def medir(conn, nombre, consulta, generar_parametros, repeticiones):
+    """Ejecuta una consulta con parámetros aleatorios y muestra su latencia"""
+    tiempos = []
+    filas = 0
+    with conn.cursor() as cursor:
+        for _ in range(repeticiones):
+            parametros = generar_parametros()
+            inicio = time.perf_counter()
+            cursor.execute(consulta, parametros)
+            filas += len(cursor.fetchall())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + consulta, generar_parametros())
+        plan = "\n".join(f"    {fila[0]}" for fila in cursor.fetchall())
+
+    tiempos.sort()
+    print(f"\n{nombre}")
+    print(f"  {repeticiones} ejecuciones, {filas / repeticiones:.1f} filas de media")
+    print(f"  media {statistics.mean(tiempos):.2f} ms, p50 {tiempos[len(tiempos) // 2]:.2f} ms, "
+          f"p95 {tiempos[int(len(tiempos) * 0.95) - 1]:.2f} ms, máximo {tiempos[-1]:.2f} ms")
+    print("  Plan de una ejecución:")
+    print(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de consultas de sesiones en PostgreSQL')
+    parser.add_argument('--db', type=str, default='gadget_benchmark', help='Base de datos de benchmark (default: gadget_benchmark)')
+    parser.add_argument('--sesiones', type=int, default=10_000_000, help='Sesiones a generar (default: 10M)')
+    parser.add_argument('--cines', type=int, default=60, help='Número de cines (default: 60)')
+    parser.add_argument('--salas', type=int, default=12, help='Salas por cine (default: 12)')
+    parser.add_argument('--peliculas', type=int, default=2000, help='Número de películas (default: 2000)')
+    parser.add_argument('--repeticiones', '-r', type=int, default=200, help='Ejecuciones de cada consulta (default: 200)')
+    parser.add_argument('--regenerar', action='store_true', help='Volver a generar los datos aunque ya existan')
+    parser.add_argument('--sin-indices', action='store_true', help='Medir sin los índices compuestos de functions')
+    args = parser.parse_args()
+
+    db_config = load_config().get("database", {})
+    conn = preparar_base_datos(db_config, args.db)
+
+    total, dias = contar_sesiones(conn)
+    if args.regenerar or total < args.sesiones:
+        generar_datos(conn, args.sesiones, args.cines, args.salas, args.peliculas)
+        total, dias = contar_sesiones(conn)
+    else:
+        print(f"Usando las {total:,} sesiones ya generadas en {args.db}")
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT max(id) FROM cinema")
+        cines = cursor.fetchone()[0]
+        cursor.execute("SELECT max(id) FROM movie")
+        peliculas = cursor.fetchone()[0]
+
+    ajustar_indices(conn, not args.sin_indices)
+    print(f"\n{total:,} sesiones en {dias} días, {'sin' if args.sin_indices else 'con'} índices compuestos")
+
+    def dia_aleatorio(margen=0):
+        return FECHA_INICIAL + timedelta(days=random.randrange(max(1, dias - margen)))
+
+    medir(
+        conn, "Qué hay hoy en el cine X", CONSULTA_CINE_HOY,
+        lambda: (random.randint(1, cines), dia_aleatorio()),
+        args.repeticiones
+    )
+
+    def semana_pelicula():
+        lunes = dia_aleatorio(margen=7)
+        return random.randint(1, peliculas), lunes, lunes + timedelta(days=6)
+
+    medir(conn, "Todas las sesiones de la película Y esta semana", CONSULTA_PELICULA_SEMANA, semana_pelicula, args.repeticiones)
+
+    # Dejar el esquema como lo define schema.sql
+    if args.sin_indices:
+        ajustar_indices(conn, True)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
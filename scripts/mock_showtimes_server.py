@@ -0,0 +1,136 @@
+"""
+Servidor local que imita el endpoint JSON de sesiones de Cinesa
+
+Genera una matriz sintética y determinista de cines x días x películas
+para probar CinesaShowtimesClient sin tocar la web real.
+
+Uso:
+    python scripts/mock_showtimes_server.py --puerto 8765 --cines 40
+
+y en config/config.yaml:
+    scraper:
+      showtimes_api:
+        base_url: "http://localhost:8765"
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import urllib.parse
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Añadir el directorio raíz del proyecto a sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers.cinesa_showtimes_api import RUTA_POR_DEFECTO
+
+PATRON_RUTA = re.compile('^' + re.escape(RUTA_POR_DEFECTO).replace(re.escape('{fecha}'), r'(\d{4}-\d{2}-\d{2})') + '$')
+HORAS = ["16:00", "18:30", "20:15", "22:45"]
+SALAS_POR_CINE = 8
+ATRIBUTOS = [("A1", "2D"), ("A2", "VOSE"), ("A3", "iSense"), ("A4", "3D")]
+
+
+def generar_sesiones(fecha, film_ids, site_ids):
+    """Construye la respuesta del endpoint para una fecha, películas y cines"""
+    showtimes = []
+    for film_id in film_ids:
+        for site_id in site_ids:
+            for i, hora in enumerate(HORAS):
+                # Variar las sesiones por película y cine para no tener una matriz uniforme
+                if zlib.crc32(f"{film_id}|{site_id}|{i}".encode()) % 5 == 0:
+                    continue
+                inicio = datetime.fromisoformat(f"{fecha}T{hora}:00")
+                showtimes.append({
+                    "id": f"{site_id}-{film_id}-{inicio:%Y%m%d%H%M}",
+                    "filmId": film_id,
+                    "siteId": site_id,
+                    "screenId": f"{site_id}-{zlib.crc32(film_id.encode()) % SALAS_POR_CINE + 1}",
+                    "schedule": {
+                        "businessDate": fecha,
+                        "startsAt": inicio.isoformat() + "+02:00",
+                    },
+                    "attributeIds": [ATRIBUTOS[i % len(ATRIBUTOS)][0]],
+                })
+
+    return {
+        "showtimes": showtimes,
+        "relatedData": {
+            "sites": [{"id": site_id, "name": {"text": f"Cinesa Mock {site_id}"}} for site_id in site_ids],
+            "screens": [
+                {"id": f"{site_id}-{n}", "name": {"text": f"Sala {n}"}}
+                for site_id in site_ids for n in range(1, SALAS_POR_CINE + 1)
+            ],
+            "attributes": [{"id": attr_id, "shortName": {"text": nombre}} for attr_id, nombre in ATRIBUTOS],
+        },
+    }
+
+
+def crear_servidor(puerto=0, cines=10, host="127.0.0.1"):
+    """
+    Crea el servidor simulado (sin arrancarlo)
+
+    Args:
+        puerto: Puerto de escucha (0 = uno libre cualquiera)
+        cines: Número de cines de la matriz sintética
+        host: Dirección de escucha
+
+    Returns:
+        ThreadingHTTPServer: servidor listo para ``serve_forever()``
+    """
+    todos_los_cines = [str(i) for i in range(1, cines + 1)]
+
+    class ManejadorSesiones(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            match = PATRON_RUTA.match(url.path)
+            if not match:
+                self.send_error(404)
+                return
+
+            params = urllib.parse.parse_qs(url.query)
+            film_ids = [f for f in ','.join(params.get('filmIds', [])).split(',') if f]
+            site_ids = [s for s in ','.join(params.get('siteIds', [])).split(',') if s] or todos_los_cines
+
+            cuerpo = json.dumps(generar_sesiones(match.group(1), film_ids, site_ids)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, puerto), ManejadorSesiones)
+
+
+def iniciar_en_segundo_plano(puerto=0, cines=10):
+    """Arranca el servidor en un hilo y devuelve (servidor, base_url)"""
+    servidor = crear_servidor(puerto, cines)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    host, puerto_real = servidor.server_address[:2]
+    return servidor, f"http://{host}:{puerto_real}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor simulado del endpoint de sesiones de Cinesa')
+    parser.add_argument('--puerto', type=int, default=8765, help='Puerto de escucha (default: 8765)')
+    parser.add_argument('--cines', type=int, default=10, help='Número de cines simulados (default: 10)')
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, args.cines)
+    print(f"Servidor de sesiones simulado en http://127.0.0.1:{args.puerto}{RUTA_POR_DEFECTO}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
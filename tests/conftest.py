@@ -0,0 +1,19 @@
+"""Configuración común de las pruebas: raíz del proyecto en sys.path y ficheros de ejemplo"""
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def html_detalle():
+    """Página de detalle de película guardada (tests/fixtures/pelicula_detalle.html)"""
+    with open(os.path.join(DIRECTORIO_FIXTURES, 'pelicula_detalle.html'), encoding='utf-8') as f:
+        return f.read()
@@ -0,0 +1,81 @@
+"""Pruebas del análisis del HTML de Cinesa sin navegador"""
+
+from scrapers import cinesa_parser
+
+URL = "https://www.cinesa.es/peliculas/lilo-y-stitch/HO00002161/"
+
+# Texto que muestra el navegador para la página guardada (lo que devolvía el
+# ``.text`` de Selenium, con los espacios colapsados): sin los nodos ocultos
+# y con los elementos hijos separados
+SESIONES_VISIBLES = [
+    {
+        'nombre_cine': 'Cinesa Diagonal',
+        'sesiones': [
+            {'fecha': 'sáb 24 may', 'hora': '17:30', 'formato': 'VOSE iSense',
+             'url_compra': 'https://www.cinesa.es/compra/sesion/1001?site=12'},
+            {'fecha': 'sáb 24 may', 'hora': '20:15', 'formato': '2D',
+             'url_compra': 'https://www.cinesa.es/compra/sesion/1002?site=12'},
+            {'fecha': 'Hoy', 'hora': '22:00', 'formato': '',
+             'url_compra': 'https://www.cinesa.es/compra/sesion/1003?site=12'},
+        ],
+    },
+    {
+        'nombre_cine': 'Cinesa La Maquinista',
+        'sesiones': [
+            {'fecha': 'dom 25 may', 'hora': '16:00', 'formato': '3D',
+             'url_compra': 'https://www.cinesa.es/compra/sesion/2001?site=7'},
+        ],
+    },
+]
+
+
+def test_extraer_sesiones_igual_que_el_texto_visible(html_detalle):
+    soup = cinesa_parser.crear_soup(html_detalle)
+    assert cinesa_parser.extraer_sesiones(soup, URL) == SESIONES_VISIBLES
+
+
+def test_extraer_sesiones_sin_url_deja_las_rutas_relativas(html_detalle):
+    soup = cinesa_parser.crear_soup(html_detalle)
+    sesiones = cinesa_parser.extraer_sesiones(soup)
+    assert sesiones[0]['sesiones'][0]['url_compra'] == '/compra/sesion/1001?site=12'
+
+
+def test_parsear_detalles(html_detalle):
+    detalles = cinesa_parser.parsear_detalles(cinesa_parser.crear_soup(html_detalle))
+    assert detalles == {
+        'titulo': 'Lilo y Stitch',
+        'duracion': '1h 48m',
+        'fecha_estreno': '23 mayo 2025',
+        'generos': ['Aventuras', 'Familiar'],
+        'clasificacion': 'Apta para todos los públicos',
+        'directores': 'Dean Fleischer Camp',
+        'actores': ['Maia Kealoha', 'Sydney Agudong', 'Zach Galifianakis'],
+        'sinopsis': 'Una niña hawaiana adopta a un extraterrestre fugitivo. Nueva versión en imagen real.',
+    }
+
+
+def test_texto_visible_omite_ocultos_y_separa_hijos():
+    soup = cinesa_parser.crear_soup(
+        '<div><span>VOSE</span><span>iSense</span><b hidden>x</b>'
+        '<i style="visibility: hidden">y</i><script>z()</script><!-- c --></div>'
+    )
+    assert cinesa_parser.texto_visible(soup.div) == 'VOSE iSense'
+    assert cinesa_parser.texto_visible(None) == ''
+
+
+def test_extraer_id_pelicula_prefiere_film_id(html_detalle):
+    assert cinesa_parser.extraer_id_pelicula(html_detalle, URL) == 'HO00002161'
+    assert cinesa_parser.extraer_id_pelicula('<html></html>', URL) == 'HO00002161'
+    assert cinesa_parser.extraer_id_pelicula('"movieId": "HO1"', None) == 'HO1'
+
+
+def test_tiene_marcado_detalle(html_detalle):
+    assert cinesa_parser.tiene_marcado_detalle(cinesa_parser.crear_soup(html_detalle))
+    assert not cinesa_parser.tiene_marcado_detalle(cinesa_parser.crear_soup('<h1>Cinesa</h1>'))
+
+
+def test_elegir_url_imagen_prefiere_el_srcset_mas_grande():
+    srcset = 'https://img/p-300.jpg 300w, https://img/p-900.jpg 900w, https://img/p-600.jpg 600w'
+    assert cinesa_parser.elegir_url_imagen('https://img/p.jpg', srcset) == 'https://img/p-900.jpg'
+    assert cinesa_parser.elegir_url_imagen(None, None, 'https://img/lazy.jpg') == 'https://img/lazy.jpg'
+    assert cinesa_parser.elegir_url_imagen() is None
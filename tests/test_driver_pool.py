@@ -0,0 +1,111 @@
+"""Pruebas del pool de navegadores con drivers simulados"""
+
+import threading
+import time
+
+import pytest
+
+from utils.driver_pool import DriverPool
+
+
+class DriverFalso:
+    """WebDriver mínimo: ``current_url`` falla si se ha colgado"""
+
+    def __init__(self, numero):
+        self.numero = numero
+        self.colgado = False
+        self.cerrado = False
+
+    @property
+    def current_url(self):
+        if self.colgado or self.cerrado:
+            raise RuntimeError("sesión sin respuesta")
+        return 'about:blank'
+
+    def quit(self):
+        self.cerrado = True
+
+
+class Fabrica:
+    def __init__(self, colgados=False):
+        self.creados = []
+        self.colgados = colgados
+
+    def __call__(self):
+        driver = DriverFalso(len(self.creados))
+        driver.colgado = self.colgados
+        self.creados.append(driver)
+        return driver
+
+
+def test_crea_bajo_demanda_y_reutiliza():
+    fabrica = Fabrica()
+    pool = DriverPool(fabrica, tamano=2)
+    primero = pool.adquirir()
+    segundo = pool.adquirir()
+    assert primero is not segundo
+    pool.liberar(primero)
+    assert pool.adquirir() is primero
+    assert len(fabrica.creados) == 2
+    pool.cerrar()
+    assert all(driver.cerrado for driver in fabrica.creados)
+
+
+def test_navegador_colgado_se_descarta_y_se_reemplaza():
+    fabrica = Fabrica()
+    pool = DriverPool(fabrica, tamano=1)
+    pool.iniciar()
+    colgado = fabrica.creados[0]
+    colgado.colgado = True
+
+    with pool.driver() as driver:
+        assert driver is not colgado
+    assert colgado.cerrado
+    assert len(fabrica.creados) == 2
+    pool.cerrar()
+
+
+def test_reintentos_acotados_si_chrome_no_responde():
+    fabrica = Fabrica(colgados=True)
+    pool = DriverPool(fabrica, tamano=1, max_intentos=3)
+
+    with pytest.raises(RuntimeError):
+        pool.adquirir()
+    assert len(fabrica.creados) == 3
+    assert all(driver.cerrado for driver in fabrica.creados)
+
+
+def test_timeout_si_no_hay_navegadores_libres():
+    pool = DriverPool(Fabrica(), tamano=1, timeout=0.05)
+    pool.adquirir()
+    with pytest.raises(TimeoutError):
+        pool.adquirir()
+
+
+def test_descartar_despierta_a_quien_espera():
+    fabrica = Fabrica()
+    pool = DriverPool(fabrica, tamano=1, timeout=30)
+    ocupado = pool.adquirir()
+    obtenido = []
+    espera = threading.Thread(target=lambda: obtenido.append(pool.adquirir()))
+    espera.start()
+    time.sleep(0.05)
+
+    inicio = time.monotonic()
+    pool._descartar(ocupado)
+    espera.join(5)
+
+    assert not espera.is_alive()
+    assert time.monotonic() - inicio < 5
+    assert obtenido and obtenido[0] is fabrica.creados[1]
+    pool.cerrar()
+
+
+def test_no_crea_nada_tras_cerrar():
+    pool = DriverPool(Fabrica(), tamano=1)
+    driver = pool.adquirir()
+    pool.cerrar()
+    pool.liberar(driver)
+    assert driver.cerrado
+    with pytest.raises(RuntimeError):
+        pool.adquirir()
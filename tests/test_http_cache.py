@@ -0,0 +1,124 @@
+"""Pruebas de la caché HTTP condicional: revalidación con 304 y configuración"""
+
+import os
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import utils.http_cache as http_cache
+from utils.http_cache import ConditionalCache, montar_en_sesion
+
+URL = 'https://www.cinesa.es/peliculas/una/'
+
+
+class RespuestaFalsa(requests.Response):
+    """Respuesta que recuerda si se ha cerrado"""
+
+    def __init__(self, status_code, cuerpo=b'', cabeceras=None):
+        super().__init__()
+        self.status_code = status_code
+        self._content = cuerpo
+        self.headers.update(cabeceras or {})
+        self.cerrada = False
+
+    def close(self):
+        self.cerrada = True
+
+
+class AdaptadorFalso(BaseAdapter):
+    """Devuelve las respuestas indicadas en orden y guarda las peticiones recibidas"""
+
+    def __init__(self, respuestas):
+        super().__init__()
+        self.respuestas = list(respuestas)
+        self.peticiones = []
+
+    def send(self, request, **kwargs):
+        self.peticiones.append(request)
+        respuesta = self.respuestas.pop(0)
+        # Como HTTPAdapter.build_response
+        respuesta.request = request
+        respuesta.url = request.url
+        respuesta.connection = self
+        return respuesta
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ConditionalCache(str(tmp_path / 'cache' / 'http_cache.sqlite'))
+    yield cache
+    cache.cerrar()
+
+
+def sesion_con(cache, respuestas):
+    adaptador = AdaptadorFalso(respuestas)
+    session = requests.Session()
+    session.mount('https://', adaptador)
+    montar_en_sesion(session, cache)
+    return session, adaptador
+
+
+def test_revalidacion_304_sirve_el_cuerpo_guardado(cache):
+    respuesta_304 = RespuestaFalsa(304)
+    session, adaptador = sesion_con(cache, [
+        RespuestaFalsa(200, b'<html>ficha</html>', {'ETag': '"v1"', 'Content-Type': 'text/html; charset=utf-8'}),
+        respuesta_304,
+    ])
+
+    primera = session.get(URL)
+    segunda = session.get(URL)
+
+    assert primera.content == segunda.content == b'<html>ficha</html>'
+    assert segunda.status_code == 200
+    assert segunda.from_cache
+    assert segunda.headers['Content-Type'] == 'text/html; charset=utf-8'
+    assert segunda.text == '<html>ficha</html>'
+    # La segunda petición lleva el validador y el 304 se cierra sin leerse
+    assert 'If-None-Match' not in adaptador.peticiones[0].headers
+    assert adaptador.peticiones[1].headers['If-None-Match'] == '"v1"'
+    assert respuesta_304.cerrada
+
+    resumen = cache.resumen()
+    assert resumen['peticiones'] == 2
+    assert resumen['aciertos'] == 1
+    assert resumen['bytes_ahorrados'] == len(b'<html>ficha</html>')
+
+
+def test_respuesta_sin_validadores_no_se_guarda(cache):
+    session, adaptador = sesion_con(cache, [RespuestaFalsa(200, b'a'), RespuestaFalsa(200, b'b')])
+
+    assert session.get(URL).content == b'a'
+    assert session.get(URL).content == b'b'
+    assert cache.obtener(URL) is None
+    assert 'If-None-Match' not in adaptador.peticiones[1].headers
+
+
+def test_200_nuevo_reemplaza_la_entrada(cache):
+    session, adaptador = sesion_con(cache, [
+        RespuestaFalsa(200, b'viejo', {'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+        RespuestaFalsa(200, b'nuevo', {'ETag': '"v2"'}),
+    ])
+
+    session.get(URL)
+    assert session.get(URL).content == b'nuevo'
+    assert adaptador.peticiones[1].headers['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert cache.obtener(URL)['etag'] == '"v2"'
+
+
+def test_configurar_resuelve_la_ruta_bajo_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'DIRECTORIO_DATOS', str(tmp_path))
+    monkeypatch.setattr(http_cache, '_caches', {})
+
+    cache = http_cache.configurar({'scraper': {'http_cache': {'ruta': 'cache/prueba.sqlite'}}})
+    try:
+        assert cache.ruta == os.path.join(str(tmp_path), 'cache', 'prueba.sqlite')
+        assert os.path.exists(cache.ruta)
+        assert http_cache.configurar({'scraper': {'http_cache': {'ruta': 'cache/prueba.sqlite'}}}) is cache
+    finally:
+        cache.cerrar()
+
+    assert http_cache.configurar({'scraper': {'http_cache': {'enabled': False}}}) is None
@@ -0,0 +1,81 @@
+"""Pruebas de la optimización de pósters y de la ruta que se guarda en las películas"""
+
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from utils.db_loader import _con_poster_preferido
+from utils.image_processor import ImageProcessor, procesar_imagen
+from utils.poster_store import PosterStore, ruta_variante
+
+
+def jpeg(calidad=100, tamano=(600, 900)):
+    salida = BytesIO()
+    Image.effect_noise(tamano, 40).convert('RGB').save(salida, 'JPEG', quality=calidad)
+    return salida.getvalue()
+
+
+@pytest.fixture
+def posters(tmp_path):
+    return PosterStore(str(tmp_path / 'imagenes'))
+
+
+def test_variantes_junto_al_original_sin_tocarlo(posters):
+    contenido = jpeg()
+    ruta, _ = posters.guardar(contenido, url='https://img/p.jpg')
+
+    resultado = procesar_imagen(contenido, ruta, miniatura=(100, 150))
+
+    with open(ruta, 'rb') as f:
+        assert hashlib.sha256(f.read()).hexdigest() == os.path.splitext(os.path.basename(ruta))[0]
+    assert resultado['variantes'] == {
+        'optimizada': ruta_variante(ruta, 'optimizada'),
+        'miniatura': ruta_variante(ruta, 'miniatura'),
+        'webp': ruta_variante(ruta, 'webp'),
+    }
+    assert resultado['bytes_optimizados'] < resultado['bytes_originales']
+    with Image.open(resultado['variantes']['miniatura']) as miniatura:
+        assert miniatura.size[0] <= 100 and miniatura.size[1] <= 150
+    assert posters.ruta_preferida(ruta) == resultado['variantes']['optimizada']
+
+
+def test_sin_version_optimizada_se_prefiere_el_original(posters):
+    contenido = jpeg(calidad=20)
+    ruta, _ = posters.guardar(contenido)
+
+    resultado = procesar_imagen(contenido, ruta, miniatura=None, webp=False)
+
+    assert resultado['variantes'] == {}
+    assert resultado['bytes_optimizados'] == len(contenido)
+    assert posters.ruta_preferida(ruta) == ruta
+    assert PosterStore.ruta_preferida(None) is None
+
+
+def test_pool_marca_la_imagen_y_esperar_deja_la_variante_escrita(posters):
+    contenido = jpeg()
+    ruta, _ = posters.guardar(contenido)
+    procesador = ImageProcessor(procesos=1, miniatura=None, webp=False)
+    try:
+        futuro = procesador.encolar(contenido, ruta, posters.marcar_optimizada)
+        assert procesador.encolar(contenido, ruta) is futuro
+        procesador.esperar(ruta, timeout=60)
+        assert posters.ruta_preferida(ruta) == ruta_variante(ruta, 'optimizada')
+    finally:
+        procesador.cerrar()
+    assert posters.optimizada(ruta)
+    assert procesador.procesadas == 1
+    assert procesador.bytes_ahorrados > 0
+
+
+def test_la_carga_usa_el_poster_optimizado_de_instantaneas_antiguas(posters):
+    contenido = jpeg()
+    ruta, _ = posters.guardar(contenido)
+    procesar_imagen(contenido, ruta, miniatura=None, webp=False)
+
+    datos = _con_poster_preferido({'poster_local': ruta, 'titulo': 'X'})
+    assert datos['poster_local'] == ruta_variante(ruta, 'optimizada')
+    sin_poster = {'titulo': 'X'}
+    assert _con_poster_preferido(sin_poster) is sin_poster
@@ -0,0 +1,114 @@
+"""Pruebas del índice invertido de películas"""
+
+from datetime import date
+
+import pytest
+
+from utils.movie_index import MovieIndex, numero_mes
+from utils.snapshot_store import SnapshotStore
+
+PELICULAS = [
+    {
+        'titulo': 'Lilo y Stitch', 'url': 'https://www.cinesa.es/peliculas/lilo-y-stitch/HO1/',
+        'fecha_estreno': '23 mayo 2025', 'duracion': '1h 48m',
+        'clasificacion': 'Apta para todos los públicos',
+        'generos': ['Aventuras', 'Familiar'],
+        'directores': 'Dean Fleischer Camp',
+        'actores': 'Maia Kealoha, Sydney Agudong, Zach Galifianakis',
+    },
+    {
+        'titulo': 'Misión: Imposible - Sentencia final', 'url': 'https://www.cinesa.es/peliculas/mision/HO2/',
+        'fecha_estreno': '21 mayo 2025', 'duracion': '2h 50m',
+        'clasificacion': 'No recomendada para menores de 12 años',
+        'generos': ['Acción', 'Aventuras'],
+        'directores': 'Christopher McQuarrie',
+        'actores': ['Tom Cruise', 'Hayley Atwell'],
+    },
+    {
+        'titulo': 'Los Thunderbolts', 'url': 'https://www.cinesa.es/peliculas/thunderbolts/HO3/',
+        'fecha_estreno': '1 mayo 2025',
+        'clasificacion': 'No recomendada para menores de 12 años',
+        'generos': ['Acción'],
+        # Dos directores en un solo texto, como los da la página
+        'directores': 'Anna Boden, Ryan Fleck',
+        'actores': 'Florence Pugh,  Sebastian Stan',
+    },
+    {
+        'titulo': 'Sin estreno', 'url': 'https://www.cinesa.es/peliculas/sin-estreno/HO4/',
+        'clasificacion': 'Pendiente de calificación',
+    },
+]
+
+
+@pytest.fixture
+def indice():
+    return MovieIndex(PELICULAS)
+
+
+def titulos(resultado):
+    return [pelicula['titulo'] for pelicula in resultado]
+
+
+def test_directores_y_actores_separados_por_comas(indice):
+    assert titulos(indice.consultar(director='ryan fleck')) == ['Los Thunderbolts']
+    assert titulos(indice.consultar(director='Anna Boden')) == ['Los Thunderbolts']
+    assert indice.consultar(director='Anna Boden, Ryan Fleck') == []
+    assert titulos(indice.consultar(actor='sebastian stan')) == ['Los Thunderbolts']
+    assert titulos(indice.consultar(actor='Zach Galifianakis')) == ['Lilo y Stitch']
+    assert indice.consultar(director='Anna Boden')[0]['directores'] == ['Anna Boden', 'Ryan Fleck']
+
+
+def test_filtros_sin_tildes_ni_mayusculas_y_conjuntivos(indice):
+    assert titulos(indice.consultar(genero='accion')) == ['Los Thunderbolts', 'Misión: Imposible - Sentencia final']
+    assert titulos(indice.consultar(genero=['Acción', 'Aventuras'])) == ['Misión: Imposible - Sentencia final']
+    assert indice.consultar(genero='Acción', actor='Maia Kealoha') == []
+    assert indice.consultar(genero='Terror') == []
+
+
+def test_clasificacion_por_codigo_o_texto(indice):
+    assert titulos(indice.consultar(clasificacion='12')) == ['Los Thunderbolts', 'Misión: Imposible - Sentencia final']
+    assert titulos(indice.consultar(clasificacion='Apta para todos los públicos')) == ['Lilo y Stitch']
+    assert titulos(indice.consultar(clasificacion='tp')) == ['Lilo y Stitch']
+    assert titulos(indice.consultar(clasificacion='pendiente')) == ['Sin estreno']
+
+
+def test_mes_anio_y_rango_de_estreno(indice):
+    assert len(indice.consultar(mes='mayo', anio=2025)) == 3
+    assert indice.consultar(mes=6) == []
+    assert titulos(indice.consultar(desde=date(2025, 5, 21), hasta=date(2025, 5, 23))) == [
+        'Misión: Imposible - Sentencia final', 'Lilo y Stitch'
+    ]
+    assert titulos(indice.consultar(hasta=date(2025, 5, 1))) == ['Los Thunderbolts']
+
+
+def test_titulo_exige_todas_las_palabras(indice):
+    assert titulos(indice.consultar(titulo='mision final')) == ['Misión: Imposible - Sentencia final']
+    assert indice.consultar(titulo='mision stitch') == []
+
+
+def test_sin_filtros_devuelve_todas_ordenadas(indice):
+    assert titulos(indice.consultar()) == [
+        'Sin estreno', 'Los Thunderbolts', 'Misión: Imposible - Sentencia final', 'Lilo y Stitch'
+    ]
+    assert indice.consultar(titulo='Lilo')[0]['duracion'] == 108
+
+
+def test_numero_mes():
+    assert numero_mes('06') == 6
+    assert numero_mes('Junio') == 6
+    assert numero_mes(13) is None
+    assert numero_mes('brumario') is None
+    assert numero_mes(None) is None
+
+
+def test_cargar_reutiliza_la_cache_mientras_no_cambie_el_almacen(tmp_path):
+    almacen = SnapshotStore(str(tmp_path))
+    almacen.guardar(PELICULAS[0])
+    primero = MovieIndex.cargar(almacen)
+    assert MovieIndex.cargar(almacen).huella == primero.huella
+
+    almacen.guardar(PELICULAS[1])
+    segundo = MovieIndex.cargar(almacen)
+    assert segundo.huella != primero.huella
+    assert len(segundo.peliculas) == 2
+    almacen.cerrar()
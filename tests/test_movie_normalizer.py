@@ -0,0 +1,144 @@
+"""Pruebas de la normalización de textos de Cinesa a tipos de la base de datos"""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from utils.movie_normalizer import (
+    CAMPOS_TIPADOS, campos_tipados, codigo_clasificacion, normalizar_duracion, normalizar_fecha,
+    normalizar_fecha_sesion, normalizar_hora, normalizar_lista, normalizar_pelicula,
+    normalizar_sesiones, tipar_almacen, tipar_pelicula
+)
+from utils.snapshot_store import SnapshotStore
+
+
+@pytest.mark.parametrize('texto, minutos', [
+    ('1h 40m', 100), ('2h', 120), ('45m', 45), ('95 min', 95), ('95', 95), (95, 95),
+    ('', None), (None, None), ('sin datos', None),
+])
+def test_normalizar_duracion(texto, minutos):
+    assert normalizar_duracion(texto) == minutos
+
+
+@pytest.mark.parametrize('texto, fecha', [
+    ('6 mayo 2025', date(2025, 5, 6)),
+    ('6 de mayo de 2025', date(2025, 5, 6)),
+    ('06/05/2025', date(2025, 5, 6)),
+    ('2025-05-06', date(2025, 5, 6)),
+    ('30 febrero 2025', None),
+    ('6 brumario 2025', None),
+    (None, None),
+])
+def test_normalizar_fecha(texto, fecha):
+    assert normalizar_fecha(texto) == fecha
+
+
+@pytest.mark.parametrize('texto, referencia, fecha', [
+    ('Hoy', date(2025, 5, 24), date(2025, 5, 24)),
+    ('Mañana', date(2025, 12, 31), date(2026, 1, 1)),
+    ('sáb 24 may', date(2025, 5, 20), date(2025, 5, 24)),
+    ('2 ene', date(2025, 12, 28), date(2026, 1, 2)),
+    # Una fecha pasada hace menos de dos meses sigue en el año de referencia
+    ('10 may', date(2025, 6, 1), date(2025, 5, 10)),
+    # 29 de febrero: solo existe en años bisiestos
+    ('jue 29 feb', date(2027, 12, 20), date(2028, 2, 29)),
+    ('29 feb', date(2028, 2, 1), date(2028, 2, 29)),
+    ('29 feb', date(2025, 12, 20), None),
+    ('2025-06-01', date(2030, 1, 1), date(2025, 6, 1)),
+    ('24 ma', date(2025, 5, 20), None),
+    ('', date(2025, 5, 20), None),
+])
+def test_normalizar_fecha_sesion(texto, referencia, fecha):
+    assert normalizar_fecha_sesion(texto, referencia) == fecha
+
+
+@pytest.mark.parametrize('texto, hora', [
+    ('20:15', time(20, 15)), ('9.05', time(9, 5)), ('20h15', time(20, 15)),
+    ('24:00', None), ('tarde', None), (None, None),
+])
+def test_normalizar_hora(texto, hora):
+    assert normalizar_hora(texto) == hora
+
+
+def test_codigo_clasificacion():
+    assert codigo_clasificacion('No recomendada para menores de 16 años') == '16'
+    assert codigo_clasificacion('Apta para todos los públicos') == 'tp'
+    assert codigo_clasificacion('Pendiente de calificación') == 'pendiente'
+    assert codigo_clasificacion(None) is None
+
+
+def test_normalizar_lista():
+    assert normalizar_lista('Anna Boden,  Ryan Fleck, ,Anna Boden') == ['Anna Boden', 'Ryan Fleck']
+    assert normalizar_lista(['Tom  Cruise', '', None, 'Tom Cruise']) == ['Tom Cruise', 'None']
+    assert normalizar_lista(None) == []
+
+
+def test_tipar_pelicula_y_campos_tipados():
+    datos = {'duracion': '1h 48m', 'fecha_estreno': '23 mayo 2025', 'clasificacion': 'Apta para todos los públicos'}
+    tipada = tipar_pelicula(datos)
+    assert {campo: tipada[campo] for campo in CAMPOS_TIPADOS} == {
+        'duracion_minutos': 108, 'estreno': '2025-05-23', 'clasificacion_codigo': 'tp'
+    }
+    assert 'duracion_minutos' not in datos
+
+    # Los campos guardados mandan; sin ellos se calculan al vuelo
+    guardada = {**datos, 'duracion_minutos': 1, 'estreno': None, 'clasificacion_codigo': 'x'}
+    assert campos_tipados(guardada) == {'duracion_minutos': 1, 'estreno': None, 'clasificacion_codigo': 'x'}
+    assert campos_tipados(datos)['duracion_minutos'] == 108
+
+
+def test_tipar_almacen_solo_reescribe_las_pendientes(tmp_path):
+    almacen = SnapshotStore(str(tmp_path))
+    almacen.guardar({'id_pelicula': 'HO1', 'duracion': '2h'})
+    almacen.guardar(tipar_pelicula({'id_pelicula': 'HO2', 'duracion': '1h'}))
+
+    assert tipar_almacen(almacen) == 1
+    assert almacen.obtener('HO1')['duracion_minutos'] == 120
+    assert tipar_almacen(almacen) == 0
+    almacen.cerrar()
+
+
+def test_sesiones_del_dom_y_de_la_api_dan_las_mismas_filas():
+    dom = [{'nombre_cine': 'Cinesa Diagonal', 'sesiones': [
+        {'fecha': 'sáb 24 may', 'hora': '17:30', 'formato': 'VOSE', 'url_compra': 'u1'},
+    ]}]
+    api = [{'nombre_cine': 'Cinesa Diagonal', 'sesiones': [
+        {'fecha': '2025-05-24', 'hora': '17:30', 'formato': 'VOSE', 'url_compra': 'u1'},
+    ]}]
+    assert normalizar_sesiones(dom, date(2025, 5, 20)) == normalizar_sesiones(api, date(2025, 5, 20))
+
+
+def test_normalizar_sesiones_descarta_las_incompletas():
+    filas = normalizar_sesiones([
+        {'nombre_cine': ' Cinesa  Diagonal ', 'sesiones': [
+            {'fecha': '2025-05-24', 'hora': '17:30', 'formato': 'VOSE', 'url_compra': 'u1', 'sala': 'Sala 3'},
+            {'fecha': 'Hoy', 'hora': '22:00', 'formato': ''},
+            {'fecha': 'Hoy', 'hora': None},
+        ]},
+        {'nombre_cine': '', 'sesiones': [{'fecha': 'Hoy', 'hora': '10:00'}]},
+    ], date(2025, 5, 20))
+    assert filas == [
+        {'cinema': 'Cinesa Diagonal', 'room': 'Sala 3', 'date': date(2025, 5, 24), 'time': time(17, 30),
+         'format': 'VOSE', 'purchase_url': 'u1'},
+        {'cinema': 'Cinesa Diagonal', 'room': None, 'date': date(2025, 5, 20), 'time': time(22, 0),
+         'format': None, 'purchase_url': None},
+    ]
+
+
+def test_normalizar_pelicula():
+    fila = normalizar_pelicula({
+        'url': 'https://www.cinesa.es/peliculas/lilo-y-stitch/HO00002161/',
+        'titulo': ' Lilo y  Stitch ', 'sinopsis': 'Sinopsis no disponible',
+        'duracion': '1h 48m', 'fecha_estreno': '23 mayo 2025', 'clasificacion': 'Apta para todos los públicos',
+        'poster_local': '/home/usuario/gadget/data/imagenes/lilo.jpg',
+        'fecha_scraping': '2025-05-20T10:00:00',
+        'generos': ['Aventuras', 'Familiar'], 'actores': 'Maia Kealoha, Zach Galifianakis',
+    })
+    assert fila == {
+        'external_id': 'HO00002161', 'title': 'Lilo y Stitch', 'synopsis': None, 'duration': 108,
+        'rating': 'Apta para todos los públicos', 'release_date': date(2025, 5, 23),
+        'photo_url': 'data/imagenes/lilo.jpg', 'scraped_at': datetime(2025, 5, 20, 10, 0),
+        'genres': ['Aventuras', 'Familiar'], 'actors': ['Maia Kealoha', 'Zach Galifianakis'],
+    }
+    assert normalizar_pelicula({'titulo': 'Título no disponible', 'id_pelicula': 'HO1'}) is None
+    assert normalizar_pelicula({'titulo': 'Sin identificar'}) is None
@@ -0,0 +1,95 @@
+"""Pruebas del archivo de páginas y de la re-extracción a partir de él"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from scrapers import cinesa_reparse
+from utils.page_archive import PageArchive, ficheros_archivo, leer_registros
+from utils.snapshot_store import SnapshotStore
+
+URL = "https://www.cinesa.es/peliculas/lilo-y-stitch/HO00002161/"
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    return PageArchive(str(tmp_path / 'archivo'))
+
+
+def test_registros_se_leen_en_orden(archivo):
+    archivo.guardar(URL, '<html>uno</html>')
+    archivo.guardar('https://www.cinesa.es/peliculas/', b'<html>listado</html>', tipo='listado')
+
+    registros = list(leer_registros(archivo.ruta_del_dia()))
+
+    assert [r['url'] for r in registros] == [URL, 'https://www.cinesa.es/peliculas/']
+    assert registros[0]['contenido'] == b'<html>uno</html>'
+    assert registros[0]['tipo'] == 'detalle'
+    assert registros[1]['tipo'] == 'listado'
+    assert registros[0]['content_type'] == 'text/html; charset=utf-8'
+    assert archivo.registros == 2
+
+
+def test_miembro_final_truncado_se_descarta(archivo, caplog):
+    archivo.guardar(URL, '<html>uno</html>')
+    archivo.guardar(URL, '<html>dos</html>' * 200)
+    ruta = archivo.ruta_del_dia()
+    tamano = os.path.getsize(ruta)
+    # Corta el final del segundo miembro, como si el proceso hubiera muerto al escribirlo
+    with open(ruta, 'r+b') as f:
+        f.truncate(tamano - 40)
+
+    registros = list(leer_registros(ruta))
+
+    assert [r['contenido'] for r in registros] == [b'<html>uno</html>']
+    assert "incompleto" in caplog.text
+
+
+def test_ficheros_archivo_filtra_por_fecha(archivo):
+    for dia in (1, 2, 3):
+        with open(archivo.ruta_del_dia(datetime(2025, 6, dia)), 'wb'):
+            pass
+
+    nombres = [os.path.basename(f) for f in ficheros_archivo(archivo.directorio, desde='20250602')]
+
+    assert nombres == ['paginas-20250602.warc.gz', 'paginas-20250603.warc.gz']
+
+
+def test_registros_detalle_da_la_ultima_version_de_cada_url(archivo):
+    archivo.guardar(URL, '<html>vieja</html>')
+    archivo.guardar('https://www.cinesa.es/peliculas/', '<html>listado</html>', tipo='listado')
+    archivo.guardar(URL, '<html>nueva</html>')
+
+    ultimas = list(cinesa_reparse.registros_detalle(archivo.directorio))
+    todas = list(cinesa_reparse.registros_detalle(archivo.directorio, todas=True))
+
+    assert [contenido for _, _, contenido in ultimas] == [b'<html>nueva</html>']
+    assert [contenido for _, _, contenido in todas] == [b'<html>vieja</html>', b'<html>nueva</html>']
+
+
+def test_extraer_pagina_archivada(html_detalle):
+    pelicula = cinesa_reparse._extraer((URL, '2025-06-01T10:00:00', html_detalle.encode('utf-8')))
+
+    assert pelicula['titulo'] == 'Lilo y Stitch'
+    assert pelicula['id_pelicula'] == 'HO00002161'
+    assert pelicula['fecha_scraping'] == '2025-06-01T10:00:00'
+    assert pelicula['sesiones']
+    assert cinesa_reparse._extraer((URL, None, b'<html><body>Mantenimiento</body></html>')) is None
+
+
+def test_guardar_resultado_conserva_los_campos_que_no_salen_del_html(tmp_path):
+    almacen = SnapshotStore(str(tmp_path / 'snapshots'))
+    sesiones = [{'nombre_cine': 'Cinesa Diagonal', 'fecha': '2025-06-01', 'sesiones': []}]
+    almacen.guardar({'id_pelicula': 'HO1', 'titulo': 'Viejo', 'poster_local': 'p.jpg', 'sesiones': sesiones})
+
+    clave = cinesa_reparse.guardar_resultado(
+        {'id_pelicula': 'HO1', 'titulo': 'Nuevo', 'duracion': '1h 48m', 'sesiones': []}, almacen
+    )
+    almacen.cerrar()
+
+    guardada = almacen.obtener(clave)
+    assert guardada['titulo'] == 'Nuevo'
+    assert guardada['poster_local'] == 'p.jpg'
+    assert guardada['sesiones'] == sesiones
+    assert guardada['duracion_minutos'] == 108
@@ -0,0 +1,90 @@
+"""Pruebas del almacén de pósters: deduplicación por hash e índice"""
+
+import hashlib
+import os
+
+import pytest
+
+from utils.poster_store import NOMBRE_INDICE, PosterStore
+
+IMAGEN = b'\xff\xd8\xff\xe0 bytes de un jpeg'
+OTRA = b'\xff\xd8\xff\xe0 otro jpeg'
+
+
+@pytest.fixture
+def raiz(tmp_path):
+    return str(tmp_path / 'imagenes')
+
+
+def test_imagen_repetida_se_guarda_una_vez(raiz):
+    almacen = PosterStore(raiz)
+
+    ruta, nueva = almacen.guardar(IMAGEN, url='https://x/a.jpg', id_pelicula='A')
+    repetida, nueva_otra_vez = almacen.guardar(IMAGEN, url='https://x/a-copia.jpg', id_pelicula='B')
+
+    assert nueva and not nueva_otra_vez
+    assert ruta == repetida
+    hash_hex = hashlib.sha256(IMAGEN).hexdigest()
+    assert ruta == os.path.join(raiz, hash_hex[:2], hash_hex[2:4], f"{hash_hex}.jpg")
+    with open(ruta, 'rb') as f:
+        assert f.read() == IMAGEN
+    assert almacen.estadisticas() == {'objetos': 1, 'urls': 2, 'peliculas': 2}
+
+
+def test_buscar_por_url_y_por_pelicula(raiz):
+    almacen = PosterStore(raiz)
+    ruta, _ = almacen.guardar(IMAGEN, url='https://x/a.jpg', id_pelicula='A')
+
+    assert almacen.buscar_url('https://x/a.jpg') == ruta
+    assert almacen.buscar_pelicula('A') == ruta
+    assert almacen.buscar_url('https://x/otra.jpg') is None
+    assert almacen.buscar_pelicula('Z') is None
+
+
+def test_fichero_borrado_no_se_da_por_encontrado(raiz):
+    almacen = PosterStore(raiz)
+    ruta, _ = almacen.guardar(IMAGEN, url='https://x/a.jpg')
+    os.remove(ruta)
+
+    assert almacen.buscar_url('https://x/a.jpg') is None
+    assert almacen.guardar(IMAGEN, url='https://x/a.jpg') == (ruta, True)
+
+
+def test_asociar_pelicula_solo_con_imagenes_del_almacen(raiz, tmp_path):
+    almacen = PosterStore(raiz)
+    ruta, _ = almacen.guardar(IMAGEN)
+
+    almacen.asociar_pelicula('A', ruta)
+    almacen.asociar_pelicula('B', str(tmp_path / 'ajena.jpg'))
+
+    assert almacen.buscar_pelicula('A') == ruta
+    assert almacen.buscar_pelicula('B') is None
+
+
+def test_el_indice_persiste_entre_instancias(raiz):
+    almacen = PosterStore(raiz, guardar_cada=100)
+    ruta, _ = almacen.guardar(IMAGEN, url='https://x/a.jpg', id_pelicula='A')
+    otra, _ = almacen.guardar(OTRA, id_pelicula='B')
+    assert not os.path.exists(os.path.join(raiz, NOMBRE_INDICE))
+    almacen.guardar_indice()
+
+    recargado = PosterStore(raiz)
+    assert recargado.buscar_url('https://x/a.jpg') == ruta
+    assert recargado.buscar_pelicula('B') == otra
+    assert recargado.guardar(IMAGEN) == (ruta, False)
+
+
+def test_el_indice_se_escribe_cada_n_cambios(raiz):
+    almacen = PosterStore(raiz, guardar_cada=2)
+    almacen.guardar(IMAGEN)
+    assert not os.path.exists(os.path.join(raiz, NOMBRE_INDICE))
+    almacen.guardar(OTRA)
+    assert os.path.exists(os.path.join(raiz, NOMBRE_INDICE))
+
+
+def test_indice_corrupto_empieza_vacio(raiz):
+    os.makedirs(raiz)
+    with open(os.path.join(raiz, NOMBRE_INDICE), 'w', encoding='utf-8') as f:
+        f.write('{roto')
+
+    assert PosterStore(raiz).estadisticas() == {'objetos': 0, 'urls': 0, 'peliculas': 0}
@@ -0,0 +1,161 @@
+"""Pruebas del limitador adaptativo (AIMD) con un reloj simulado"""
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+class Reloj:
+    """Sustituye a ``time`` en el módulo: sleep avanza el reloj sin esperar"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+        self.dormido = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+        self.dormido += segundos
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(rate_limiter, 'time', reloj)
+    return reloj
+
+
+def test_rafaga_sin_esperar_y_despues_al_ritmo_de_la_tasa(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=2.0, rafaga=2)
+    limitador.adquirir()
+    limitador.adquirir()
+    assert reloj.dormido == 0
+
+    limitador.adquirir()
+    assert reloj.dormido == pytest.approx(0.5)
+    assert limitador.resumen()['peticiones'] == 3
+
+
+def test_bloqueo_divide_la_tasa_y_respeta_retry_after(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=4.0, tasa_min=0.2, rafaga=2)
+    limitador.registrar(status=429, retry_after=3)
+    assert limitador.tasa == 2.0
+    assert limitador.frenadas == 1
+
+    limitador.adquirir()
+    assert reloj.dormido >= 3
+
+
+def test_respuestas_malas_seguidas_cuentan_como_una_frenada(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=4.0)
+    limitador.registrar(status=503)
+    limitador.registrar(error=True)
+    assert limitador.tasa == 2.0
+
+    reloj.ahora += 1.5
+    limitador.registrar(status=403)
+    assert limitador.tasa == 1.0
+    assert limitador.frenadas == 2
+
+
+def test_la_tasa_no_baja_del_minimo(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=0.3, tasa_min=0.2)
+    for _ in range(3):
+        limitador.registrar(status=500)
+        reloj.ahora += 2
+    assert limitador.tasa == 0.2
+
+
+def test_racha_sana_sube_la_tasa_hasta_el_maximo(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=2.0, tasa_max=2.5, incremento=0.25, respuestas_para_subir=5)
+    for _ in range(4):
+        limitador.registrar(status=200, latencia=0.1)
+    assert limitador.tasa == 2.0
+    limitador.registrar(status=200, latencia=0.1)
+    assert limitador.tasa == 2.25
+
+    for _ in range(20):
+        limitador.registrar(status=200, latencia=0.1)
+    assert limitador.tasa == 2.5
+
+
+def test_latencia_disparada_frena(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=2.0, factor_latencia=2.5)
+    for _ in range(3):
+        limitador.registrar(status=200, latencia=0.2)
+    limitador.registrar(status=200, latencia=0.3)
+    assert limitador.tasa == 2.0
+
+    limitador.registrar(status=200, latencia=2.0)
+    assert limitador.tasa == 1.0
+    assert limitador.resumen()['latencia_media'] > 0.2
+
+
+def test_una_frenada_corta_la_racha_sana(reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=2.0, respuestas_para_subir=3)
+    limitador.registrar(status=200)
+    limitador.registrar(status=200)
+    limitador.registrar(status=502)
+    limitador.registrar(status=200)
+    limitador.registrar(status=200)
+    assert limitador.tasa == 1.0
+
+
+def test_limitador_para_url_por_dominio(monkeypatch):
+    monkeypatch.setattr(rate_limiter, '_limitadores', {})
+    limitador = rate_limiter.configurar({'scraper': {'rate_limit': {'dominio': 'cinesa.es', 'tasa_inicial': 3}}})
+    assert rate_limiter.configurar({}) is limitador
+    assert limitador.tasa == 3.0
+    assert rate_limiter.limitador_para_url('https://www.cinesa.es/peliculas/') is limitador
+    assert rate_limiter.limitador_para_url('https://cinesa.es/') is limitador
+    assert rate_limiter.limitador_para_url('https://falsacinesa.es/') is None
+
+
+class DriverFalso:
+    def __init__(self, fallo=None):
+        self.fallo = fallo
+        self.visitadas = []
+
+    def get(self, url):
+        self.visitadas.append(url)
+        if self.fallo:
+            raise self.fallo
+
+
+@pytest.fixture
+def limitador(monkeypatch, reloj):
+    limitador = AdaptiveRateLimiter(tasa_inicial=2.0, respuestas_para_subir=1)
+    monkeypatch.setattr(rate_limiter, '_limitadores', {'cinesa.es': limitador})
+    return limitador
+
+
+def test_navegar_sin_confirmar_no_cuenta_como_exito(limitador):
+    driver = DriverFalso()
+    for _ in range(3):
+        rate_limiter.navegar(driver, 'https://www.cinesa.es/peliculas/')
+    assert limitador.tasa == 2.0
+    assert limitador.peticiones == 3
+    assert len(driver.visitadas) == 3
+
+
+def test_confirmar_navegacion_sube_o_baja_la_tasa(limitador, reloj):
+    url = 'https://www.cinesa.es/peliculas/lilo-y-stitch/HO1/'
+    rate_limiter.navegar(DriverFalso(), url)
+    rate_limiter.confirmar_navegacion(url, True)
+    assert limitador.tasa == 2.25
+
+    # Página de bloqueo: Selenium no falla, pero falta el marcado esperado
+    rate_limiter.navegar(DriverFalso(), url)
+    rate_limiter.confirmar_navegacion(url, False)
+    assert limitador.tasa == 1.125
+    rate_limiter.confirmar_navegacion('https://otro.example/', False)
+    assert limitador.frenadas == 1
+
+
+def test_navegacion_fallida_frena(limitador):
+    with pytest.raises(TimeoutError):
+        rate_limiter.navegar(DriverFalso(TimeoutError("sin respuesta")), 'https://www.cinesa.es/')
+    assert limitador.tasa == 1.0
@@ -0,0 +1,67 @@
+"""Pruebas del manifiesto del scraping incremental"""
+
+import json
+import threading
+import time
+
+import utils.scrape_manifest as scrape_manifest
+from utils.scrape_manifest import ScrapeManifest
+
+
+def test_guardar_y_recargar(tmp_path):
+    ruta = str(tmp_path / 'manifest.json')
+    manifiesto = ScrapeManifest(ruta, guardar_cada=100)
+    manifiesto.actualizar('https://x/a', clave='A', verificado=time.time())
+    manifiesto.guardar()
+
+    recargado = ScrapeManifest(ruta)
+    assert recargado.obtener('https://x/a')['clave'] == 'A'
+    assert recargado.vigente(recargado.obtener('https://x/a'))
+    assert recargado.obtener('https://x/b') is None
+
+
+def test_olvidar_claves(tmp_path):
+    manifiesto = ScrapeManifest(str(tmp_path / 'manifest.json'), guardar_cada=100)
+    manifiesto.actualizar('https://x/a', clave='A')
+    manifiesto.actualizar('https://x/b', clave='B')
+
+    assert manifiesto.olvidar_claves(['A', 'Z']) == 1
+    assert manifiesto.obtener('https://x/a') is None
+    assert manifiesto.obtener('https://x/b')['clave'] == 'B'
+
+
+def test_escrituras_concurrentes_no_pisan_una_foto_mas_reciente(tmp_path, monkeypatch):
+    escrituras = []
+    en_curso = []
+    solapes = []
+    original = scrape_manifest.escribir_atomico
+
+    def escribir_lento(ruta, contenido):
+        en_curso.append(1)
+        solapes.append(len(en_curso))
+        time.sleep(0.002)
+        escrituras.append(json.loads(contenido))
+        original(ruta, contenido)
+        en_curso.pop()
+
+    monkeypatch.setattr(scrape_manifest, 'escribir_atomico', escribir_lento)
+
+    ruta = str(tmp_path / 'manifest.json')
+    manifiesto = ScrapeManifest(ruta, guardar_cada=1)
+
+    def trabajador(n):
+        for i in range(10):
+            manifiesto.actualizar(f"https://x/{n}-{i}", clave=f"{n}-{i}")
+
+    hilos = [threading.Thread(target=trabajador, args=(n,)) for n in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert max(solapes) == 1
+    # Cada foto escrita contiene al menos lo que tenía la anterior
+    for anterior, siguiente in zip(escrituras, escrituras[1:]):
+        assert set(anterior) <= set(siguiente)
+    with open(ruta, encoding='utf-8') as f:
+        assert len(json.load(f)) == 40
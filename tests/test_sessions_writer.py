@@ -0,0 +1,114 @@
+"""Pruebas de la resolución de salas y de la escritura de sesiones (con una conexión simulada)"""
+
+from datetime import date, time
+
+import pytest
+
+from utils import sessions_writer
+from utils.sessions_writer import SALA_GENERICA, SessionsWriter, nombres_sala
+
+DIA = date(2025, 5, 24)
+
+
+def sesion(hora, formato=None, url=None, sala=None, cine='Cinesa Diagonal'):
+    return {'cinema': cine, 'room': sala, 'date': DIA, 'time': time(*hora),
+            'format': formato, 'purchase_url': url}
+
+
+def test_sin_sala_va_a_la_generica_y_el_formato_no_es_sala():
+    filas = [sesion((17, 30), 'VOSE iSense', 'u1'), sesion((20, 15), '2D', 'u2'), sesion((22, 0), 'VOSE', 'u3', 'Sala 3')]
+    assert nombres_sala(filas) == [SALA_GENERICA, SALA_GENERICA, 'Sala 3']
+
+
+def test_sesiones_distintas_a_la_misma_hora_no_se_funden():
+    filas = [
+        sesion((20, 0), 'VOSE', 'u2'),
+        sesion((20, 0), '2D', 'u1'),
+        # Mismo formato y hora en otra sala que la web no indica
+        sesion((20, 0), '2D', 'u3'),
+        sesion((20, 0), '2D', 'u3'),
+        sesion((20, 0), '2D', 'u4', cine='Cinesa La Maquinista'),
+    ]
+    assert nombres_sala(filas) == [
+        f"{SALA_GENERICA} 3", SALA_GENERICA, f"{SALA_GENERICA} 2", f"{SALA_GENERICA} 2", SALA_GENERICA
+    ]
+
+
+class CursorFalso:
+    """Cursor mínimo: responde a las consultas de las cachés y de la fusión"""
+
+    def __init__(self, peliculas):
+        self.peliculas = peliculas
+        self.consultas = []
+        self.rowcount = 0
+        self._filas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def execute(self, sql, parametros=None):
+        self.consultas.append(sql)
+        if 'FROM movie' in sql:
+            self._filas = list(self.peliculas.items())
+        elif 'RETURNING (xmax = 0)' in sql:
+            self._filas = [(True,)] * len(self.staging)
+        else:
+            self._filas = []
+
+    def fetchall(self):
+        return self._filas
+
+
+class ConexionFalsa:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def cursor(self):
+        return self._cursor
+
+
+@pytest.fixture
+def cursor(monkeypatch):
+    cursor = CursorFalso({1: 'HO1'})
+    ids = iter(range(100, 200))
+
+    def execute_values(cur, sql, filas, page_size=None, fetch=False):
+        if 'INTO cinema' in sql:
+            return [(next(ids), nombre) for nombre, in filas]
+        if 'INTO room' in sql:
+            cur.salas_creadas = [(id_cine, nombre, capacidad) for id_cine, nombre, capacidad in filas]
+            return [(next(ids), id_cine, nombre) for id_cine, nombre, _ in filas]
+        cur.staging = list(filas)
+        return None
+
+    monkeypatch.setattr(sessions_writer, 'execute_values', execute_values)
+    return cursor
+
+
+def test_escribir_crea_salas_genericas_y_guarda_el_formato(cursor):
+    escritor = SessionsWriter(ConexionFalsa(cursor))
+    resultado = escritor.escribir({
+        'HO1': [sesion((20, 0), 'VOSE iSense', 'u1'), sesion((20, 0), '2D', 'u2'), sesion((22, 0), '2D', 'u3', 'Sala 3')],
+        'HO9': [sesion((18, 0), '2D', 'u9')],
+    }, hoy=DIA)
+
+    assert sorted(nombre for _, nombre, _ in cursor.salas_creadas) == [SALA_GENERICA, f"{SALA_GENERICA} 2", 'Sala 3']
+    assert not any('VOSE' in nombre or nombre == '2D' for _, nombre, _ in cursor.salas_creadas)
+    salas = {id_sala: nombre for (_, nombre), id_sala in escritor.salas.items()}
+    assert [(salas[fila[1]], fila[4]) for fila in cursor.staging] == [
+        (f"{SALA_GENERICA} 2", 'VOSE iSense'), (SALA_GENERICA, '2D'), ('Sala 3', '2D')
+    ]
+    assert len({(fila[0], fila[1], fila[2], fila[3]) for fila in cursor.staging}) == 3
+    assert resultado['sesiones'] == 3
+    assert resultado['insertadas'] == 3
+    assert resultado['sin_pelicula'] == 1
+    assert resultado['salas_nuevas'] == 3
@@ -0,0 +1,92 @@
+"""Pruebas de la tabla columnar de sesiones"""
+
+from datetime import datetime
+
+import pytest
+
+from utils.showtime_table import ShowtimeTable, a_segundos, desde_segundos
+
+PELICULAS = [
+    {
+        'id_pelicula': 'HO1', 'titulo': 'Lilo y Stitch', 'fecha_scraping': '2025-05-20T09:00:00',
+        'sesiones': [
+            {'nombre_cine': 'Cinesa Diagonal', 'sesiones': [
+                {'fecha': 'Hoy', 'hora': '22:00', 'formato': 'VOSE'},
+                {'fecha': 'Hoy', 'hora': '17:30', 'formato': ''},
+                {'fecha': 'Hoy', 'hora': 'sin hora'},
+            ]},
+            {'nombre_cine': 'Cinesa La Maquinista', 'sesiones': [
+                {'fecha': '2025-05-21', 'hora': '16:00', 'formato': '3D'},
+            ]},
+        ],
+    },
+    {
+        'id_pelicula': 'HO2', 'titulo': 'Misión: Imposible - Sentencia final', 'fecha_scraping': '2025-05-20T09:00:00',
+        'sesiones': [
+            {'nombre_cine': 'Cinesa Diagonal', 'sesiones': [
+                {'fecha': 'mié 21 may', 'hora': '20:15', 'formato': 'VOSE'},
+                {'fecha': 'Hoy', 'hora': '18:00', 'formato': '2D'},
+            ]},
+        ],
+    },
+    {'id_pelicula': 'HO3', 'titulo': 'Sin sesiones', 'sesiones': []},
+    {'titulo': 'Sin identificar', 'sesiones': [{'nombre_cine': 'X', 'sesiones': [{'fecha': 'Hoy', 'hora': '10:00'}]}]},
+]
+
+
+@pytest.fixture
+def tabla():
+    return ShowtimeTable.desde_peliculas(PELICULAS)
+
+
+def inicios(filas):
+    return [fila['inicio'].strftime('%d %H:%M') for fila in filas]
+
+
+def test_columnas_ordenadas_por_inicio(tabla):
+    assert len(tabla) == 5
+    assert list(tabla.inicio) == sorted(tabla.inicio)
+    assert tabla.peliculas == [('HO1', 'Lilo y Stitch'), ('HO2', 'Misión: Imposible - Sentencia final')]
+    assert tabla.cines == ['Cinesa Diagonal', 'Cinesa La Maquinista']
+    assert tabla.fila(0) == {'external_id': 'HO1', 'titulo': 'Lilo y Stitch', 'cine': 'Cinesa Diagonal',
+                             'inicio': datetime(2025, 5, 20, 17, 30), 'formato': None}
+    assert tabla.memoria() > 0
+
+
+def test_segundos_ida_y_vuelta():
+    instante = datetime(2028, 2, 29, 23, 59)
+    assert desde_segundos(a_segundos(instante)) == instante
+
+
+def test_franja_sin_copia(tabla):
+    franja = tabla.franja(datetime(2025, 5, 20, 18, 0), datetime(2025, 5, 21, 16, 0))
+    columna = franja.columna('inicio')
+    assert isinstance(columna, memoryview)
+    assert columna.obj is tabla.inicio
+    assert inicios(franja.filas()) == ['20 18:00', '20 22:00']
+    assert len(tabla.franja(datetime(2025, 5, 22))) == 0
+
+
+def test_sesiones_de_un_cine_ordenadas(tabla):
+    codigo = tabla.codigo_cine('cinesa diagonal')
+    franja = tabla.sesiones_cine(codigo)
+    assert inicios(franja.filas()) == ['20 17:30', '20 18:00', '20 22:00', '21 20:15']
+    assert list(franja.columna('inicio')) == sorted(franja.columna('inicio'))
+    assert [tabla.cines[c] for c in franja.columna('cine')] == ['Cinesa Diagonal'] * 4
+    assert inicios(tabla.sesiones_cine(codigo, datetime(2025, 5, 20, 20, 0)).filas()) == ['20 22:00', '21 20:15']
+    assert tabla.codigo_cine('Cinesa Inexistente') is None
+
+
+def test_por_cine(tabla):
+    assert tabla.por_cine() == {'Cinesa Diagonal': 4, 'Cinesa La Maquinista': 1}
+    assert sum(tabla.por_cine().values()) == len(tabla)
+
+
+def test_proximas(tabla):
+    desde = datetime(2025, 5, 20, 18, 0)
+    assert inicios(tabla.proximas(2, desde)) == ['20 18:00', '20 22:00']
+    assert inicios(tabla.proximas(10, desde, cine='Cinesa La Maquinista')) == ['21 16:00']
+    assert inicios(tabla.proximas(10, desde, pelicula='mision')) == ['20 18:00', '21 20:15']
+    assert inicios(tabla.proximas(10, desde, cine='Cinesa Diagonal', pelicula='stitch')) == ['20 22:00']
+    assert tabla.proximas(10, desde, pelicula='terminator') == []
+    assert tabla.proximas(10, desde, cine='Cinesa Inexistente') == []
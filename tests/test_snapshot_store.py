@@ -0,0 +1,185 @@
+"""Pruebas del almacén de instantáneas: posiciones, compactación e importación"""
+
+import json
+import os
+
+import pytest
+
+from utils.snapshot_store import (
+    EXTENSION_MARCA, NOMBRE_INDICE, SnapshotStore, _serializar, importar_json, orden_segmento
+)
+
+
+def pelicula(id_pelicula, **campos):
+    return {'id_pelicula': id_pelicula, 'titulo': f"Película {id_pelicula}", **campos}
+
+
+def escribir_segmento(directorio, nombre, registros, resto=b''):
+    """Segmento escrito a mano con registros (datos, clave) y un final opcional"""
+    with open(os.path.join(directorio, nombre), 'wb') as f:
+        for datos, clave in registros:
+            f.write(_serializar(clave, 'pelicula', datos))
+        f.write(resto)
+
+
+@pytest.fixture
+def directorio(tmp_path):
+    return str(tmp_path / 'snapshots')
+
+
+def test_obtener_lee_la_ultima_version_por_posicion(directorio):
+    almacen = SnapshotStore(directorio)
+    almacen.guardar_lote([(pelicula('A', v=1), 'A', 'pelicula'), (pelicula('B'), 'B', 'pelicula')])
+    almacen.guardar(pelicula('A', v=2))
+    almacen.cerrar()
+
+    assert almacen.obtener('A')['v'] == 2
+    assert almacen.obtener('B')['titulo'] == "Película B"
+    assert almacen.obtener('C') is None
+    assert almacen.contiene('B')
+
+    # El índice guardado sirve a un almacén nuevo sin reconstruirlo
+    reabierto = SnapshotStore(directorio)
+    assert reabierto.version() == almacen.version()
+    assert reabierto.obtener('A')['v'] == 2
+    assert sorted(datos['id_pelicula'] for datos in reabierto.ultimas()) == ['A', 'B']
+    assert not any(nombre.endswith(EXTENSION_MARCA) for nombre in os.listdir(directorio))
+
+
+def test_indice_desactualizado_se_reconstruye(directorio):
+    almacen = SnapshotStore(directorio)
+    almacen.guardar(pelicula('A', v=1))
+    almacen.cerrar()
+    # Otro proceso añade un segmento sin tocar este índice
+    escribir_segmento(directorio, '29990101-000000.jsonl', [(pelicula('A', v=2), 'A')])
+
+    assert SnapshotStore(directorio).obtener('A')['v'] == 2
+
+
+def test_linea_a_medias_se_ignora(directorio):
+    os.makedirs(directorio)
+    escribir_segmento(directorio, '20250101-000000.jsonl', [(pelicula('A'), 'A')], resto=b'{"clave":"B","ti')
+
+    almacen = SnapshotStore(directorio)
+    assert almacen.contiene('A')
+    assert not almacen.contiene('B')
+
+
+def test_segmentos_del_mismo_segundo_van_en_orden_de_creacion(directorio):
+    os.makedirs(directorio)
+    escribir_segmento(directorio, '20250101-000000.jsonl', [(pelicula('A', v=1), 'A')])
+    escribir_segmento(directorio, '20250101-000000-2.jsonl', [(pelicula('A', v=2), 'A')])
+
+    almacen = SnapshotStore(directorio)
+    assert almacen.segmentos() == ['20250101-000000.jsonl', '20250101-000000-2.jsonl']
+    assert orden_segmento('20250101-000000-2.jsonl') > orden_segmento('20250101-000000.jsonl')
+    assert almacen.obtener('A')['v'] == 2
+
+
+def test_compactar_varios_segmentos(directorio):
+    os.makedirs(directorio)
+    escribir_segmento(directorio, '20250101-000000.jsonl', [(pelicula('A', v=1), 'A'), (pelicula('B'), 'B')])
+    escribir_segmento(directorio, '20250102-000000.jsonl', [(pelicula('A', v=2), 'A')])
+    almacen = SnapshotStore(directorio)
+
+    resultado = almacen.compactar()
+
+    assert resultado['segmentos'] == 2
+    assert resultado['registros'] == 2
+    assert resultado['bytes_despues'] < resultado['bytes_antes']
+    assert almacen.segmentos() == ['20250102-000000.jsonl']
+    assert almacen.obtener('A')['v'] == 2
+    assert almacen.obtener('B')['titulo'] == "Película B"
+    assert SnapshotStore(directorio).obtener('A')['v'] == 2
+
+
+def test_compactar_un_unico_segmento_con_versiones_superadas(directorio):
+    almacen = SnapshotStore(directorio)
+    for version in range(3):
+        almacen.guardar(pelicula('A', v=version))
+    almacen.guardar(pelicula('B'))
+    almacen.cerrar()
+    nombre = almacen.segmentos()[0]
+    antes = os.path.getsize(os.path.join(directorio, nombre))
+
+    resultado = almacen.compactar()
+
+    assert resultado == {'segmentos': 1, 'registros': 2, 'bytes_antes': antes,
+                         'bytes_despues': os.path.getsize(os.path.join(directorio, nombre))}
+    assert resultado['bytes_despues'] < antes
+    assert almacen.segmentos() == [nombre]
+    assert [registro['clave'] for registro in almacen.leer_segmento(nombre)] == ['A', 'B']
+    assert almacen.obtener('A')['v'] == 2
+
+
+def test_compactar_un_unico_segmento_limpio_no_lo_reescribe(directorio):
+    almacen = SnapshotStore(directorio)
+    almacen.guardar_lote([(pelicula('A'), 'A', 'pelicula'), (pelicula('B'), 'B', 'pelicula')])
+    almacen.cerrar()
+    ruta = os.path.join(directorio, almacen.segmentos()[0])
+    modificado = os.stat(ruta).st_mtime_ns
+
+    resultado = almacen.compactar()
+
+    assert resultado['registros'] == 2
+    assert resultado['bytes_despues'] == resultado['bytes_antes']
+    assert os.stat(ruta).st_mtime_ns == modificado
+
+
+def test_compactar_quita_la_linea_a_medias_de_un_unico_segmento(directorio):
+    os.makedirs(directorio)
+    escribir_segmento(directorio, '20250101-000000.jsonl', [(pelicula('A'), 'A')], resto=b'{"clave":"B"')
+    almacen = SnapshotStore(directorio)
+
+    resultado = almacen.compactar()
+
+    with open(os.path.join(directorio, '20250101-000000.jsonl'), 'rb') as f:
+        assert f.read().endswith(b'\n')
+    assert resultado['registros'] == 1
+    assert resultado['bytes_despues'] < resultado['bytes_antes']
+
+
+def test_compactar_respeta_los_segmentos_abiertos(directorio):
+    os.makedirs(directorio)
+    escribir_segmento(directorio, '20250101-000000.jsonl', [(pelicula('A', v=1), 'A')])
+    escribir_segmento(directorio, '20250102-000000.jsonl', [(pelicula('A', v=2), 'A')])
+    escribir_segmento(directorio, '20250103-000000.jsonl', [(pelicula('A', v=3), 'A')])
+    escribir_segmento(directorio, '20250104-000000.jsonl', [(pelicula('B'), 'B')])
+    # Un proceso vivo (este) tiene abierto el tercero; la marca del cuarto es huérfana
+    with open(os.path.join(directorio, '20250103-000000.jsonl' + EXTENSION_MARCA), 'w') as marca:
+        marca.write(str(os.getpid()))
+    with open(os.path.join(directorio, '20250104-000000.jsonl' + EXTENSION_MARCA), 'w') as marca:
+        marca.write('')
+    almacen = SnapshotStore(directorio)
+
+    assert almacen.segmentos_abiertos() == ['20250103-000000.jsonl']
+    assert not os.path.exists(os.path.join(directorio, '20250104-000000.jsonl' + EXTENSION_MARCA))
+
+    resultado = almacen.compactar()
+
+    assert resultado['segmentos'] == 2
+    assert almacen.segmentos() == ['20250102-000000.jsonl', '20250103-000000.jsonl', '20250104-000000.jsonl']
+    assert almacen.obtener('A')['v'] == 3
+    # Las versiones 1 y 2 estaban superadas por la del segmento abierto: el compactado queda vacío
+    assert list(almacen.leer_segmento('20250102-000000.jsonl')) == []
+
+
+def test_importar_json_guarda_los_campos_tipados(directorio, tmp_path):
+    origen = tmp_path / 'json'
+    origen.mkdir()
+    for fecha, duracion in (('20250101', '1h 30m'), ('20250201', '1h 48m')):
+        (origen / f"lilo_y_stitch_{fecha}.json").write_text(json.dumps({
+            'url': 'https://www.cinesa.es/peliculas/lilo-y-stitch/HO00002161/',
+            'titulo': 'Lilo y Stitch', 'duracion': duracion,
+            'fecha_estreno': '23 mayo 2025', 'clasificacion': 'Apta para todos los públicos',
+        }), encoding='utf-8')
+    (origen / 'roto_20250301.json').write_text('{', encoding='utf-8')
+    almacen = SnapshotStore(directorio)
+
+    assert importar_json(almacen, str(origen)) == {'ficheros': 3, 'importados': 2}
+    datos = almacen.obtener('HO00002161')
+    assert datos['duracion_minutos'] == 108
+    assert datos['estreno'] == '2025-05-23'
+    assert datos['clasificacion_codigo'] == 'tp'
+    almacen.cerrar()
+    assert os.path.exists(os.path.join(directorio, NOMBRE_INDICE))
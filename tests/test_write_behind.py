@@ -0,0 +1,87 @@
+"""Pruebas de la escritura diferida: lotes, fallos y cierre"""
+
+import threading
+
+import pytest
+
+from utils.write_behind import WriteBehindWriter
+
+
+class AlmacenFalso:
+    """Guarda los lotes recibidos; falla en los que contienen una clave dada"""
+
+    def __init__(self, falla_con=None, bloqueo=None):
+        self.lotes = []
+        self.falla_con = falla_con
+        self.bloqueo = bloqueo
+
+    def guardar_lote(self, lote):
+        if self.bloqueo:
+            self.bloqueo.wait()
+        if any(clave == self.falla_con for _, clave, _ in lote):
+            raise OSError("disco lleno")
+        self.lotes.append(list(lote))
+
+
+def test_cerrar_escribe_lo_que_queda_en_cola():
+    bloqueo = threading.Event()
+    almacen = AlmacenFalso(bloqueo=bloqueo)
+    escritor = WriteBehindWriter(almacen, capacidad=100, tamano_lote=4)
+
+    for n in range(10):
+        escritor.encolar({'id_pelicula': str(n)}, clave=str(n))
+    bloqueo.set()
+    escritor.cerrar()
+
+    claves = [clave for lote in almacen.lotes for _, clave, _ in lote]
+    assert claves == [str(n) for n in range(10)]
+    assert all(len(lote) <= 4 for lote in almacen.lotes)
+    assert escritor.escritos == 10
+    assert escritor.fallidos == 0
+
+
+def test_encolar_tras_cerrar_falla():
+    escritor = WriteBehindWriter(AlmacenFalso())
+    escritor.cerrar()
+    escritor.cerrar()
+
+    with pytest.raises(RuntimeError):
+        escritor.encolar({'id_pelicula': 'A'}, clave='A')
+
+
+def test_lote_fallido_anota_sus_claves():
+    escritor = WriteBehindWriter(AlmacenFalso(falla_con='B'), tamano_lote=1)
+
+    for clave in ('A', 'B', 'C'):
+        escritor.encolar({'id_pelicula': clave}, clave=clave)
+    escritor.cerrar()
+
+    assert escritor.claves_fallidas == {'B'}
+    assert escritor.fallidos == 1
+    assert escritor.escritos == 2
+
+
+def test_se_encola_una_copia_y_se_avisa_tras_escribir():
+    avisados = []
+    almacen = AlmacenFalso()
+    escritor = WriteBehindWriter(almacen, al_escribir=avisados.extend)
+
+    datos = {'id_pelicula': 'A', 'titulo': 'Uno'}
+    escritor.encolar(datos, clave='A')
+    datos['titulo'] = 'Cambiado'
+    escritor.cerrar()
+
+    assert almacen.lotes[0][0][0]['titulo'] == 'Uno'
+    assert [clave for _, clave, _ in avisados] == ['A']
+
+
+def test_error_en_al_escribir_no_cuenta_como_fallo():
+    def falla(lote):
+        raise ValueError("índice roto")
+
+    escritor = WriteBehindWriter(AlmacenFalso(), al_escribir=falla)
+    escritor.encolar({'id_pelicula': 'A'}, clave='A')
+    escritor.cerrar()
+
+    assert escritor.escritos == 1
+    assert not escritor.claves_fallidas
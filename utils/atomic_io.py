@@ -0,0 +1,23 @@
+"""
+Escritura atómica de ficheros
+
+El contenido se escribe en un temporal del mismo directorio y se renombra
+sobre el destino, de modo que un lector nunca ve un fichero a medias.
+"""
+
+import os
+import tempfile
+
+
+def escribir_atomico(ruta, contenido):
+    """Escribe un fichero completo a través de un temporal y un rename"""
+    directorio = os.path.dirname(ruta) or '.'
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.unlink(ruta_tmp)
+        raise
@@ -0,0 +1,150 @@
+"""
+Acceso compartido a PostgreSQL
+
+Un único ``ThreadedConnectionPool`` por proceso, construido a partir de la
+sección ``database`` de la configuración. Los comandos de gadget, los
+cargadores y los escritores del scraping piden conexiones prestadas al pool
+en lugar de abrir una nueva en cada operación. Cada conexión lleva fijado
+el ``statement_timeout`` y el nombre de aplicación.
+"""
+
+import contextlib
+import logging
+import threading
+
+import psycopg2
+from psycopg2 import pool
+
+logger = logging.getLogger("Database")
+
+
+def parametros_conexion(db_config, database=None):
+    """Parámetros de psycopg2.connect a partir de la sección ``database``"""
+    return {
+        'host': db_config.get("host", "localhost"),
+        'port': db_config.get("port", 5432),
+        'user': db_config.get("user", "postgres"),
+        'password': db_config.get("password", "postgres"),
+        'database': database or db_config.get("name", "cinedb"),
+    }
+
+
+class Database:
+    """Pool de conexiones a la base de datos de gadget"""
+
+    def __init__(self, db_config, minimo=1, maximo=8, statement_timeout=30, aplicacion="gadget"):
+        """
+        Args:
+            db_config: Sección ``database`` de la configuración
+            minimo: Conexiones que el pool mantiene abiertas
+            maximo: Conexiones simultáneas como máximo
+            statement_timeout: Segundos máximos por sentencia (0 = sin límite)
+            aplicacion: application_name con el que aparecen en pg_stat_activity
+        """
+        self.db_config = db_config
+        self.nombre = db_config.get("name", "cinedb")
+        self.minimo = minimo
+        self.maximo = maximo
+        self.statement_timeout = statement_timeout
+        self.aplicacion = aplicacion
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_config(cls, config):
+        """Crea el pool a partir de ``database`` (y su subsección opcional ``pool``)"""
+        db_config = (config or {}).get("database", {}) or {}
+        pool_config = db_config.get("pool", {}) or {}
+        return cls(
+            db_config,
+            minimo=int(pool_config.get("min", 1)),
+            maximo=int(pool_config.get("max", 8)),
+            statement_timeout=float(pool_config.get("statement_timeout", 30)),
+        )
+
+    def _opciones(self):
+        milisegundos = int(self.statement_timeout * 1000)
+        return f"-c statement_timeout={milisegundos}"
+
+    def _obtener_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = pool.ThreadedConnectionPool(
+                    self.minimo, self.maximo,
+                    options=self._opciones(),
+                    application_name=self.aplicacion,
+                    **parametros_conexion(self.db_config)
+                )
+            return self._pool
+
+    @contextlib.contextmanager
+    def conexion(self, autocommit=False):
+        """
+        Presta una conexión del pool
+
+        Con ``autocommit=False`` el bloque es una transacción: se confirma al
+        salir y se deshace si hay una excepción. La conexión vuelve al pool
+        en cualquier caso.
+        """
+        pool_conexiones = self._obtener_pool()
+        conn = pool_conexiones.getconn()
+        try:
+            conn.autocommit = autocommit
+            if autocommit:
+                yield conn
+            else:
+                with conn:
+                    yield conn
+        finally:
+            if not conn.closed:
+                if not conn.autocommit:
+                    conn.rollback()
+                conn.autocommit = False
+            pool_conexiones.putconn(conn, close=bool(conn.closed))
+
+    @contextlib.contextmanager
+    def cursor(self, autocommit=False):
+        """Cursor sobre una conexión prestada (ver ``conexion``)"""
+        with self.conexion(autocommit=autocommit) as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    @contextlib.contextmanager
+    def conexion_mantenimiento(self):
+        """
+        Conexión directa a la base de datos ``postgres``, fuera del pool
+
+        Para CREATE/DROP DATABASE, que no pueden ejecutarse dentro de una
+        transacción ni desde una conexión a la propia base de datos.
+        """
+        conn = psycopg2.connect(
+            application_name=self.aplicacion,
+            **parametros_conexion(self.db_config, database="postgres")
+        )
+        conn.autocommit = True
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def cerrar(self):
+        """Cierra todas las conexiones del pool (se vuelve a abrir si se usa otra vez)"""
+        with self._lock:
+            pool_conexiones, self._pool = self._pool, None
+        if pool_conexiones is not None:
+            pool_conexiones.closeall()
+
+
+# Pools abiertos en el proceso: nombre de la base de datos -> Database
+_bases_datos = {}
+_bases_datos_lock = threading.Lock()
+
+
+def configurar(config):
+    """Pool compartido del proceso para la base de datos de ``database``"""
+    nombre = ((config or {}).get("database", {}) or {}).get("name", "cinedb")
+    with _bases_datos_lock:
+        if nombre not in _bases_datos:
+            _bases_datos[nombre] = Database.desde_config(config)
+        return _bases_datos[nombre]
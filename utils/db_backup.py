@@ -0,0 +1,230 @@
+"""
+Backups y restauración de PostgreSQL
+
+Dos modos:
+
+    - ``sql``: la salida de ``pg_dump`` se comprime con gzip a medida que
+      llega por la tubería, sin fichero intermedio. El volcado se escribe en
+      un ``.partial`` que se renombra al terminar.
+    - ``directorio``: ``pg_dump -Fd -j N`` vuelca cada tabla en paralelo y
+      ya comprimida; se restaura con ``pg_restore -j N``.
+
+Ambos devuelven el tiempo total y los tamaños para calcular la compresión.
+
+``restaurar`` reconoce el formato de un backup y lo restaura con
+``pg_restore -j`` o, si es SQL, descomprimiéndolo en streaming hacia ``psql``.
+"""
+
+import gzip
+import logging
+import os
+import subprocess
+import tempfile
+import time
+
+logger = logging.getLogger("DbBackup")
+
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def entorno_pg(db_config):
+    """Entorno para las herramientas de PostgreSQL (la contraseña va en PGPASSWORD)"""
+    entorno = os.environ.copy()
+    entorno["PGPASSWORD"] = str(db_config.get("password", "postgres"))
+    return entorno
+
+
+def argumentos_conexion(db_config):
+    """Argumentos -h/-p/-U comunes a pg_dump, pg_restore y psql"""
+    return [
+        "-h", str(db_config.get("host", "localhost")),
+        "-p", str(db_config.get("port", 5432)),
+        "-U", str(db_config.get("user", "postgres")),
+    ]
+
+
+def _tamano_directorio(ruta):
+    total = 0
+    for raiz, _, ficheros in os.walk(ruta):
+        for nombre in ficheros:
+            total += os.path.getsize(os.path.join(raiz, nombre))
+    return total
+
+
+def volcar_comprimido(db_config, destino, nivel=6):
+    """
+    Volcado SQL comprimido en streaming
+
+    Args:
+        db_config: Sección ``database`` de la configuración
+        destino: Ruta del ``.sql.gz`` final
+        nivel: Nivel de compresión gzip (1-9)
+
+    Returns:
+        dict: {'ruta', 'segundos', 'bytes_originales', 'bytes_comprimidos'}
+    """
+    inicio = time.perf_counter()
+    temporal = f"{destino}.partial"
+    bytes_originales = 0
+
+    comando = ["pg_dump", *argumentos_conexion(db_config), "-d", db_config.get("name", "cinedb")]
+    # stderr a un fichero: si se llenara su tubería, pg_dump se bloquearía
+    with tempfile.TemporaryFile() as errores:
+        proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=errores, env=entorno_pg(db_config))
+        try:
+            with open(temporal, 'wb') as salida, \
+                    gzip.GzipFile(filename=os.path.basename(destino)[:-3], mode='wb',
+                                  fileobj=salida, compresslevel=nivel) as comprimido:
+                while True:
+                    bloque = proceso.stdout.read(TAMANO_BLOQUE)
+                    if not bloque:
+                        break
+                    bytes_originales += len(bloque)
+                    comprimido.write(bloque)
+            codigo = proceso.wait()
+        except BaseException:
+            proceso.kill()
+            proceso.wait()
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        finally:
+            proceso.stdout.close()
+
+        if codigo != 0:
+            os.remove(temporal)
+            errores.seek(0)
+            raise RuntimeError(f"pg_dump terminó con código {codigo}: {errores.read().decode(errors='replace').strip()}")
+
+    os.replace(temporal, destino)
+    return {
+        'ruta': destino,
+        'segundos': time.perf_counter() - inicio,
+        'bytes_originales': bytes_originales,
+        'bytes_comprimidos': os.path.getsize(destino),
+    }
+
+
+def volcar_directorio(db_config, destino, procesos=4, nivel=6, tamano_base_datos=None):
+    """
+    Volcado en formato directorio con varias tablas en paralelo
+
+    Args:
+        db_config: Sección ``database`` de la configuración
+        destino: Directorio del volcado (no debe existir)
+        procesos: Trabajos simultáneos de pg_dump (-j)
+        nivel: Nivel de compresión (-Z)
+        tamano_base_datos: Bytes de la base de datos (pg_database_size), como
+            referencia de compresión: en este formato pg_dump no expone el
+            tamaño sin comprimir
+
+    Returns:
+        dict: {'ruta', 'segundos', 'bytes_originales', 'bytes_comprimidos'}
+    """
+    inicio = time.perf_counter()
+    comando = [
+        "pg_dump", *argumentos_conexion(db_config),
+        "-d", db_config.get("name", "cinedb"),
+        "-Fd", "-j", str(procesos), "-Z", str(nivel),
+        "-f", str(destino),
+    ]
+    resultado = subprocess.run(comando, env=entorno_pg(db_config), capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(f"pg_dump terminó con código {resultado.returncode}: {resultado.stderr.strip()}")
+
+    return {
+        'ruta': str(destino),
+        'segundos': time.perf_counter() - inicio,
+        'bytes_originales': tamano_base_datos,
+        'bytes_comprimidos': _tamano_directorio(destino),
+    }
+
+
+def detectar_formato(ruta):
+    """
+    Formato de un backup: 'directorio', 'custom', 'sql.gz' o 'sql'
+
+    El formato directorio se reconoce por su ``toc.dat``; el custom y el
+    gzip, por sus primeros bytes.
+    """
+    if os.path.isdir(ruta):
+        if not os.path.exists(os.path.join(ruta, "toc.dat")):
+            raise ValueError(f"{ruta} no es un volcado en formato directorio (falta toc.dat)")
+        return 'directorio'
+    with open(ruta, 'rb') as f:
+        cabecera = f.read(5)
+    if cabecera == b'PGDMP':
+        return 'custom'
+    if cabecera[:2] == b'\x1f\x8b':
+        return 'sql.gz'
+    return 'sql'
+
+
+def _restaurar_pg_restore(db_config, ruta, base_datos, procesos):
+    comando = [
+        "pg_restore", *argumentos_conexion(db_config),
+        "-d", base_datos, "-j", str(procesos), "--exit-on-error", str(ruta),
+    ]
+    resultado = subprocess.run(comando, env=entorno_pg(db_config), capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(f"pg_restore terminó con código {resultado.returncode}: {resultado.stderr.strip()}")
+
+
+def _restaurar_psql(db_config, ruta, base_datos, comprimido):
+    comando = [
+        "psql", *argumentos_conexion(db_config),
+        "-d", base_datos, "-X", "-q", "-v", "ON_ERROR_STOP=1", "--single-transaction",
+    ]
+    abrir = gzip.open if comprimido else open
+    with tempfile.TemporaryFile() as errores:
+        proceso = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=errores, env=entorno_pg(db_config))
+        try:
+            with abrir(ruta, 'rb') as entrada:
+                while True:
+                    bloque = entrada.read(TAMANO_BLOQUE)
+                    if not bloque:
+                        break
+                    proceso.stdin.write(bloque)
+        except BrokenPipeError:
+            # psql se ha detenido en el primer error; el motivo está en stderr
+            pass
+        except BaseException:
+            proceso.kill()
+            raise
+        finally:
+            try:
+                proceso.stdin.close()
+            except BrokenPipeError:
+                pass
+            codigo = proceso.wait()
+
+        if codigo != 0:
+            errores.seek(0)
+            raise RuntimeError(f"psql terminó con código {codigo}: {errores.read().decode(errors='replace').strip()}")
+
+
+def restaurar(db_config, ruta, base_datos, procesos=4):
+    """
+    Restaura un backup en una base de datos vacía
+
+    Los formatos directorio y custom se restauran con ``pg_restore -j``; los
+    volcados SQL (comprimidos o no) se descomprimen en streaming hacia
+    ``psql`` en una sola transacción.
+
+    Args:
+        db_config: Sección ``database`` de la configuración
+        ruta: Fichero o directorio del backup
+        base_datos: Base de datos de destino (ya creada)
+        procesos: Trabajos simultáneos de pg_restore
+
+    Returns:
+        dict: {'formato', 'segundos'}
+    """
+    inicio = time.perf_counter()
+    formato = detectar_formato(ruta)
+    if formato in ('directorio', 'custom'):
+        _restaurar_pg_restore(db_config, ruta, base_datos, procesos)
+    else:
+        _restaurar_psql(db_config, ruta, base_datos, comprimido=(formato == 'sql.gz'))
+    return {'formato': formato, 'segundos': time.perf_counter() - inicio}
@@ -0,0 +1,220 @@
+"""
+Carga masiva de las películas del almacén de instantáneas en PostgreSQL
+
+Las películas de ``SnapshotStore`` se envían, ya normalizadas, a una tabla
+temporal con un único ``COPY FROM STDIN``. Desde ahí una fusión por
+conjuntos actualiza ``movie``, ``genre``, ``actor`` y sus tablas de
+relación, todo en una transacción. Si llegan varias versiones de una
+película gana la más reciente.
+
+Las sesiones de esa misma versión quedan en ``CatalogLoader.sesiones``,
+listas para ``SessionsWriter``.
+"""
+
+import csv
+import io
+import json
+import logging
+
+from utils.movie_normalizer import normalizar_pelicula, normalizar_sesiones
+from utils.poster_store import PosterStore
+
+logger = logging.getLogger("DbLoader")
+
+COLUMNAS_STAGING = (
+    'external_id', 'title', 'synopsis', 'duration', 'rating',
+    'release_date', 'photo_url', 'scraped_at', 'genres', 'actors',
+)
+
+SQL_STAGING = """
+CREATE TEMP TABLE stg_movie (
+    external_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    synopsis TEXT,
+    duration INT,
+    rating TEXT,
+    release_date DATE,
+    photo_url TEXT,
+    scraped_at TIMESTAMP,
+    genres JSONB NOT NULL,
+    actors JSONB NOT NULL
+) ON COMMIT DROP
+"""
+
+SQL_COPY = f"COPY stg_movie ({', '.join(COLUMNAS_STAGING)}) FROM STDIN WITH (FORMAT csv)"
+
+SQL_ULTIMAS = """
+CREATE TEMP TABLE stg_latest ON COMMIT DROP AS
+SELECT DISTINCT ON (external_id) *
+FROM stg_movie
+ORDER BY external_id, scraped_at DESC NULLS LAST
+"""
+
+SQL_FUSION_PELICULAS = """
+INSERT INTO movie (external_id, title, synopsis, duration, rating, release_date, photo_url)
+SELECT external_id, title, synopsis, COALESCE(duration, 0), rating, release_date, photo_url
+FROM stg_latest
+ON CONFLICT (external_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    synopsis = EXCLUDED.synopsis,
+    duration = EXCLUDED.duration,
+    rating = EXCLUDED.rating,
+    release_date = EXCLUDED.release_date,
+    photo_url = EXCLUDED.photo_url
+WHERE (movie.title, movie.synopsis, movie.duration, movie.rating, movie.release_date, movie.photo_url)
+    IS DISTINCT FROM
+    (EXCLUDED.title, EXCLUDED.synopsis, EXCLUDED.duration, EXCLUDED.rating, EXCLUDED.release_date, EXCLUDED.photo_url)
+RETURNING (xmax = 0) AS nueva
+"""
+
+# Géneros y actores nuevos, y relaciones de las películas cargadas reemplazadas por las actuales
+SQL_FUSION_RELACIONES = """
+INSERT INTO genre (name)
+SELECT DISTINCT g.name
+FROM stg_latest s CROSS JOIN jsonb_array_elements_text(s.genres) AS g(name)
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO actor (name)
+SELECT DISTINCT a.name
+FROM stg_latest s CROSS JOIN jsonb_array_elements_text(s.actors) AS a(name)
+WHERE NOT EXISTS (SELECT 1 FROM actor x WHERE x.name = a.name);
+
+DELETE FROM movie_genre mg
+USING movie m, stg_latest s
+WHERE mg.movie_id = m.id AND m.external_id = s.external_id;
+
+DELETE FROM movie_actor ma
+USING movie m, stg_latest s
+WHERE ma.movie_id = m.id AND m.external_id = s.external_id;
+
+INSERT INTO movie_genre (movie_id, genre_id)
+SELECT DISTINCT m.id, g.id
+FROM stg_latest s
+JOIN movie m ON m.external_id = s.external_id
+CROSS JOIN jsonb_array_elements_text(s.genres) AS n(name)
+JOIN genre g ON g.name = n.name
+ON CONFLICT DO NOTHING;
+
+INSERT INTO movie_actor (movie_id, actor_id)
+SELECT DISTINCT m.id, a.id
+FROM stg_latest s
+JOIN movie m ON m.external_id = s.external_id
+CROSS JOIN jsonb_array_elements_text(s.actors) AS n(name)
+JOIN actor a ON a.name = n.name
+ON CONFLICT DO NOTHING;
+"""
+
+
+def _con_poster_preferido(datos):
+    """Película con la ruta del póster optimizado si existe (las instantáneas antiguas guardan la del original)"""
+    rutas = {
+        campo: PosterStore.ruta_preferida(datos[campo])
+        for campo in ('poster_local', 'imagen_local') if isinstance(datos.get(campo), str)
+    }
+    return {**datos, **rutas} if rutas else datos
+
+
+class FlujoCSV(io.TextIOBase):
+    """Fichero de solo lectura que genera líneas CSV bajo demanda para COPY"""
+
+    def __init__(self, filas):
+        self._filas = iter(filas)
+        self._buffer = io.StringIO()
+        self._escritor = csv.writer(self._buffer, lineterminator='\n')
+        self._pendiente = ''
+
+    def readable(self):
+        return True
+
+    def read(self, tamano=-1):
+        while tamano < 0 or len(self._pendiente) < tamano:
+            fila = next(self._filas, None)
+            if fila is None:
+                break
+            self._escritor.writerow(fila)
+            self._pendiente += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if tamano < 0:
+            datos, self._pendiente = self._pendiente, ''
+        else:
+            datos, self._pendiente = self._pendiente[:tamano], self._pendiente[tamano:]
+        return datos
+
+
+class CatalogLoader:
+    """Carga las películas del almacén en las tablas del catálogo"""
+
+    def __init__(self, conn):
+        """
+        Args:
+            conn: Conexión psycopg2 (la carga se hace en una transacción propia)
+        """
+        self.conn = conn
+        self.registros = 0
+        self.descartados = 0
+        self.sesiones = {}
+        self._fechas_sesiones = {}
+
+    def _recoger_sesiones(self, pelicula, datos):
+        # Una lista vacía puede ser un fallo al obtener las sesiones: no se usa para borrar
+        if not datos.get('sesiones'):
+            return
+        external_id = pelicula['external_id']
+        fecha = pelicula['scraped_at']
+        if external_id in self._fechas_sesiones:
+            anterior = self._fechas_sesiones[external_id]
+            if fecha is None or (anterior is not None and anterior >= fecha):
+                return
+        self._fechas_sesiones[external_id] = fecha
+        self.sesiones[external_id] = normalizar_sesiones(datos['sesiones'], fecha.date() if fecha else None)
+
+    def _filas(self, peliculas):
+        for datos in peliculas:
+            pelicula = normalizar_pelicula(_con_poster_preferido(datos))
+            self.registros += 1
+            if pelicula is None:
+                self.descartados += 1
+                continue
+            self._recoger_sesiones(pelicula, datos)
+            yield [
+                pelicula['external_id'], pelicula['title'], pelicula['synopsis'],
+                pelicula['duration'], pelicula['rating'], pelicula['release_date'],
+                pelicula['photo_url'], pelicula['scraped_at'],
+                json.dumps(pelicula['genres'], ensure_ascii=False),
+                json.dumps(pelicula['actors'], ensure_ascii=False),
+            ]
+
+    def cargar(self, almacen, desde=None):
+        """
+        Carga la última versión de cada película del almacén
+
+        Args:
+            almacen: SnapshotStore con las películas
+            desde: Fecha 'AAAAMMDD' mínima de los segmentos a leer
+
+        Returns:
+            dict: {'registros', 'descartados', 'peliculas', 'nuevas', 'actualizadas'}
+        """
+        self.registros = self.descartados = 0
+        self.sesiones = {}
+        self._fechas_sesiones = {}
+
+        with self.conn:
+            with self.conn.cursor() as cursor:
+                cursor.execute(SQL_STAGING)
+                cursor.copy_expert(SQL_COPY, FlujoCSV(self._filas(almacen.ultimas(desde=desde))))
+                cursor.execute(SQL_ULTIMAS)
+                peliculas = cursor.rowcount
+                cursor.execute(SQL_FUSION_PELICULAS)
+                cambios = [fila[0] for fila in cursor.fetchall()]
+                cursor.execute(SQL_FUSION_RELACIONES)
+
+        nuevas = sum(1 for nueva in cambios if nueva)
+        return {
+            'registros': self.registros,
+            'descartados': self.descartados,
+            'peliculas': peliculas,
+            'nuevas': nuevas,
+            'actualizadas': len(cambios) - nuevas,
+        }
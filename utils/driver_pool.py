@@ -0,0 +1,167 @@
+"""
+Pool de navegadores (WebDriver) para el scraper de Cinesa
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("DriverPool")
+
+# Aviso en la cola de libres: se descartó un navegador y hay hueco para crear otro
+_HUECO = object()
+
+
+class DriverPool:
+    """Pool acotado de sesiones de Chrome independientes
+
+    Cada hilo de trabajo obtiene su propio navegador del pool, lo usa en
+    exclusiva y lo devuelve al terminar. Los navegadores se crean bajo
+    demanda hasta alcanzar el tamaño máximo, se comprueban antes de cada
+    préstamo y se cierran todos juntos con ``cerrar()``.
+    """
+
+    def __init__(self, crear_driver, tamano=1, timeout=300, max_intentos=3):
+        """
+        Inicializar el pool
+
+        Args:
+            crear_driver: Función sin argumentos que devuelve un WebDriver nuevo
+            tamano: Número máximo de navegadores abiertos a la vez
+            timeout: Segundos máximos de espera por un navegador libre
+            max_intentos: Navegadores sin respuesta seguidos que se reemplazan antes de rendirse
+        """
+        self.crear_driver = crear_driver
+        self.tamano = max(1, int(tamano))
+        self.timeout = timeout
+        self.max_intentos = max(1, int(max_intentos))
+
+        self._libres = queue.LifoQueue()
+        self._drivers = set()
+        self._reservados = 0
+        self._lock = threading.Lock()
+        self._cerrado = False
+
+    def iniciar(self, cantidad=None):
+        """Arranca por adelantado ``cantidad`` navegadores (por defecto, todos)"""
+        cantidad = self.tamano if cantidad is None else min(cantidad, self.tamano)
+        for _ in range(cantidad):
+            driver = self._crear()
+            if driver is None:
+                break
+            self._libres.put(driver)
+        logger.info(f"Pool de navegadores iniciado con {len(self._drivers)} de {self.tamano} sesiones")
+
+    def _crear(self):
+        """Crea un navegador si queda hueco en el pool; devuelve None si está lleno"""
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("El pool de navegadores está cerrado")
+            if len(self._drivers) + self._reservados >= self.tamano:
+                return None
+            self._reservados += 1
+
+        # Arrancar Chrome fuera del bloqueo: tarda varios segundos
+        try:
+            driver = self.crear_driver()
+        except Exception:
+            with self._lock:
+                self._reservados -= 1
+            raise
+
+        with self._lock:
+            self._reservados -= 1
+            self._drivers.add(driver)
+        logger.info(f"Navegador creado ({len(self._drivers)}/{self.tamano})")
+        return driver
+
+    @staticmethod
+    def _esta_sano(driver):
+        """Comprueba que la sesión de WebDriver sigue respondiendo"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _descartar(self, driver):
+        """Cierra un navegador y libera su hueco en el pool, despertando a quien espere uno"""
+        with self._lock:
+            self._drivers.discard(driver)
+            cerrado = self._cerrado
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error al cerrar navegador descartado: {e}")
+        if not cerrado:
+            self._libres.put(_HUECO)
+
+    def _siguiente(self, limite):
+        """Un navegador libre o recién creado, esperando como mucho hasta ``limite``"""
+        while True:
+            try:
+                driver = self._libres.get_nowait()
+            except queue.Empty:
+                driver = self._crear()
+                if driver is None:
+                    try:
+                        driver = self._libres.get(timeout=max(0.0, limite - time.monotonic()))
+                    except queue.Empty:
+                        raise TimeoutError("No hay navegadores libres en el pool")
+            if driver is not _HUECO:
+                return driver
+            # Hueco de un navegador descartado: se crea otro si nadie lo ha ocupado ya
+            driver = self._crear()
+            if driver is not None:
+                return driver
+
+    def adquirir(self):
+        """
+        Obtiene un navegador en exclusiva, creándolo si hace falta
+
+        Raises:
+            TimeoutError: Si no queda ningún navegador libre en ``timeout`` segundos
+            RuntimeError: Si ``max_intentos`` navegadores seguidos no responden
+        """
+        limite = time.monotonic() + self.timeout
+        for _ in range(self.max_intentos):
+            driver = self._siguiente(limite)
+            if self._esta_sano(driver):
+                return driver
+            logger.warning("Navegador sin respuesta, se reemplaza por uno nuevo")
+            self._descartar(driver)
+        raise RuntimeError(f"Ningún navegador del pool respondió en {self.max_intentos} intentos")
+
+    def liberar(self, driver):
+        """Devuelve un navegador al pool"""
+        if self._cerrado:
+            self._descartar(driver)
+            return
+        self._libres.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """Context manager que presta un navegador y lo devuelve al salir"""
+        driver = self.adquirir()
+        try:
+            yield driver
+        finally:
+            self.liberar(driver)
+
+    def cerrar(self):
+        """Cierra todos los navegadores del pool"""
+        with self._lock:
+            self._cerrado = True
+            drivers = list(self._drivers)
+            self._drivers.clear()
+
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.debug(f"Error al cerrar navegador: {e}")
+
+        if drivers:
+            logger.info(f"Pool de navegadores cerrado ({len(drivers)} sesiones)")
@@ -0,0 +1,223 @@
+"""
+Caché HTTP persistente con peticiones condicionales
+
+Guarda por URL el cuerpo de la última respuesta junto con sus validadores
+(``ETag`` y ``Last-Modified``). En la siguiente petición se envían
+``If-None-Match``/``If-Modified-Since`` y, si el servidor contesta 304,
+se sirve el cuerpo guardado como si fuera una respuesta 200 normal.
+
+La misma caché la comparten la sesión de requests del scraper, la del
+extractor de películas y el descargador asíncrono de imágenes.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger("HttpCache")
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+RUTA_POR_DEFECTO = os.path.join(DIRECTORIO_DATOS, 'cache', 'http_cache.sqlite')
+
+
+class ConditionalCache:
+    """Almacén SQLite de cuerpos y validadores HTTP, con estadísticas de uso"""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        """
+        Args:
+            ruta: Fichero SQLite de la caché
+        """
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entradas (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                cuerpo BLOB NOT NULL,
+                actualizado REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self.peticiones = 0
+        self.aciertos = 0
+        self.bytes_ahorrados = 0
+        self.bytes_descargados = 0
+
+    def obtener(self, url):
+        """
+        Entrada guardada para una URL
+
+        Returns:
+            dict con etag, last_modified, content_type y cuerpo, o None
+        """
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT etag, last_modified, content_type, cuerpo FROM entradas WHERE url = ?", (url,)
+            ).fetchone()
+        if not fila:
+            return None
+        return {'etag': fila[0], 'last_modified': fila[1], 'content_type': fila[2], 'cuerpo': fila[3]}
+
+    @staticmethod
+    def cabeceras_condicionales(entrada):
+        """Cabeceras If-None-Match/If-Modified-Since para una entrada guardada"""
+        cabeceras = {}
+        if entrada and entrada['etag']:
+            cabeceras['If-None-Match'] = entrada['etag']
+        if entrada and entrada['last_modified']:
+            cabeceras['If-Modified-Since'] = entrada['last_modified']
+        return cabeceras
+
+    def guardar(self, url, cabeceras, cuerpo):
+        """Guarda una respuesta 200 si trae algún validador"""
+        etag = cabeceras.get('ETag')
+        last_modified = cabeceras.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entradas (url, etag, last_modified, content_type, cuerpo, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, cabeceras.get('Content-Type'), sqlite3.Binary(cuerpo), time.time())
+            )
+            self._conn.commit()
+        return True
+
+    def registrar(self, acierto, tamano):
+        """Anota una petición en las estadísticas (acierto = respuesta 304)"""
+        with self._lock:
+            self.peticiones += 1
+            if acierto:
+                self.aciertos += 1
+                self.bytes_ahorrados += tamano
+            else:
+                self.bytes_descargados += tamano
+
+    def resumen(self):
+        """Estadísticas de la ejecución actual"""
+        with self._lock:
+            return {
+                'peticiones': self.peticiones,
+                'aciertos': self.aciertos,
+                'tasa_aciertos': self.aciertos / self.peticiones if self.peticiones else 0.0,
+                'bytes_ahorrados': self.bytes_ahorrados,
+                'bytes_descargados': self.bytes_descargados,
+            }
+
+    def log_resumen(self):
+        """Escribe en el log la tasa de aciertos y los bytes ahorrados"""
+        resumen = self.resumen()
+        if not resumen['peticiones']:
+            return
+        logger.info(
+            f"Caché HTTP: {resumen['aciertos']}/{resumen['peticiones']} respuestas 304 "
+            f"({resumen['tasa_aciertos']:.0%}), {resumen['bytes_ahorrados'] / 1024:.1f} KB ahorrados, "
+            f"{resumen['bytes_descargados'] / 1024:.1f} KB descargados"
+        )
+
+    def cerrar(self):
+        """Cierra la conexión SQLite"""
+        with self._lock:
+            self._conn.close()
+
+
+# Cachés abiertas en el proceso: ruta -> ConditionalCache
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def configurar(config):
+    """
+    Caché compartida del proceso según ``scraper.http_cache`` (la ruta es
+    relativa a data/, como el resto de rutas de almacenamiento)
+
+    Returns:
+        ConditionalCache, o None si la caché está desactivada
+    """
+    cache_config = (config or {}).get('scraper', {}).get('http_cache', {}) or {}
+    if not cache_config.get('enabled', True):
+        return None
+    ruta = os.path.join(DIRECTORIO_DATOS, cache_config.get('ruta') or RUTA_POR_DEFECTO)
+    with _caches_lock:
+        if ruta not in _caches:
+            _caches[ruta] = ConditionalCache(ruta)
+        return _caches[ruta]
+
+
+class CachingAdapter(BaseAdapter):
+    """Adaptador de requests que añade peticiones condicionales sobre otro adaptador"""
+
+    def __init__(self, cache, adaptador):
+        """
+        Args:
+            cache: ConditionalCache compartida
+            adaptador: Adaptador que hace la petición real (p. ej. RateLimitedAdapter)
+        """
+        super().__init__()
+        self.cache = cache
+        self.adaptador = adaptador
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return self.adaptador.send(request, **kwargs)
+
+        entrada = self.cache.obtener(request.url)
+        request.headers.update(self.cache.cabeceras_condicionales(entrada))
+        respuesta = self.adaptador.send(request, **kwargs)
+
+        if respuesta.status_code == 304 and entrada:
+            self.cache.registrar(True, len(entrada['cuerpo']))
+            # El 304 no se lee nunca: cerrarlo devuelve la conexión al pool de urllib3
+            respuesta.close()
+            return _respuesta_desde_cache(request, respuesta, entrada)
+
+        if respuesta.status_code == 200:
+            self.cache.guardar(request.url, respuesta.headers, respuesta.content)
+            self.cache.registrar(False, len(respuesta.content))
+        return respuesta
+
+    def close(self):
+        self.adaptador.close()
+
+
+def _respuesta_desde_cache(request, respuesta_304, entrada):
+    """Construye una respuesta 200 con el cuerpo guardado"""
+    respuesta = requests.Response()
+    respuesta.status_code = 200
+    respuesta.reason = 'OK'
+    respuesta.url = request.url
+    respuesta.request = request
+    respuesta.headers = CaseInsensitiveDict(respuesta_304.headers)
+    if entrada['content_type']:
+        respuesta.headers['Content-Type'] = entrada['content_type']
+    respuesta.headers.pop('Content-Length', None)
+    respuesta.encoding = get_encoding_from_headers(respuesta.headers)
+    respuesta._content = entrada['cuerpo']
+    respuesta.elapsed = respuesta_304.elapsed
+    respuesta.connection = respuesta_304.connection
+    respuesta.from_cache = True
+    return respuesta
+
+
+def montar_en_sesion(session, cache):
+    """Envuelve los adaptadores http/https de la sesión con la caché condicional"""
+    if cache is None:
+        return session
+    for prefijo in ('http://', 'https://'):
+        session.mount(prefijo, CachingAdapter(cache, session.get_adapter(prefijo)))
+    return session
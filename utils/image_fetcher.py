@@ -0,0 +1,172 @@
+"""
+Descarga asíncrona de imágenes con concurrencia acotada
+
+Un bucle de asyncio en un hilo propio descarga los pósters mientras los
+hilos de scraping siguen trabajando. Usa un único cliente httpx con
+keep-alive, HTTP/2 si está disponible y un límite de conexiones por host.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+import urllib.parse
+
+import httpx
+
+from utils import rate_limiter
+
+logger = logging.getLogger("ImageFetcher")
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIBLE = True
+except ImportError:
+    HTTP2_DISPONIBLE = False
+
+
+class AsyncImageFetcher:
+    """Cola de descargas de imágenes atendida por un bucle de asyncio en segundo plano"""
+
+    def __init__(self, headers=None, max_por_host=4, max_total=16, timeout=10, cache=None):
+        """
+        Inicializar el descargador y arrancar su bucle de eventos
+
+        Args:
+            headers: Cabeceras HTTP comunes a todas las descargas
+            max_por_host: Descargas simultáneas máximas contra un mismo host
+            max_total: Conexiones abiertas máximas en total
+            timeout: Timeout de cada descarga en segundos
+            cache: ConditionalCache para pedir con If-None-Match/If-Modified-Since (opcional)
+        """
+        self.headers = dict(headers or {})
+        self.max_por_host = max_por_host
+        self.max_total = max_total
+        self.timeout = timeout
+        self.cache = cache
+
+        self._semaforos = {}
+        self._pendientes = set()
+        self._pendientes_lock = threading.Lock()
+
+        self.descargadas = 0
+        self.fallidas = 0
+        self.bytes_descargados = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._loop.run_forever, name="ImageFetcher", daemon=True)
+        self._hilo.start()
+        self._cliente = self._ejecutar(self._crear_cliente()).result()
+
+    def _ejecutar(self, corutina):
+        return asyncio.run_coroutine_threadsafe(corutina, self._loop)
+
+    async def _crear_cliente(self):
+        return httpx.AsyncClient(
+            headers=self.headers,
+            http2=HTTP2_DISPONIBLE,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_total,
+                max_keepalive_connections=self.max_total,
+                keepalive_expiry=30,
+            ),
+        )
+
+    def _semaforo(self, url):
+        # Solo se llama desde el bucle de eventos
+        host = urllib.parse.urlparse(url).hostname or ''
+        if host not in self._semaforos:
+            self._semaforos[host] = asyncio.Semaphore(self.max_por_host)
+        return self._semaforos[host]
+
+    async def _descargar(self, url, guardar):
+        loop = asyncio.get_running_loop()
+        limitador = rate_limiter.limitador_para_url(url)
+        entrada = self.cache.obtener(url) if self.cache else None
+
+        async with self._semaforo(url):
+            if limitador:
+                await loop.run_in_executor(None, limitador.adquirir)
+            inicio = time.monotonic()
+            try:
+                respuesta = await self._cliente.get(url, headers=self.cache.cabeceras_condicionales(entrada) if self.cache else None)
+            except httpx.HTTPError:
+                if limitador:
+                    limitador.registrar(error=True)
+                raise
+            if limitador:
+                limitador.registrar(status=respuesta.status_code, latencia=time.monotonic() - inicio)
+
+            if respuesta.status_code == 304 and entrada:
+                contenido = entrada['cuerpo']
+                self.cache.registrar(True, len(contenido))
+            else:
+                respuesta.raise_for_status()
+                contenido = respuesta.content
+                if self.cache:
+                    await loop.run_in_executor(None, self.cache.guardar, url, respuesta.headers, contenido)
+                    self.cache.registrar(False, len(contenido))
+
+        # Guardar fuera del bucle para no bloquear otras descargas
+        ruta = await loop.run_in_executor(None, guardar, contenido)
+        return ruta, len(contenido)
+
+    async def _tarea(self, url, guardar):
+        try:
+            ruta, tamano = await self._descargar(url, guardar)
+            self.descargadas += 1
+            self.bytes_descargados += tamano
+            logger.info(f"Imagen descargada: {url}")
+            return ruta
+        except Exception as e:
+            self.fallidas += 1
+            logger.error(f"Error al descargar imagen {url}: {e}")
+            return None
+
+    def encolar(self, url, guardar):
+        """
+        Añade una descarga a la cola sin esperar a que termine
+
+        Args:
+            url: URL de la imagen
+            guardar: Función que recibe los bytes descargados y devuelve la
+                ruta local donde quedaron (se ejecuta fuera del bucle)
+
+        Returns:
+            concurrent.futures.Future que se resuelve con la ruta local, o None si falla
+        """
+        futuro = self._ejecutar(self._tarea(url, guardar))
+        with self._pendientes_lock:
+            self._pendientes.add(futuro)
+        futuro.add_done_callback(self._descartar_pendiente)
+        return futuro
+
+    def _descartar_pendiente(self, futuro):
+        with self._pendientes_lock:
+            self._pendientes.discard(futuro)
+
+    def esperar(self, timeout=None):
+        """Espera a que terminen todas las descargas encoladas"""
+        with self._pendientes_lock:
+            pendientes = list(self._pendientes)
+        if pendientes:
+            logger.info(f"Esperando a {len(pendientes)} descargas de imágenes pendientes...")
+            concurrent.futures.wait(pendientes, timeout=timeout)
+
+    def cerrar(self):
+        """Espera las descargas pendientes, cierra el cliente y detiene el bucle"""
+        if not self._loop.is_running():
+            return
+        self.esperar()
+        self._ejecutar(self._cliente.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join()
+        self._loop.close()
+        logger.info(
+            f"Imágenes: {self.descargadas} descargadas, {self.fallidas} fallidas, "
+            f"{self.bytes_descargados / 1024:.1f} KB"
+        )
+
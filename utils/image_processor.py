@@ -0,0 +1,188 @@
+"""
+Optimización de imágenes en un pool de procesos
+
+La recompresión de los pósters (y la generación de sus variantes reducidas)
+es trabajo de CPU que, hecho en los hilos de scraping, retiene el GIL. Aquí
+se hace en procesos aparte: cada imagen se decodifica una sola vez desde los
+bytes ya descargados y en la misma pasada se escriben, de forma atómica, la
+versión optimizada, una miniatura JPEG y una copia WebP.
+
+El original no se modifica nunca: su nombre es el hash de sus bytes y el
+almacén de pósters depende de ello para deduplicar. Cada variante va a su
+lado con un sufijo (``poster_store.SUFIJOS``) y las películas guardan la
+optimizada (``PosterStore.ruta_preferida``).
+"""
+
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from utils.atomic_io import escribir_atomico
+from utils.poster_store import ruta_variante
+
+logger = logging.getLogger("ImageProcessor")
+
+FORMATOS_PIL = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
+def _codificar(imagen, formato, **opciones):
+    salida = BytesIO()
+    imagen.save(salida, formato, **opciones)
+    return salida.getvalue()
+
+
+def procesar_imagen(contenido, ruta, miniatura=(300, 450), calidad=85, webp=True):
+    """
+    Optimiza una imagen y genera sus variantes (se ejecuta en un proceso del pool)
+
+    Args:
+        contenido: Bytes originales de la imagen
+        ruta: Ruta de la imagen en el almacén (no se modifica); las variantes se escriben a su lado
+        miniatura: Tamaño máximo (ancho, alto) de la miniatura, o None
+        calidad: Calidad JPEG/WebP
+        webp: Generar también una copia WebP
+
+    Returns:
+        dict: {'bytes_originales', 'bytes_optimizados', 'variantes': {nombre: ruta}}
+    """
+    formato = FORMATOS_PIL.get(os.path.splitext(ruta)[1].lower(), 'JPEG')
+
+    imagen = Image.open(BytesIO(contenido))
+    imagen.load()
+    if formato == 'JPEG' and imagen.mode not in ('RGB', 'L'):
+        imagen = imagen.convert('RGB')
+
+    # La versión optimizada solo se guarda si ocupa menos que el original
+    variantes = {}
+    if formato == 'PNG':
+        optimizada = _codificar(imagen, formato, optimize=True)
+    else:
+        optimizada = _codificar(imagen, formato, optimize=True, quality=calidad)
+    if len(optimizada) < len(contenido):
+        variantes['optimizada'] = ruta_variante(ruta, 'optimizada')
+        escribir_atomico(variantes['optimizada'], optimizada)
+    else:
+        optimizada = contenido
+
+    if miniatura:
+        reducida = imagen.convert('RGB')
+        reducida.thumbnail(tuple(miniatura))
+        variantes['miniatura'] = ruta_variante(ruta, 'miniatura')
+        escribir_atomico(variantes['miniatura'], _codificar(reducida, 'JPEG', optimize=True, quality=calidad))
+    if webp:
+        variantes['webp'] = ruta_variante(ruta, 'webp')
+        escribir_atomico(variantes['webp'], _codificar(imagen, 'WEBP', quality=calidad, method=4))
+
+    return {
+        'bytes_originales': len(contenido),
+        'bytes_optimizados': len(optimizada),
+        'variantes': variantes,
+    }
+
+
+class ImageProcessor:
+    """Cola de optimización de imágenes atendida por un pool de procesos"""
+
+    def __init__(self, procesos=None, miniatura=(300, 450), calidad=85, webp=True):
+        """
+        Args:
+            procesos: Procesos del pool (por defecto, la mitad de los núcleos)
+            miniatura: Tamaño máximo (ancho, alto) de la miniatura, o None
+            calidad: Calidad JPEG/WebP
+            webp: Generar también una copia WebP
+        """
+        self.procesos = procesos or max(1, (os.cpu_count() or 2) // 2)
+        self.opciones = {'miniatura': miniatura, 'calidad': calidad, 'webp': webp}
+
+        self._executor = None
+        self._pendientes = {}
+        self._lock = threading.Lock()
+
+        self.procesadas = 0
+        self.fallidas = 0
+        self.bytes_ahorrados = 0
+
+    @classmethod
+    def desde_config(cls, config):
+        """Crea el procesador a partir de la sección ``scraper.imagenes``"""
+        imagenes = (config or {}).get('scraper', {}).get('imagenes', {}) or {}
+        return cls(
+            procesos=imagenes.get('procesos'),
+            miniatura=imagenes.get('miniatura', (300, 450)),
+            calidad=int(imagenes.get('calidad', 85)),
+            webp=imagenes.get('webp', True),
+        )
+
+    def _pool(self):
+        # Llamar con el lock adquirido. 'spawn' porque el proceso ya tiene hilos en marcha
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.procesos, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def encolar(self, contenido, ruta, al_terminar=None):
+        """
+        Encola la optimización de una imagen ya guardada en ``ruta``
+
+        Args:
+            contenido: Bytes originales (se decodifican en el proceso, sin releer el fichero)
+            ruta: Ruta de la imagen
+            al_terminar: Función opcional que recibe (ruta, resultado) si todo fue bien
+
+        Returns:
+            concurrent.futures.Future con el resultado de procesar_imagen; si la
+            ruta ya estaba en cola se devuelve el mismo Future
+        """
+        with self._lock:
+            if ruta in self._pendientes:
+                return self._pendientes[ruta]
+            futuro = self._pool().submit(procesar_imagen, contenido, ruta, **self.opciones)
+            self._pendientes[ruta] = futuro
+        futuro.add_done_callback(lambda f: self._terminada(ruta, f, al_terminar))
+        return futuro
+
+    def esperar(self, ruta, timeout=None):
+        """Espera a que termine la optimización de ``ruta`` si está en cola"""
+        with self._lock:
+            futuro = self._pendientes.get(ruta)
+        if futuro is None:
+            return
+        try:
+            futuro.result(timeout=timeout)
+        except Exception:
+            # El fallo ya se registra en _terminada; se sigue con el original
+            pass
+
+    def _terminada(self, ruta, futuro, al_terminar):
+        with self._lock:
+            self._pendientes.pop(ruta, None)
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            with self._lock:
+                self.fallidas += 1
+            logger.warning(f"No se pudo optimizar la imagen {ruta}: {e}")
+            return
+        with self._lock:
+            self.procesadas += 1
+            self.bytes_ahorrados += resultado['bytes_originales'] - resultado['bytes_optimizados']
+        if al_terminar:
+            al_terminar(ruta, resultado)
+
+    def cerrar(self):
+        """Espera a las imágenes en cola y detiene el pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=True)
+        logger.info(
+            f"Imágenes optimizadas: {self.procesadas} ({self.fallidas} fallidas), "
+            f"{self.bytes_ahorrados / 1024:.1f} KB ahorrados"
+        )
@@ -0,0 +1,186 @@
+"""
+Índice invertido en memoria de las películas del almacén
+
+Se construye una vez a partir de la última versión de cada película del
+``SnapshotStore`` con un índice por género, actor, director, clasificación,
+mes y año de estreno y palabra del título. Las consultas son intersecciones
+de conjuntos de posiciones, empezando por el más pequeño.
+
+El índice se guarda en un fichero binario (pickle) junto a los segmentos y
+se reutiliza mientras los segmentos no cambien: su huella es el nombre y el
+tamaño de cada uno.
+"""
+
+import bisect
+import logging
+import os
+import pickle
+import re
+import time
+from datetime import date
+
+from utils.atomic_io import escribir_atomico
+from utils.movie_normalizer import MESES, campos_tipados, codigo_clasificacion, normalizar_lista, normalizar_termino
+
+logger = logging.getLogger("MovieIndex")
+
+NOMBRE_CACHE = "indice_peliculas.pickle"
+# Cambiar al modificar la estructura del índice para invalidar las cachés
+VERSION_FORMATO = 2
+
+CAMPOS_LISTA = {'genero': 'generos', 'actor': 'actores', 'director': 'directores'}
+PATRON_PALABRA = re.compile(r'\w+')
+
+
+def numero_mes(valor):
+    """Mes como número a partir de '6', '06' o 'junio'; None si no se reconoce"""
+    if valor is None:
+        return None
+    termino = normalizar_termino(valor)
+    if termino.isdigit():
+        return int(termino) if 1 <= int(termino) <= 12 else None
+    return MESES.get(termino)
+
+
+def _como_lista(valor):
+    if valor is None:
+        return []
+    return [valor] if isinstance(valor, (str, int)) else list(valor)
+
+
+class MovieIndex:
+    """Películas del almacén con índices invertidos para consultas conjuntivas"""
+
+    def __init__(self, peliculas, huella=None):
+        """
+        Args:
+            peliculas: Iterable de dicts tal como los guarda el scraper
+            huella: Huella de los segmentos de los que salen (para la caché)
+        """
+        self.huella = huella
+        self.peliculas = []
+        self.indices = {campo: {} for campo in ('genero', 'actor', 'director', 'clasificacion', 'mes', 'anio', 'titulo')}
+        # (fecha ISO, posición) ordenado, para rangos de fechas de estreno
+        self.fechas = []
+
+        for datos in peliculas:
+            self._agregar(datos)
+        self.fechas.sort()
+
+    def _indexar(self, campo, termino, posicion):
+        if termino not in (None, ''):
+            self.indices[campo].setdefault(termino, set()).add(posicion)
+
+    def _agregar(self, datos):
+        posicion = len(self.peliculas)
+        tipados = campos_tipados(datos)
+        estreno = date.fromisoformat(tipados['estreno']) if tipados['estreno'] else None
+        pelicula = {
+            'titulo': datos.get('titulo'),
+            'url': datos.get('url'),
+            'fecha_estreno': tipados['estreno'],
+            'duracion': tipados['duracion_minutos'],
+            'clasificacion': datos.get('clasificacion'),
+        }
+        for campo, clave in CAMPOS_LISTA.items():
+            # Dirección y reparto llegan como texto separado por comas: se separan
+            # igual que en la búsqueda de texto completo y en la carga
+            valores = normalizar_lista(datos.get(clave))
+            pelicula[clave] = valores
+            for valor in valores:
+                self._indexar(campo, normalizar_termino(valor), posicion)
+        self.peliculas.append(pelicula)
+
+        self._indexar('clasificacion', tipados['clasificacion_codigo'], posicion)
+        for palabra in PATRON_PALABRA.findall(normalizar_termino(datos.get('titulo') or '')):
+            self._indexar('titulo', palabra, posicion)
+        if estreno:
+            self._indexar('mes', estreno.month, posicion)
+            self._indexar('anio', estreno.year, posicion)
+            self.fechas.append((tipados['estreno'], posicion))
+
+    # --- Carga y caché ---
+
+    @staticmethod
+    def huella_almacen(almacen):
+        """Nombre y tamaño de cada segmento: cambia en cuanto se escribe o se compacta"""
+        return tuple(sorted(almacen.version().items()))
+
+    @classmethod
+    def cargar(cls, almacen, usar_cache=True):
+        """
+        Índice de la última versión de cada película del almacén
+
+        Si hay una caché con la misma huella que los segmentos actuales se
+        carga de ella; si no, se construye y se guarda.
+        """
+        huella = cls.huella_almacen(almacen)
+        ruta = os.path.join(almacen.directorio, NOMBRE_CACHE)
+        if usar_cache and os.path.exists(ruta):
+            try:
+                with open(ruta, 'rb') as f:
+                    version, huella_cache, indice = pickle.load(f)
+                if version == VERSION_FORMATO and huella_cache == huella:
+                    return indice
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError) as e:
+                logger.warning(f"No se pudo leer la caché del índice: {e}")
+
+        inicio = time.perf_counter()
+        indice = cls(almacen.ultimas(), huella=huella)
+        logger.info(f"Índice de {len(indice.peliculas)} películas construido en {time.perf_counter() - inicio:.3f} s")
+        if usar_cache:
+            escribir_atomico(ruta, pickle.dumps((VERSION_FORMATO, huella, indice), protocol=pickle.HIGHEST_PROTOCOL))
+        return indice
+
+    # --- Consultas ---
+
+    def _conjuntos(self, campo, valores, normalizar):
+        conjuntos = []
+        for valor in _como_lista(valores):
+            termino = normalizar(valor)
+            conjuntos.append(self.indices[campo].get(termino, set()))
+        return conjuntos
+
+    def _rango_fechas(self, desde, hasta):
+        inicio = bisect.bisect_left(self.fechas, (desde.isoformat(),)) if desde else 0
+        fin = bisect.bisect_right(self.fechas, (hasta.isoformat(), float('inf'))) if hasta else len(self.fechas)
+        return {posicion for _, posicion in self.fechas[inicio:fin]}
+
+    def consultar(self, genero=None, actor=None, director=None, clasificacion=None,
+                  mes=None, anio=None, desde=None, hasta=None, titulo=None):
+        """
+        Películas que cumplen todos los filtros indicados
+
+        Cada filtro admite un valor o una lista de valores (todos deben
+        cumplirse). Los nombres se comparan sin distinguir mayúsculas ni
+        tildes; ``titulo`` exige todas sus palabras; ``desde``/``hasta`` son
+        fechas (date) de estreno incluidas.
+
+        Returns:
+            list: dicts de película ordenados por fecha de estreno y título
+        """
+        conjuntos = []
+        for campo, valores in (('genero', genero), ('actor', actor), ('director', director)):
+            conjuntos += self._conjuntos(campo, valores, normalizar_termino)
+        conjuntos += self._conjuntos('clasificacion', clasificacion, codigo_clasificacion)
+        conjuntos += self._conjuntos('mes', mes, numero_mes)
+        conjuntos += self._conjuntos('anio', anio, int)
+        for texto in _como_lista(titulo):
+            for palabra in PATRON_PALABRA.findall(normalizar_termino(texto)):
+                conjuntos.append(self.indices['titulo'].get(palabra, set()))
+        if desde or hasta:
+            conjuntos.append(self._rango_fechas(desde, hasta))
+
+        if conjuntos:
+            conjuntos.sort(key=len)
+            posiciones = set(conjuntos[0])
+            for conjunto in conjuntos[1:]:
+                if not posiciones:
+                    break
+                posiciones &= conjunto
+        else:
+            posiciones = range(len(self.peliculas))
+
+        resultado = [self.peliculas[posicion] for posicion in posiciones]
+        resultado.sort(key=lambda p: (p['fecha_estreno'] or '', p['titulo'] or ''))
+        return resultado
@@ -0,0 +1,339 @@
+"""
+Normalización de los JSON de películas al modelo de la base de datos
+
+Convierte los textos tal como aparecen en la web de Cinesa ("1h 40m",
+"6 mayo 2025", listas con huecos...) en los tipos de las columnas de
+``movie``, ``genre`` y ``actor``, y las sesiones en filas de ``functions``.
+
+Los mismos textos se repiten en muchas películas (duraciones, fechas de
+estreno, clasificaciones), así que su análisis se cachea por valor. Al
+guardar una película se le añaden además los campos tipados
+(``CAMPOS_TIPADOS``) junto a los textos originales, de modo que el índice,
+la búsqueda y la carga en la base de datos no vuelven a analizarlos.
+"""
+
+import functools
+import re
+import unicodedata
+from datetime import date, datetime, time, timedelta
+
+from scrapers import cinesa_parser
+from utils.snapshot_store import clave_pelicula
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+}
+
+PATRON_HORAS = re.compile(r'(\d+)\s*h')
+PATRON_MINUTOS = re.compile(r'(\d+)\s*m')
+PATRON_FECHA_TEXTO = re.compile(r'(\d{1,2})\s+(?:de\s+)?([a-záéíóú]+)\.?\s+(?:de\s+)?(\d{4})', re.IGNORECASE)
+PATRON_FECHA_NUMERICA = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
+PATRON_FECHA_ISO = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+PATRON_FECHA_SIN_ANIO = re.compile(r'(\d{1,2})\s+(?:de\s+)?([a-záéíóú]+)', re.IGNORECASE)
+PATRON_HORA = re.compile(r'(\d{1,2})[:.h](\d{2})')
+PATRON_SOLO_NUMERO = re.compile(r'\s*(\d+)\s*')
+PATRON_EDAD = re.compile(r'menores de (\d+)')
+
+# Valores distintos que se recuerdan por analizador
+TAMANO_CACHE = 4096
+
+# Campos tipados que se guardan junto a los textos de cada película:
+# minutos (int), estreno ISO 'AAAA-MM-DD' y código de clasificación ('12', 'tp'...)
+CAMPOS_TIPADOS = ('duracion_minutos', 'estreno', 'clasificacion_codigo')
+
+# Longitudes máximas de las columnas VARCHAR del esquema
+LONGITUD_TEXTO = 255
+LONGITUD_CLASIFICACION = 50
+LONGITUD_FORMATO = 100
+
+
+@functools.lru_cache(maxsize=TAMANO_CACHE)
+def _duracion(texto):
+    texto = texto.lower()
+    horas = PATRON_HORAS.search(texto)
+    minutos = PATRON_MINUTOS.search(texto)
+    if horas or minutos:
+        return (int(horas.group(1)) * 60 if horas else 0) + (int(minutos.group(1)) if minutos else 0)
+    solo_numero = PATRON_SOLO_NUMERO.fullmatch(texto)
+    return int(solo_numero.group(1)) if solo_numero else None
+
+
+def normalizar_duracion(texto):
+    """Minutos a partir de textos como '1h 40m', '2h', '95 min' o '95'; None si no se reconoce"""
+    if texto is None:
+        return None
+    if isinstance(texto, int):
+        return texto
+    return _duracion(str(texto))
+
+
+@functools.lru_cache(maxsize=TAMANO_CACHE)
+def _fecha(texto):
+    texto = texto.strip()
+    try:
+        coincidencia = PATRON_FECHA_ISO.search(texto)
+        if coincidencia:
+            return date(*map(int, coincidencia.groups()))
+        coincidencia = PATRON_FECHA_NUMERICA.search(texto)
+        if coincidencia:
+            dia, mes, anio = map(int, coincidencia.groups())
+            return date(anio, mes, dia)
+        coincidencia = PATRON_FECHA_TEXTO.search(texto)
+        if coincidencia and coincidencia.group(2).lower() in MESES:
+            return date(int(coincidencia.group(3)), MESES[coincidencia.group(2).lower()], int(coincidencia.group(1)))
+    except ValueError:
+        return None
+    return None
+
+
+def normalizar_fecha(texto):
+    """Fecha a partir de '6 mayo 2025', '6 de mayo de 2025', '06/05/2025' o '2025-05-06'; None si no se reconoce"""
+    if not texto:
+        return None
+    return _fecha(str(texto))
+
+
+@functools.lru_cache(maxsize=TAMANO_CACHE)
+def _termino(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def normalizar_termino(texto):
+    """Minúsculas, sin tildes y con los espacios colapsados"""
+    return _termino(str(texto))
+
+
+@functools.lru_cache(maxsize=TAMANO_CACHE)
+def _codigo_clasificacion(texto):
+    termino = _termino(texto)
+    edad = PATRON_EDAD.search(termino)
+    if edad:
+        return edad.group(1)
+    if 'todos los publicos' in termino:
+        return 'tp'
+    if termino.startswith('pendiente'):
+        return 'pendiente'
+    return termino
+
+
+def codigo_clasificacion(texto):
+    """'12', '16', 'tp', 'pendiente'... a partir del texto de clasificación de Cinesa"""
+    if not texto:
+        return None
+    return _codigo_clasificacion(str(texto))
+
+
+def normalizar_fecha_sesion(texto, referencia=None):
+    """
+    Fecha de una sesión: acepta lo mismo que normalizar_fecha y además 'Hoy',
+    'Mañana' y fechas sin año como 'sáb 24 may', que se sitúan en el año de
+    ``referencia`` o en el siguiente si ya han pasado más de dos meses
+    """
+    if not texto:
+        return None
+    referencia = referencia or date.today()
+    fecha = normalizar_fecha(texto)
+    if fecha:
+        return fecha
+    texto = str(texto).strip().lower()
+    if texto.startswith('hoy'):
+        return referencia
+    if texto.startswith('mañana'):
+        return referencia + timedelta(days=1)
+    coincidencia = PATRON_FECHA_SIN_ANIO.search(texto)
+    if not coincidencia:
+        return None
+    mes = next((numero for nombre, numero in MESES.items() if nombre.startswith(coincidencia.group(2))), None)
+    if mes is None or len(coincidencia.group(2)) < 3:
+        return None
+    dia = int(coincidencia.group(1))
+    fecha = _fecha_o_nada(referencia.year, mes, dia)
+    # '29 feb' puede no existir en el año de referencia y sí en el siguiente
+    if fecha is None or (referencia - fecha).days > 60:
+        fecha = _fecha_o_nada(referencia.year + 1, mes, dia)
+    return fecha
+
+
+def _fecha_o_nada(anio, mes, dia):
+    try:
+        return date(anio, mes, dia)
+    except ValueError:
+        return None
+
+
+def normalizar_hora(texto):
+    """Hora a partir de '20:15', '20.15' o '20h15'; None si no se reconoce"""
+    if not texto:
+        return None
+    coincidencia = PATRON_HORA.search(str(texto))
+    if not coincidencia:
+        return None
+    horas, minutos = map(int, coincidencia.groups())
+    if horas > 23 or minutos > 59:
+        return None
+    return time(horas, minutos)
+
+
+def normalizar_lista(valor):
+    """Lista de nombres sin vacíos ni duplicados, aceptando también un texto separado por comas"""
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    nombres = []
+    for nombre in valor:
+        nombre = ' '.join(str(nombre).split())[:LONGITUD_TEXTO]
+        if nombre and nombre not in nombres:
+            nombres.append(nombre)
+    return nombres
+
+
+def _texto(valor, longitud=None, vacios=()):
+    if valor is None:
+        return None
+    valor = ' '.join(str(valor).split())
+    if not valor or valor in vacios:
+        return None
+    return valor[:longitud] if longitud else valor
+
+
+def _ruta_poster(datos):
+    url = datos.get('imagen_url') or datos.get('poster_url')
+    if url and url.startswith('http'):
+        return url[:LONGITUD_TEXTO]
+    ruta = datos.get('poster_local') or datos.get('imagen_local')
+    if not ruta or not isinstance(ruta, str):
+        return None
+    # Las rutas locales se guardan relativas a la raíz del proyecto
+    indice = ruta.replace('\\', '/').rfind('data/')
+    return (ruta[indice:] if indice >= 0 else ruta)[:LONGITUD_TEXTO]
+
+
+def tipar_pelicula(datos):
+    """
+    Copia de la película con los campos tipados (``CAMPOS_TIPADOS``) calculados
+    a partir de sus textos; se llama al guardarla en el almacén
+    """
+    estreno = normalizar_fecha(datos.get('fecha_estreno'))
+    return {
+        **datos,
+        'duracion_minutos': normalizar_duracion(datos.get('duracion')),
+        'estreno': estreno.isoformat() if estreno else None,
+        'clasificacion_codigo': codigo_clasificacion(datos.get('clasificacion')),
+    }
+
+
+def tipar_lote(peliculas):
+    """tipar_pelicula sobre un lote: cada texto distinto se analiza una sola vez"""
+    return [tipar_pelicula(datos) for datos in peliculas]
+
+
+def campos_tipados(datos):
+    """
+    Campos tipados de una película guardada
+
+    Se usan los guardados si están todos; las instantáneas anteriores a
+    ellos se analizan al vuelo (con las mismas cachés).
+    """
+    if all(campo in datos for campo in CAMPOS_TIPADOS):
+        return {campo: datos[campo] for campo in CAMPOS_TIPADOS}
+    tipada = tipar_pelicula(datos)
+    return {campo: tipada[campo] for campo in CAMPOS_TIPADOS}
+
+
+def tipar_almacen(almacen, tamano_lote=500):
+    """
+    Añade los campos tipados a las películas del almacén que aún no los tienen
+
+    Las versiones tipadas se añaden al segmento abierto; ``compactar``
+    descarta después las anteriores.
+
+    Returns:
+        int: Películas reescritas
+    """
+    pendientes = [datos for datos in almacen.ultimas()
+                  if not all(campo in datos for campo in CAMPOS_TIPADOS)]
+    for inicio in range(0, len(pendientes), tamano_lote):
+        lote = tipar_lote(pendientes[inicio:inicio + tamano_lote])
+        almacen.guardar_lote([(datos, clave_pelicula(datos), 'pelicula') for datos in lote])
+    return len(pendientes)
+
+
+def normalizar_pelicula(datos):
+    """
+    Fila de película lista para la base de datos
+
+    Args:
+        datos: dict tal como lo guarda CinesaScraper.guardar_pelicula
+
+    Returns:
+        dict con external_id, title, synopsis, duration, rating, release_date,
+        photo_url, scraped_at, genres y actors; o None si no se puede
+        identificar la película
+    """
+    url = datos.get('url')
+    external_id = datos.get('id_pelicula') or (cinesa_parser.id_pelicula_desde_url(url) if url else None)
+    titulo = _texto(datos.get('titulo'), LONGITUD_TEXTO, vacios=("Título no disponible",))
+    if not external_id or not titulo:
+        return None
+    tipados = campos_tipados(datos)
+
+    fecha_scraping = None
+    if datos.get('fecha_scraping'):
+        try:
+            fecha_scraping = datetime.fromisoformat(datos['fecha_scraping'])
+        except ValueError:
+            pass
+
+    return {
+        'external_id': str(external_id)[:LONGITUD_TEXTO],
+        'title': titulo,
+        'synopsis': _texto(datos.get('sinopsis'), vacios=("Sinopsis no disponible",)),
+        'duration': tipados['duracion_minutos'],
+        'rating': _texto(datos.get('clasificacion'), LONGITUD_CLASIFICACION),
+        'release_date': date.fromisoformat(tipados['estreno']) if tipados['estreno'] else None,
+        'photo_url': _ruta_poster(datos),
+        'scraped_at': fecha_scraping,
+        'genres': normalizar_lista(datos.get('generos')),
+        'actors': normalizar_lista(datos.get('actores')),
+    }
+
+
+def normalizar_sesiones(cines, referencia=None):
+    """
+    Filas de sesión listas para ``functions``
+
+    Args:
+        cines: Lista [{'nombre_cine', 'sesiones': [{fecha, hora, formato, url_compra, sala?}]}]
+            tal como la devuelven el parser y el cliente de la API de sesiones
+            (la fecha puede venir como texto de la página, 'sáb 24 may', o en ISO)
+        referencia: Fecha de referencia para 'Hoy', 'Mañana' y fechas sin año
+            (normalmente la del scraping)
+
+    Returns:
+        list: dicts con cinema, room, date, time, format y purchase_url; las
+        sesiones sin cine, fecha u hora reconocibles se descartan
+    """
+    filas = []
+    for cine in cines or []:
+        nombre_cine = _texto(cine.get('nombre_cine'), LONGITUD_TEXTO)
+        if not nombre_cine:
+            continue
+        for sesion in cine.get('sesiones') or []:
+            fecha = normalizar_fecha_sesion(sesion.get('fecha'), referencia)
+            hora = normalizar_hora(sesion.get('hora'))
+            if fecha is None or hora is None:
+                continue
+            filas.append({
+                'cinema': nombre_cine,
+                'room': _texto(sesion.get('sala'), LONGITUD_TEXTO),
+                'date': fecha,
+                'time': hora,
+                'format': _texto(sesion.get('formato'), LONGITUD_FORMATO),
+                'purchase_url': _texto(sesion.get('url_compra')),
+            })
+    return filas
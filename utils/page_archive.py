@@ -0,0 +1,174 @@
+"""
+Archivo comprimido de las páginas descargadas
+
+Cada página que se descarga se añade a un fichero ``paginas-AAAAMMDD.warc.gz``
+como un registro de estilo WARC (cabeceras con URL, fecha y tipo, seguidas
+del cuerpo), comprimido como un miembro gzip independiente. Los ficheros
+solo crecen por el final, se pueden concatenar y, si el proceso muere a
+mitad de un registro, el resto del archivo sigue siendo legible.
+
+Con este archivo se puede volver a extraer la información de las páginas
+ya descargadas sin visitar el sitio de nuevo (ver ``gadget reparse``).
+"""
+
+import glob
+import gzip
+import logging
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime
+
+logger = logging.getLogger("PageArchive")
+
+PREFIJO = "paginas-"
+EXTENSION = ".warc.gz"
+TAMANO_BLOQUE = 1 << 16
+
+
+class PageArchive:
+    """Archivo de páginas de solo añadido, un fichero por día"""
+
+    def __init__(self, directorio):
+        """
+        Args:
+            directorio: Directorio donde se guardan los ficheros del archivo
+        """
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self.registros = 0
+        self.bytes_originales = 0
+        self.bytes_comprimidos = 0
+
+    @classmethod
+    def desde_config(cls, config, directorio_datos):
+        """
+        Crea el archivo a partir de la sección ``scraper.archivo``
+
+        Returns:
+            PageArchive, o None si el archivo está desactivado
+        """
+        archivo = (config or {}).get('scraper', {}).get('archivo', {}) or {}
+        if not archivo.get('enabled', True):
+            return None
+        return cls(os.path.join(directorio_datos, archivo.get('directorio', 'archivo')))
+
+    def ruta_del_dia(self, fecha=None):
+        """Fichero del archivo correspondiente a una fecha (hoy por defecto)"""
+        fecha = fecha or datetime.now()
+        return os.path.join(self.directorio, f"{PREFIJO}{fecha.strftime('%Y%m%d')}{EXTENSION}")
+
+    def guardar(self, url, contenido, tipo='detalle', content_type='text/html; charset=utf-8'):
+        """
+        Añade una página al archivo del día
+
+        Args:
+            url: URL de la página
+            contenido: HTML (str) o bytes de la respuesta
+            tipo: Tipo de página ('listado', 'detalle')
+            content_type: Tipo MIME del contenido
+        """
+        if isinstance(contenido, str):
+            contenido = contenido.encode('utf-8')
+        ahora = datetime.now()
+        cabeceras = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {ahora.isoformat(timespec='seconds')}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"X-Gadget-Tipo: {tipo}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(contenido)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        # Un miembro gzip por registro: se comprime fuera del lock
+        miembro = gzip.compress(cabeceras + contenido + b"\r\n\r\n", compresslevel=6)
+
+        with self._lock:
+            with open(self.ruta_del_dia(ahora), 'ab') as f:
+                f.write(miembro)
+            self.registros += 1
+            self.bytes_originales += len(contenido)
+            self.bytes_comprimidos += len(miembro)
+
+    def guardar_seguro(self, url, contenido, tipo='detalle'):
+        """Como guardar(), pero un fallo del archivo solo se anota en el log"""
+        try:
+            self.guardar(url, contenido, tipo)
+        except OSError as e:
+            logger.warning(f"No se pudo archivar {url}: {e}")
+
+    def log_resumen(self):
+        """Escribe en el log cuántas páginas se han archivado"""
+        if self.registros:
+            logger.info(
+                f"Archivo de páginas: {self.registros} páginas, "
+                f"{self.bytes_originales / 1024:.1f} KB -> {self.bytes_comprimidos / 1024:.1f} KB comprimidos"
+            )
+
+
+def ficheros_archivo(directorio, desde=None):
+    """
+    Ficheros del archivo en orden cronológico
+
+    Args:
+        directorio: Directorio del archivo
+        desde: Fecha 'AAAAMMDD' mínima (opcional)
+    """
+    ficheros = sorted(glob.glob(os.path.join(directorio, f"{PREFIJO}*{EXTENSION}")))
+    if desde:
+        ficheros = [f for f in ficheros if os.path.basename(f)[len(PREFIJO):len(PREFIJO) + 8] >= desde]
+    return ficheros
+
+
+def _parsear_registro(datos):
+    cabecera, _, resto = datos.partition(b"\r\n\r\n")
+    lineas = cabecera.decode('utf-8', errors='replace').split("\r\n")
+    campos = {}
+    for linea in lineas[1:]:
+        nombre, _, valor = linea.partition(':')
+        campos[nombre.strip()] = valor.strip()
+    longitud = int(campos.get('Content-Length', len(resto)))
+    return {
+        'url': campos.get('WARC-Target-URI'),
+        'fecha': campos.get('WARC-Date'),
+        'tipo': campos.get('X-Gadget-Tipo'),
+        'content_type': campos.get('Content-Type'),
+        'contenido': resto[:longitud],
+    }
+
+
+def leer_registros(ruta):
+    """
+    Recorre los registros de un fichero del archivo
+
+    Cada miembro gzip se descomprime por separado; un miembro final
+    truncado (proceso interrumpido) se descarta con un aviso.
+
+    Yields:
+        dict con url, fecha, tipo, content_type y contenido (bytes)
+    """
+    with open(ruta, 'rb') as f:
+        pendiente = b""
+        descompresor = zlib.decompressobj(wbits=31)
+        datos = []
+        while True:
+            bloque = pendiente or f.read(TAMANO_BLOQUE)
+            pendiente = b""
+            if not bloque:
+                break
+            try:
+                datos.append(descompresor.decompress(bloque))
+            except zlib.error as e:
+                logger.warning(f"Registro dañado en {ruta}: {e}")
+                return
+            if descompresor.eof:
+                yield _parsear_registro(b"".join(datos))
+                pendiente = descompresor.unused_data
+                descompresor = zlib.decompressobj(wbits=31)
+                datos = []
+        if datos and any(datos):
+            logger.warning(f"Último registro incompleto en {ruta}, se descarta")
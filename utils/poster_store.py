@@ -0,0 +1,196 @@
+"""
+Almacén de pósters direccionado por contenido
+
+Cada imagen se guarda una sola vez con el hash SHA-256 de los bytes
+descargados como nombre, repartida en subdirectorios (``ab/cd/abcd....jpg``)
+para no acumular miles de ficheros en una carpeta. Un índice pequeño
+relaciona la URL de origen y el ID de película con ese hash, de modo que
+las búsquedas no dependen del título y una URL ya conocida no se vuelve a
+descargar.
+
+Las variantes de cada imagen (``SUFIJOS``) van junto al original con un
+sufijo en el nombre; ``ruta_preferida`` da la optimizada si existe, que es
+la que se guarda en las películas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from utils.atomic_io import escribir_atomico
+
+logger = logging.getLogger("PosterStore")
+
+NOMBRE_INDICE = "index.json"
+
+# Sufijo de cada variante junto al nombre (hash) del original
+SUFIJOS = {'optimizada': '-opt', 'miniatura': '-thumb', 'webp': '-web'}
+EXTENSIONES_VARIANTE = {'miniatura': '.jpg', 'webp': '.webp'}
+
+
+def ruta_variante(ruta, nombre):
+    """Ruta de la variante ``nombre`` de la imagen de ``ruta`` (exista o no)"""
+    base, extension = os.path.splitext(ruta)
+    return f"{base}{SUFIJOS[nombre]}{EXTENSIONES_VARIANTE.get(nombre, extension)}"
+
+
+class PosterStore:
+    """Almacén de imágenes por hash con índice URL/película -> hash"""
+
+    def __init__(self, raiz, guardar_cada=20):
+        """
+        Inicializar el almacén
+
+        Args:
+            raiz: Directorio raíz del almacén
+            guardar_cada: Cambios en el índice tras los que se escribe a disco
+        """
+        self.raiz = raiz
+        self.ruta_indice = os.path.join(raiz, NOMBRE_INDICE)
+        self.guardar_cada = guardar_cada
+
+        self._lock = threading.RLock()
+        self._cambios = 0
+        self._indice = {'objetos': {}, 'urls': {}, 'peliculas': {}}
+
+        os.makedirs(raiz, exist_ok=True)
+        self._cargar_indice()
+
+    def _cargar_indice(self):
+        if not os.path.exists(self.ruta_indice):
+            return
+        try:
+            with open(self.ruta_indice, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            for clave in self._indice:
+                self._indice[clave].update(indice.get(clave, {}))
+            logger.info(f"Índice de pósters cargado: {len(self._indice['objetos'])} imágenes")
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer el índice de pósters {self.ruta_indice}: {e}")
+
+    def guardar_indice(self):
+        """Escribe el índice a disco de forma atómica"""
+        # La escritura va dentro del lock: así una foto antigua del índice
+        # nunca pisa a otra más reciente
+        with self._lock:
+            contenido = json.dumps(self._indice, ensure_ascii=False, separators=(',', ':'))
+            self._cambios = 0
+            escribir_atomico(self.ruta_indice, contenido.encode('utf-8'))
+
+    def _marcar_cambio(self):
+        # Llamar con el lock adquirido
+        self._cambios += 1
+        if self._cambios >= self.guardar_cada:
+            self.guardar_indice()
+
+    def ruta_objeto(self, hash_hex, extension='.jpg'):
+        """Ruta del fichero de un hash dentro del almacén"""
+        return os.path.join(self.raiz, hash_hex[:2], hash_hex[2:4], f"{hash_hex}{extension}")
+
+    def _ruta_existente(self, hash_hex):
+        # Llamar con el lock adquirido
+        objeto = self._indice['objetos'].get(hash_hex)
+        if not objeto:
+            return None
+        ruta = os.path.join(self.raiz, objeto['ruta'])
+        return ruta if os.path.exists(ruta) else None
+
+    def buscar_url(self, url):
+        """Ruta local de la imagen descargada de ``url``, o None si no se conoce"""
+        with self._lock:
+            hash_hex = self._indice['urls'].get(url)
+            return self._ruta_existente(hash_hex) if hash_hex else None
+
+    def buscar_pelicula(self, id_pelicula):
+        """Ruta local del póster de una película, o None si no se conoce"""
+        with self._lock:
+            hash_hex = self._indice['peliculas'].get(id_pelicula)
+            return self._ruta_existente(hash_hex) if hash_hex else None
+
+    def guardar(self, contenido, url=None, id_pelicula=None, extension='.jpg'):
+        """
+        Guarda una imagen (si no estaba ya) y la asocia a su URL y película
+
+        Args:
+            contenido: Bytes de la imagen
+            url: URL de origen (opcional)
+            id_pelicula: ID de la película (opcional)
+            extension: Extensión del fichero
+
+        Returns:
+            tuple: (ruta local, True si la imagen es nueva en el almacén)
+        """
+        hash_hex = hashlib.sha256(contenido).hexdigest()
+
+        with self._lock:
+            ruta = self._ruta_existente(hash_hex)
+            nueva = ruta is None
+            if nueva:
+                ruta = self.ruta_objeto(hash_hex, extension)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                escribir_atomico(ruta, contenido)
+                self._indice['objetos'][hash_hex] = {
+                    'ruta': os.path.relpath(ruta, self.raiz),
+                    'bytes': len(contenido),
+                }
+            if url:
+                self._indice['urls'][url] = hash_hex
+            if id_pelicula:
+                self._indice['peliculas'][id_pelicula] = hash_hex
+            self._marcar_cambio()
+
+        if nueva:
+            logger.info(f"Imagen nueva en el almacén: {ruta}")
+        else:
+            logger.info(f"Imagen duplicada, se reutiliza: {ruta}")
+        return ruta, nueva
+
+    def asociar_pelicula(self, id_pelicula, ruta):
+        """Asocia una película a una imagen que ya está en el almacén"""
+        hash_hex = os.path.splitext(os.path.basename(ruta))[0]
+        with self._lock:
+            if hash_hex in self._indice['objetos']:
+                self._indice['peliculas'][id_pelicula] = hash_hex
+                self._marcar_cambio()
+
+    @staticmethod
+    def ruta_preferida(ruta):
+        """
+        Ruta de la versión optimizada de una imagen si existe, o la del original
+
+        Solo se escribe cuando ocupa menos que el original, así que basta
+        con mirar el disco (sirve también para instantáneas antiguas).
+        """
+        if not ruta:
+            return ruta
+        optimizada = ruta_variante(ruta, 'optimizada')
+        return optimizada if os.path.exists(optimizada) else ruta
+
+    def optimizada(self, ruta):
+        """True si la imagen de ``ruta`` ya se optimizó en alguna ejecución"""
+        hash_hex = os.path.splitext(os.path.basename(ruta))[0]
+        with self._lock:
+            return self._indice['objetos'].get(hash_hex, {}).get('optimizada', False)
+
+    def marcar_optimizada(self, ruta, resultado):
+        """Anota en el índice que una imagen está optimizada y dónde están sus variantes"""
+        hash_hex = os.path.splitext(os.path.basename(ruta))[0]
+        with self._lock:
+            objeto = self._indice['objetos'].get(hash_hex)
+            if objeto is None:
+                return
+            objeto['optimizada'] = True
+            objeto['bytes_optimizados'] = resultado['bytes_optimizados']
+            objeto['variantes'] = {
+                nombre: os.path.relpath(ruta_variante, self.raiz)
+                for nombre, ruta_variante in resultado['variantes'].items()
+            }
+            self._marcar_cambio()
+
+    def estadisticas(self):
+        """Número de imágenes, URLs y películas del índice"""
+        with self._lock:
+            return {clave: len(valores) for clave, valores in self._indice.items()}
+
@@ -0,0 +1,245 @@
+"""
+Limitador de peticiones adaptativo compartido por todo el proceso
+
+Un único token bucket por dominio (cinesa.es) que usan todas las vías de
+acceso al sitio: navegaciones de Selenium, peticiones de requests y
+descargas de imágenes. La tasa objetivo se ajusta sola: baja a la mitad
+ante un 403/429/5xx o si la latencia se dispara, y sube poco a poco
+mientras las respuestas sigan sanas (AIMD).
+"""
+
+import logging
+import threading
+import time
+import urllib.parse
+
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("RateLimiter")
+
+CODIGOS_BLOQUEO = (403, 429)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket con tasa adaptativa (aumento aditivo, reducción multiplicativa)"""
+
+    def __init__(self, tasa_inicial=2.0, tasa_min=0.2, tasa_max=10.0, rafaga=2,
+                 incremento=0.25, respuestas_para_subir=5, factor_latencia=2.5):
+        """
+        Inicializar el limitador
+
+        Args:
+            tasa_inicial: Peticiones por segundo al arrancar
+            tasa_min: Tasa mínima a la que puede bajar
+            tasa_max: Tasa máxima a la que puede subir
+            rafaga: Tokens máximos acumulables (peticiones seguidas sin esperar)
+            incremento: Peticiones/segundo que se suman tras una racha sana
+            respuestas_para_subir: Respuestas sanas seguidas necesarias para subir la tasa
+            factor_latencia: Veces la latencia media a partir de las cuales se considera degradada
+        """
+        self.tasa_min = tasa_min
+        self.tasa_max = tasa_max
+        self.tasa = min(max(tasa_inicial, tasa_min), tasa_max)
+        self.rafaga = max(1, rafaga)
+        self.incremento = incremento
+        self.respuestas_para_subir = respuestas_para_subir
+        self.factor_latencia = factor_latencia
+
+        self._tokens = float(self.rafaga)
+        self._ultima_recarga = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._ultima_frenada = 0.0
+        self._racha_sana = 0
+        self._latencia_media = None
+        self._lock = threading.Lock()
+
+        self.peticiones = 0
+        self.frenadas = 0
+        self.tiempo_esperando = 0.0
+
+    def _recargar(self, ahora):
+        transcurrido = ahora - self._ultima_recarga
+        self._tokens = min(self.rafaga, self._tokens + transcurrido * self.tasa)
+        self._ultima_recarga = ahora
+
+    def adquirir(self):
+        """Bloquea hasta que haya un token disponible"""
+        inicio = time.monotonic()
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._recargar(ahora)
+                if ahora >= self._pausa_hasta and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.peticiones += 1
+                    self.tiempo_esperando += ahora - inicio
+                    return
+                espera = max(self._pausa_hasta - ahora, (1 - self._tokens) / self.tasa)
+            time.sleep(min(espera, 1.0))
+
+    def _frenar(self, motivo, pausa=0.0):
+        # Llamar con el lock adquirido
+        ahora = time.monotonic()
+        if pausa:
+            self._pausa_hasta = max(self._pausa_hasta, ahora + pausa)
+        self._racha_sana = 0
+        # Varias respuestas malas casi simultáneas cuentan como una sola
+        if ahora - self._ultima_frenada < 1.0:
+            return
+        self._ultima_frenada = ahora
+        anterior = self.tasa
+        self.tasa = max(self.tasa_min, self.tasa / 2)
+        self._tokens = min(self._tokens, 0.0)
+        self.frenadas += 1
+        logger.warning(f"{motivo}: tasa reducida de {anterior:.2f} a {self.tasa:.2f} peticiones/s")
+
+    def registrar(self, status=None, latencia=None, error=False, retry_after=None):
+        """
+        Registra el resultado de una petición y ajusta la tasa
+
+        Args:
+            status: Código HTTP de la respuesta (None si no se conoce, p. ej. Selenium)
+            latencia: Segundos que tardó la respuesta
+            error: True si la petición falló sin respuesta (timeout, conexión)
+            retry_after: Segundos de la cabecera Retry-After, si la hubo
+        """
+        with self._lock:
+            if status in CODIGOS_BLOQUEO:
+                self._frenar(f"Respuesta {status}", pausa=retry_after or 1.0 / self.tasa)
+                return
+            if error or (status is not None and status >= 500):
+                self._frenar("Error del servidor" if status else "Petición fallida")
+                return
+
+            if latencia is not None:
+                if self._latencia_media is not None and latencia > self.factor_latencia * self._latencia_media:
+                    self._latencia_media = 0.8 * self._latencia_media + 0.2 * latencia
+                    self._frenar(f"Latencia en aumento ({latencia:.2f} s)")
+                    return
+                self._latencia_media = latencia if self._latencia_media is None else 0.8 * self._latencia_media + 0.2 * latencia
+
+            self._racha_sana += 1
+            if self._racha_sana >= self.respuestas_para_subir and self.tasa < self.tasa_max:
+                self.tasa = min(self.tasa_max, self.tasa + self.incremento)
+                self._racha_sana = 0
+                logger.debug(f"Respuestas sanas: tasa aumentada a {self.tasa:.2f} peticiones/s")
+
+    def resumen(self):
+        """Estado actual del limitador"""
+        with self._lock:
+            return {
+                'tasa': self.tasa,
+                'peticiones': self.peticiones,
+                'frenadas': self.frenadas,
+                'tiempo_esperando': self.tiempo_esperando,
+                'latencia_media': self._latencia_media,
+            }
+
+
+# Registro de limitadores del proceso: dominio -> AdaptiveRateLimiter
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+
+def configurar(config):
+    """Crea (una sola vez) el limitador del dominio configurado en ``scraper.rate_limit``"""
+    limite = (config or {}).get('scraper', {}).get('rate_limit', {}) or {}
+    dominio = limite.get('dominio', 'cinesa.es')
+    with _limitadores_lock:
+        if dominio not in _limitadores:
+            _limitadores[dominio] = AdaptiveRateLimiter(
+                tasa_inicial=float(limite.get('tasa_inicial', 2.0)),
+                tasa_min=float(limite.get('tasa_min', 0.2)),
+                tasa_max=float(limite.get('tasa_max', 10.0)),
+                rafaga=int(limite.get('rafaga', 2)),
+            )
+        return _limitadores[dominio]
+
+
+def limitador_para_url(url):
+    """Limitador que corresponde al host de la URL, o None si no está limitado"""
+    host = urllib.parse.urlparse(url).hostname or ''
+    with _limitadores_lock:
+        for dominio, limitador in _limitadores.items():
+            if host == dominio or host.endswith('.' + dominio):
+                return limitador
+    return None
+
+
+def _retry_after(respuesta):
+    try:
+        return float(respuesta.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Adaptador de requests que pasa cada petición por el limitador de su dominio"""
+
+    def send(self, request, **kwargs):
+        limitador = limitador_para_url(request.url)
+        if limitador is None:
+            return super().send(request, **kwargs)
+
+        limitador.adquirir()
+        inicio = time.monotonic()
+        try:
+            respuesta = super().send(request, **kwargs)
+        except Exception:
+            limitador.registrar(error=True)
+            raise
+        limitador.registrar(
+            status=respuesta.status_code,
+            latencia=time.monotonic() - inicio,
+            retry_after=_retry_after(respuesta)
+        )
+        return respuesta
+
+
+def montar_en_sesion(session, pool_maxsize=10):
+    """Monta el adaptador limitado en una requests.Session para http y https"""
+    adaptador = RateLimitedAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount('http://', adaptador)
+    session.mount('https://', adaptador)
+    return session
+
+
+def navegar(driver, url):
+    """driver.get(url) pasando por el limitador del dominio
+
+    Selenium no da el código HTTP ni falla ante un 403/429 o una página de
+    bloqueo, así que aquí solo se registran las navegaciones que fallan. Quien
+    navega confirma el resultado con ``confirmar_navegacion`` cuando ha
+    comprobado el marcado de la página; si no, la navegación no cuenta para
+    el ajuste de la tasa. La latencia de una navegación completa no es
+    comparable con la de una petición HTTP y tampoco se registra.
+    """
+    limitador = limitador_para_url(url)
+    if limitador is None:
+        driver.get(url)
+        return
+
+    limitador.adquirir()
+    try:
+        driver.get(url)
+    except Exception:
+        limitador.registrar(error=True)
+        raise
+
+
+def confirmar_navegacion(url, marcado_esperado):
+    """
+    Registra el resultado de una navegación de ``navegar`` en el limitador
+
+    Args:
+        url: URL a la que se navegó
+        marcado_esperado: True si la página trae el marcado esperado; si no,
+            se trata como una página de bloqueo y la tasa baja
+    """
+    limitador = limitador_para_url(url)
+    if limitador is None:
+        return
+    if marcado_esperado:
+        limitador.registrar()
+    else:
+        limitador.registrar(error=True)
@@ -0,0 +1,114 @@
+"""
+Manifiesto del scraping incremental
+
+Guarda por URL de película la huella de sus datos estáticos (ficha,
+reparto, sinopsis...), la de sus sesiones y cuándo se comprobaron. Con él
+una ejecución incremental puede saltarse las películas que no han
+cambiado: los datos estáticos solo se vuelven a comprobar cuando caducan,
+mientras que las sesiones, que cambian a diario, se comparan siempre.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.atomic_io import escribir_atomico
+
+logger = logging.getLogger("ScrapeManifest")
+
+
+def huella(datos):
+    """SHA-256 de la serialización canónica de unos datos JSON"""
+    serializado = json.dumps(datos, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+class ScrapeManifest:
+    """Huellas y fechas de la última extracción de cada película"""
+
+    def __init__(self, ruta, revalidar_horas=72, guardar_cada=20):
+        """
+        Inicializar el manifiesto
+
+        Args:
+            ruta: Fichero JSON del manifiesto
+            revalidar_horas: Horas tras las que los datos estáticos se vuelven a comprobar
+            guardar_cada: Cambios tras los que se escribe a disco
+        """
+        self.ruta = ruta
+        self.revalidar = revalidar_horas * 3600
+        self.guardar_cada = guardar_cada
+
+        self._lock = threading.Lock()
+        # Serializa las escrituras a disco: la foto y su escritura van juntas,
+        # así una foto antigua nunca pisa a otra más reciente
+        self._lock_escritura = threading.Lock()
+        self._cambios = 0
+        self._entradas = {}
+
+        self._cargar()
+
+    @classmethod
+    def desde_config(cls, config, directorio_datos):
+        """Crea el manifiesto a partir de la sección ``scraper.incremental``"""
+        incremental = (config or {}).get('scraper', {}).get('incremental', {}) or {}
+        ruta = os.path.join(directorio_datos, incremental.get('manifiesto', 'manifest.json'))
+        return cls(ruta, revalidar_horas=float(incremental.get('revalidar_horas', 72)))
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                self._entradas = json.load(f)
+            logger.info(f"Manifiesto cargado: {len(self._entradas)} películas")
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer el manifiesto {self.ruta}: {e}")
+
+    def guardar(self):
+        """Escribe el manifiesto a disco de forma atómica"""
+        with self._lock_escritura:
+            with self._lock:
+                contenido = json.dumps(self._entradas, ensure_ascii=False, indent=1)
+                self._cambios = 0
+            os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+            escribir_atomico(self.ruta, contenido.encode('utf-8'))
+
+    def obtener(self, url):
+        """Entrada del manifiesto para una URL, o None si no se ha extraído nunca"""
+        with self._lock:
+            entrada = self._entradas.get(url)
+            return dict(entrada) if entrada else None
+
+    def vigente(self, entrada):
+        """True si los datos estáticos de la entrada no necesitan comprobarse todavía"""
+        return bool(entrada) and time.time() - entrada.get('verificado', 0) < self.revalidar
+
+    def olvidar_claves(self, claves):
+        """
+        Borra las entradas que apuntan a registros que no llegaron al almacén
+
+        Returns:
+            int: Entradas borradas
+        """
+        claves = set(claves)
+        if not claves:
+            return 0
+        with self._lock:
+            urls = [url for url, entrada in self._entradas.items() if entrada.get('clave') in claves]
+            for url in urls:
+                del self._entradas[url]
+            self._cambios += len(urls)
+        return len(urls)
+
+    def actualizar(self, url, **campos):
+        """Actualiza (o crea) la entrada de una URL con los campos indicados"""
+        with self._lock:
+            self._entradas.setdefault(url, {}).update(campos)
+            self._cambios += 1
+            pendiente = self._cambios >= self.guardar_cada
+        if pendiente:
+            self.guardar()
@@ -0,0 +1,207 @@
+"""
+Búsqueda de texto completo sobre las películas scrapeadas
+
+Una base de datos SQLite aparte (no necesita el servidor PostgreSQL) con una
+tabla FTS5 sobre título, sinopsis, dirección y reparto. El scraper la
+mantiene al día según escribe películas en el almacén (desde el hilo
+escritor) y, para lo que se haya escrito por otro camino, ``sincronizar``
+la pone al día comparando la versión de los segmentos del almacén.
+
+Las búsquedas devuelven los resultados ordenados por BM25 (el título y el
+reparto pesan más que la sinopsis) con un fragmento del texto encontrado.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from utils.movie_normalizer import campos_tipados, normalizar_lista
+from utils.snapshot_store import clave_pelicula
+
+logger = logging.getLogger("SearchIndex")
+
+PATRON_PALABRA = re.compile(r'\w+')
+SINOPSIS_VACIA = "Sinopsis no disponible"
+
+# Pesos BM25 de cada columna de peliculas_fts: título, sinopsis, dirección, reparto
+PESOS = (10.0, 1.0, 4.0, 4.0)
+
+SQL_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS peliculas (
+    id INTEGER PRIMARY KEY,
+    clave TEXT UNIQUE NOT NULL,
+    titulo TEXT,
+    url TEXT,
+    fecha_estreno TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS peliculas_fts USING fts5(
+    titulo, sinopsis, directores, actores,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS estado (
+    nombre TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+SQL_GUARDAR_PELICULA = """
+INSERT INTO peliculas (clave, titulo, url, fecha_estreno) VALUES (?, ?, ?, ?)
+ON CONFLICT (clave) DO UPDATE SET
+    titulo = excluded.titulo, url = excluded.url, fecha_estreno = excluded.fecha_estreno
+RETURNING id
+"""
+
+SQL_BUSCAR = f"""
+SELECT p.clave, p.titulo, p.url, p.fecha_estreno,
+       snippet(peliculas_fts, -1, '[', ']', '…', 12) AS fragmento,
+       bm25(peliculas_fts, {', '.join(map(str, PESOS))}) AS rango
+FROM peliculas_fts
+JOIN peliculas p ON p.id = peliculas_fts.rowid
+WHERE peliculas_fts MATCH ?
+ORDER BY rango
+LIMIT ?
+"""
+
+
+def consulta_fts(texto):
+    """
+    Consulta FTS5 a partir de un texto libre
+
+    Cada palabra va entre comillas (la puntuación no rompe la sintaxis) y
+    la última busca también por prefijo, para poder escribir a medias.
+    """
+    palabras = PATRON_PALABRA.findall(texto or '')
+    if not palabras:
+        return None
+    terminos = [f'"{palabra}"' for palabra in palabras]
+    terminos[-1] += '*'
+    return ' '.join(terminos)
+
+
+class SearchIndex:
+    """Índice FTS5 de películas en un fichero SQLite"""
+
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta: Fichero SQLite del índice
+        """
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SQL_ESQUEMA)
+        self._conn.commit()
+        self.actualizadas = 0
+
+    @classmethod
+    def desde_config(cls, config, directorio_datos):
+        """
+        Crea el índice a partir de la sección ``scraper.busqueda``
+
+        Returns:
+            SearchIndex, o None si la búsqueda está desactivada
+        """
+        busqueda = (config or {}).get('scraper', {}).get('busqueda', {}) or {}
+        if not busqueda.get('enabled', True):
+            return None
+        return cls(os.path.join(directorio_datos, busqueda.get('ruta', 'busqueda.sqlite')))
+
+    # --- Escritura ---
+
+    def _guardar(self, datos, clave):
+        # Llamar con el lock adquirido y dentro de una transacción
+        id_fila = self._conn.execute(
+            SQL_GUARDAR_PELICULA,
+            (clave, datos.get('titulo'), datos.get('url'), campos_tipados(datos)['estreno'])
+        ).fetchone()[0]
+        sinopsis = datos.get('sinopsis')
+        self._conn.execute("DELETE FROM peliculas_fts WHERE rowid = ?", (id_fila,))
+        self._conn.execute(
+            "INSERT INTO peliculas_fts (rowid, titulo, sinopsis, directores, actores) VALUES (?, ?, ?, ?, ?)",
+            (
+                id_fila, datos.get('titulo') or '',
+                sinopsis if sinopsis and sinopsis != SINOPSIS_VACIA else '',
+                ', '.join(normalizar_lista(datos.get('directores'))),
+                ', '.join(normalizar_lista(datos.get('actores'))),
+            )
+        )
+
+    def _guardar_version(self, version):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO estado (nombre, valor) VALUES ('version_almacen', ?)",
+            (json.dumps(version, sort_keys=True),)
+        )
+
+    def actualizar(self, registros, version=None):
+        """
+        Indexa (o reindexa) películas recién guardadas en el almacén
+
+        Args:
+            registros: Lista de tuplas (datos, clave, tipo) como las de SnapshotStore.guardar_lote
+            version: SnapshotStore.version() después de guardarlas
+        """
+        peliculas = [(datos, clave) for datos, clave, tipo in registros if tipo == 'pelicula']
+        with self._lock:
+            with self._conn:
+                for datos, clave in peliculas:
+                    self._guardar(datos, clave)
+                if version is not None:
+                    self._guardar_version(version)
+            self.actualizadas += len(peliculas)
+
+    def sincronizar(self, almacen):
+        """
+        Pone el índice al día con el almacén si este ha cambiado por otro camino
+
+        Returns:
+            int: Películas reindexadas (0 si ya estaba al día)
+        """
+        version = almacen.version()
+        with self._lock:
+            fila = self._conn.execute("SELECT valor FROM estado WHERE nombre = 'version_almacen'").fetchone()
+        if fila and json.loads(fila[0]) == version:
+            return 0
+
+        peliculas = [(datos, clave_pelicula(datos)) for datos in almacen.ultimas()]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM peliculas_fts")
+                self._conn.execute("DELETE FROM peliculas")
+                for datos, clave in peliculas:
+                    self._guardar(datos, clave)
+                self._guardar_version(version)
+        logger.info(f"Índice de búsqueda reconstruido: {len(peliculas)} películas")
+        return len(peliculas)
+
+    # --- Búsqueda ---
+
+    def buscar(self, texto, limite=10, avanzada=False):
+        """
+        Películas que coinciden con un texto, de más a menos relevante
+
+        Args:
+            texto: Palabras a buscar (o sintaxis FTS5 si ``avanzada``)
+            limite: Resultados como máximo
+            avanzada: Pasar el texto tal cual a MATCH (AND/OR/NOT, NEAR, columna:...)
+
+        Returns:
+            list: dicts con clave, titulo, url, fecha_estreno, fragmento y rango
+        """
+        consulta = texto if avanzada else consulta_fts(texto)
+        if not consulta:
+            return []
+        with self._lock:
+            filas = self._conn.execute(SQL_BUSCAR, (consulta, limite)).fetchall()
+        columnas = ('clave', 'titulo', 'url', 'fecha_estreno', 'fragmento', 'rango')
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def cerrar(self):
+        """Cierra la conexión SQLite"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,209 @@
+"""
+Escritura por lotes de las sesiones en ``functions``
+
+Los cines, salas y películas se resuelven contra cachés en memoria que se
+llenan con una consulta por tabla; los cines y salas que faltan se crean en
+bloque. Las sesiones se vuelcan a una tabla temporal con ``execute_values``
+y desde ahí un único ``INSERT ... ON CONFLICT`` inserta las nuevas y
+actualiza las cambiadas. Las sesiones futuras de las películas recibidas que
+ya no aparecen se borran. Todo ocurre en una transacción por escritura.
+"""
+
+import logging
+from datetime import date
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger("SessionsWriter")
+
+# Sala a la que van las sesiones cuando la fuente no indica la sala
+SALA_GENERICA = "General"
+
+SQL_STAGING = """
+CREATE TEMP TABLE stg_functions (
+    movie_id INT NOT NULL,
+    room_id INT NOT NULL,
+    date DATE NOT NULL,
+    time TIME NOT NULL,
+    format TEXT,
+    purchase_url TEXT
+) ON COMMIT DROP
+"""
+
+SQL_INSERTAR_STAGING = """
+INSERT INTO stg_functions (movie_id, room_id, date, time, format, purchase_url) VALUES %s
+"""
+
+SQL_FUSION_SESIONES = """
+INSERT INTO functions (movie_id, room_id, date, time, format, purchase_url)
+SELECT DISTINCT ON (movie_id, room_id, date, time) movie_id, room_id, date, time, format, purchase_url
+FROM stg_functions
+ORDER BY movie_id, room_id, date, time
+ON CONFLICT (movie_id, room_id, date, time) DO UPDATE SET
+    format = EXCLUDED.format,
+    purchase_url = EXCLUDED.purchase_url
+WHERE (functions.format, functions.purchase_url) IS DISTINCT FROM (EXCLUDED.format, EXCLUDED.purchase_url)
+RETURNING (xmax = 0) AS nueva
+"""
+
+# Sesiones desaparecidas: solo futuras, de las películas recibidas y sin butacas asociadas
+SQL_BORRAR_DESAPARECIDAS = """
+DELETE FROM functions f
+WHERE f.movie_id = ANY(%s)
+  AND f.date >= %s
+  AND NOT EXISTS (
+      SELECT 1 FROM stg_functions s
+      WHERE s.movie_id = f.movie_id AND s.room_id = f.room_id AND s.date = f.date AND s.time = f.time
+  )
+  AND NOT EXISTS (SELECT 1 FROM seat WHERE seat.function_id = f.id)
+"""
+
+SQL_INSERTAR_CINES = """
+INSERT INTO cinema (name) VALUES %s
+ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+RETURNING id, name
+"""
+
+SQL_INSERTAR_SALAS = """
+INSERT INTO room (cinema_id, name, capacity) VALUES %s
+ON CONFLICT (cinema_id, name) DO UPDATE SET name = EXCLUDED.name
+RETURNING id, cinema_id, name
+"""
+
+
+def nombres_sala(filas):
+    """
+    Nombre de la sala de cada sesión de una película, en el mismo orden
+
+    Las sesiones sin sala van a ``SALA_GENERICA`` (el formato es un atributo
+    de la sesión, no una sala). Si varias sesiones distintas coinciden en
+    cine, día y hora sin sala conocida (p. ej. en 2D y en VOSE a la vez),
+    cada una va a una sala genérica numerada ('General 2'...) para que la
+    clave (movie_id, room_id, date, time) no las funda en una; las repetidas
+    (mismo formato y URL de compra) sí quedan en la misma.
+
+    Args:
+        filas: Sesiones de una película tal como las da normalizar_sesiones
+    """
+    nombres = [sesion.get('room') for sesion in filas]
+    sin_sala = {}
+    for posicion, sesion in enumerate(filas):
+        if not nombres[posicion]:
+            sin_sala.setdefault((sesion['cinema'], sesion['date'], sesion['time']), []).append(posicion)
+    for posiciones in sin_sala.values():
+        distintas = sorted({(filas[p]['format'] or '', filas[p]['purchase_url'] or '') for p in posiciones})
+        for posicion in posiciones:
+            orden = distintas.index((filas[posicion]['format'] or '', filas[posicion]['purchase_url'] or ''))
+            nombres[posicion] = SALA_GENERICA if orden == 0 else f"{SALA_GENERICA} {orden + 1}"
+    return nombres
+
+
+class SessionsWriter:
+    """Inserta, actualiza y borra sesiones de ``functions`` a partir de las del scraping"""
+
+    def __init__(self, conn, tamano_lote=1000):
+        """
+        Args:
+            conn: Conexión psycopg2 (cada escritura se hace en una transacción propia)
+            tamano_lote: Filas por sentencia de execute_values
+        """
+        self.conn = conn
+        self.tamano_lote = tamano_lote
+        self.cines = {}
+        self.salas = {}
+        self.peliculas = {}
+
+    def _cargar_caches(self, cursor, external_ids):
+        cursor.execute("SELECT id, name FROM cinema")
+        self.cines = {nombre: id_cine for id_cine, nombre in cursor.fetchall()}
+        cursor.execute("SELECT id, cinema_id, name FROM room")
+        self.salas = {(id_cine, nombre): id_sala for id_sala, id_cine, nombre in cursor.fetchall()}
+        cursor.execute("SELECT id, external_id FROM movie WHERE external_id = ANY(%s)", (list(external_ids),))
+        self.peliculas = {external_id: id_pelicula for id_pelicula, external_id in cursor.fetchall()}
+
+    def _resolver_cines(self, cursor, nombres):
+        nuevos = sorted(set(nombres) - self.cines.keys())
+        if nuevos:
+            filas = execute_values(cursor, SQL_INSERTAR_CINES, [(nombre,) for nombre in nuevos],
+                                   page_size=self.tamano_lote, fetch=True)
+            self.cines.update({nombre: id_cine for id_cine, nombre in filas})
+        return len(nuevos)
+
+    def _resolver_salas(self, cursor, claves):
+        nuevas = sorted(set(claves) - self.salas.keys())
+        if nuevas:
+            # La capacidad real no se conoce desde la web; se completa al dar de alta las butacas
+            filas = execute_values(cursor, SQL_INSERTAR_SALAS, [(id_cine, nombre, 0) for id_cine, nombre in nuevas],
+                                   page_size=self.tamano_lote, fetch=True)
+            self.salas.update({(id_cine, nombre): id_sala for id_sala, id_cine, nombre in filas})
+        return len(nuevas)
+
+    def escribir(self, sesiones, hoy=None):
+        """
+        Sincroniza ``functions`` con las sesiones recibidas
+
+        Args:
+            sesiones: dict {external_id: [filas de normalizar_sesiones]}; las
+                películas que no aparecen no se tocan
+            hoy: Fecha a partir de la cual se borran las sesiones desaparecidas
+
+        Returns:
+            dict: {'sesiones', 'insertadas', 'actualizadas', 'eliminadas',
+            'cines_nuevos', 'salas_nuevas', 'sin_pelicula'}
+        """
+        hoy = hoy or date.today()
+        resultado = {
+            'sesiones': 0, 'insertadas': 0, 'actualizadas': 0, 'eliminadas': 0,
+            'cines_nuevos': 0, 'salas_nuevas': 0, 'sin_pelicula': 0,
+        }
+
+        with self.conn:
+            with self.conn.cursor() as cursor:
+                self._cargar_caches(cursor, sesiones.keys())
+
+                conocidas = {}
+                for external_id, filas in sesiones.items():
+                    if external_id in self.peliculas:
+                        conocidas[self.peliculas[external_id]] = filas
+                    else:
+                        resultado['sin_pelicula'] += len(filas)
+                if not conocidas:
+                    return resultado
+
+                # (id de película, sesión, nombre de sala) de todas las sesiones
+                todas = [
+                    (id_pelicula, sesion, sala)
+                    for id_pelicula, filas in conocidas.items()
+                    for sesion, sala in zip(filas, nombres_sala(filas))
+                ]
+                resultado['cines_nuevos'] = self._resolver_cines(cursor, (sesion['cinema'] for _, sesion, _ in todas))
+                resultado['salas_nuevas'] = self._resolver_salas(
+                    cursor, ((self.cines[sesion['cinema']], sala) for _, sesion, sala in todas)
+                )
+
+                cursor.execute(SQL_STAGING)
+                filas_staging = [
+                    (
+                        id_pelicula,
+                        self.salas[(self.cines[sesion['cinema']], sala)],
+                        sesion['date'], sesion['time'], sesion['format'], sesion['purchase_url'],
+                    )
+                    for id_pelicula, sesion, sala in todas
+                ]
+                execute_values(cursor, SQL_INSERTAR_STAGING, filas_staging, page_size=self.tamano_lote)
+                cursor.execute("ANALYZE stg_functions")
+                resultado['sesiones'] = len(filas_staging)
+
+                cursor.execute(SQL_FUSION_SESIONES)
+                cambios = [fila[0] for fila in cursor.fetchall()]
+                resultado['insertadas'] = sum(1 for nueva in cambios if nueva)
+                resultado['actualizadas'] = len(cambios) - resultado['insertadas']
+
+                cursor.execute(SQL_BORRAR_DESAPARECIDAS, (list(conocidas), hoy))
+                resultado['eliminadas'] = cursor.rowcount
+
+        logger.info(
+            f"Sesiones: {resultado['insertadas']} nuevas, {resultado['actualizadas']} actualizadas, "
+            f"{resultado['eliminadas']} eliminadas ({resultado['sin_pelicula']} sin película en la base de datos)"
+        )
+        return resultado
@@ -0,0 +1,242 @@
+"""
+Tabla columnar de sesiones en memoria
+
+Las sesiones de los JSON son listas anidadas de dicts con fechas y horas en
+texto; en una temporada completa son millones de objetos pequeños. Aquí se
+guardan en columnas ``array`` paralelas, ordenadas por hora de inicio:
+
+    - inicio: segundos desde 1970-01-01 de la hora local de la sesión ('q')
+    - pelicula, cine: posiciones en las listas ``peliculas`` y ``cines`` ('I')
+    - formato: código de diccionario en ``formatos`` ('H')
+
+Al estar ordenadas por inicio, las sesiones de una franja horaria son un
+rango contiguo que se localiza con búsqueda binaria y se devuelve como
+``memoryview`` sin copiar. Para agrupar por cine se guarda además una
+permutación ordenada por (cine, inicio) con el desplazamiento de cada cine.
+"""
+
+import bisect
+import logging
+from array import array
+from datetime import datetime, timedelta
+
+from utils.movie_normalizer import normalizar_pelicula, normalizar_sesiones, normalizar_termino
+
+logger = logging.getLogger("ShowtimeTable")
+
+EPOCA = datetime(1970, 1, 1)
+
+
+def a_segundos(instante):
+    """Segundos desde EPOCA de un datetime sin zona (hora local de la sesión)"""
+    return int((instante - EPOCA).total_seconds())
+
+
+def desde_segundos(segundos):
+    """datetime sin zona a partir de los segundos de a_segundos"""
+    return EPOCA + timedelta(seconds=segundos)
+
+
+class Franja:
+    """
+    Rango contiguo de la tabla, o de su permutación por cine
+
+    Las columnas de un rango de la tabla son memoryview sin copia; en las
+    franjas de un cine solo lo es ``inicio`` y el resto se reúne en un array.
+    """
+
+    def __init__(self, tabla, inicio, fin, orden=None):
+        self.tabla = tabla
+        self.inicio = inicio
+        self.fin = fin
+        # Permutación de posiciones (agrupación por cine); None si es un rango de la tabla
+        self.orden = memoryview(orden)[inicio:fin] if orden is not None else None
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def columna(self, nombre):
+        """Columna ('inicio', 'pelicula', 'cine' o 'formato') de la franja"""
+        if self.orden is None:
+            return memoryview(getattr(self.tabla, nombre))[self.inicio:self.fin]
+        if nombre == 'inicio':
+            return memoryview(self.tabla.inicio_por_cine)[self.inicio:self.fin]
+        columna = getattr(self.tabla, nombre)
+        return array(columna.typecode, (columna[posicion] for posicion in self.orden))
+
+    def filas(self):
+        """Sesiones de la franja como dicts, en orden"""
+        posiciones = self.orden if self.orden is not None else range(self.inicio, self.fin)
+        for posicion in posiciones:
+            yield self.tabla.fila(posicion)
+
+
+class ShowtimeTable:
+    """Sesiones en columnas array ordenadas por hora de inicio"""
+
+    def __init__(self):
+        self.inicio = array('q')
+        self.pelicula = array('I')
+        self.cine = array('I')
+        self.formato = array('H')
+
+        # Diccionarios de las columnas codificadas
+        self.peliculas = []   # (external_id, título)
+        self.cines = []
+        self.formatos = []
+
+        # Agrupación por cine: posiciones ordenadas por (cine, inicio) y
+        # desplazamiento de cada cine en ellas (len(cines) + 1 elementos)
+        self.orden_cine = array('I')
+        self.inicio_por_cine = array('q')
+        self.desplazamientos = array('I', [0])
+
+    # --- Construcción ---
+
+    @classmethod
+    def desde_peliculas(cls, peliculas):
+        """
+        Tabla a partir de películas tal como las guarda el scraper
+
+        Las sesiones se normalizan con la fecha de scraping de cada película
+        como referencia ('Hoy', fechas sin año...). Las películas sin
+        sesiones o sin identificar se ignoran.
+        """
+        tabla = cls()
+        codigos_cine = {}
+        codigos_formato = {}
+        inicio, pelicula, cine, formato = array('q'), array('I'), array('I'), array('H')
+
+        for datos in peliculas:
+            if not datos.get('sesiones'):
+                continue
+            normalizada = normalizar_pelicula(datos)
+            if normalizada is None:
+                continue
+            referencia = normalizada['scraped_at'].date() if normalizada['scraped_at'] else None
+            filas = normalizar_sesiones(datos['sesiones'], referencia)
+            if not filas:
+                continue
+            codigo_pelicula = len(tabla.peliculas)
+            tabla.peliculas.append((normalizada['external_id'], normalizada['title']))
+            for fila in filas:
+                inicio.append(a_segundos(datetime.combine(fila['date'], fila['time'])))
+                pelicula.append(codigo_pelicula)
+                cine.append(codigos_cine.setdefault(fila['cinema'], len(codigos_cine)))
+                formato.append(codigos_formato.setdefault(fila['format'] or '', len(codigos_formato)))
+
+        tabla.cines = list(codigos_cine)
+        tabla.formatos = list(codigos_formato)
+        tabla._ordenar(inicio, pelicula, cine, formato)
+        return tabla
+
+    @classmethod
+    def desde_almacen(cls, almacen, desde=None):
+        """Tabla con las sesiones de la última versión de cada película del almacén"""
+        return cls.desde_peliculas(almacen.ultimas(desde=desde))
+
+    def _ordenar(self, inicio, pelicula, cine, formato):
+        orden = sorted(range(len(inicio)), key=inicio.__getitem__)
+        self.inicio = array('q', (inicio[i] for i in orden))
+        self.pelicula = array('I', (pelicula[i] for i in orden))
+        self.cine = array('I', (cine[i] for i in orden))
+        self.formato = array('H', (formato[i] for i in orden))
+
+        # El orden es estable, así que dentro de cada cine sigue siendo por inicio
+        self.orden_cine = array('I', sorted(range(len(self.cine)), key=self.cine.__getitem__))
+        self.inicio_por_cine = array('q', (self.inicio[i] for i in self.orden_cine))
+        conteos = [0] * len(self.cines)
+        for codigo in self.cine:
+            conteos[codigo] += 1
+        self.desplazamientos = array('I', [0])
+        for conteo in conteos:
+            self.desplazamientos.append(self.desplazamientos[-1] + conteo)
+
+    # --- Consultas ---
+
+    def __len__(self):
+        return len(self.inicio)
+
+    def memoria(self):
+        """Bytes ocupados por las columnas (sin contar los diccionarios)"""
+        columnas = (self.inicio, self.pelicula, self.cine, self.formato,
+                    self.orden_cine, self.inicio_por_cine, self.desplazamientos)
+        return sum(columna.itemsize * len(columna) for columna in columnas)
+
+    def fila(self, posicion):
+        """Sesión en una posición de la tabla como dict"""
+        external_id, titulo = self.peliculas[self.pelicula[posicion]]
+        return {
+            'external_id': external_id,
+            'titulo': titulo,
+            'cine': self.cines[self.cine[posicion]],
+            'inicio': desde_segundos(self.inicio[posicion]),
+            'formato': self.formatos[self.formato[posicion]] or None,
+        }
+
+    def codigo_cine(self, nombre):
+        """Código de un cine por su nombre (sin distinguir mayúsculas ni tildes); None si no está"""
+        termino = normalizar_termino(nombre)
+        return next((codigo for codigo, cine in enumerate(self.cines) if normalizar_termino(cine) == termino), None)
+
+    def franja(self, desde=None, hasta=None):
+        """Sesiones con inicio en [desde, hasta) como Franja sin copia"""
+        inicio = bisect.bisect_left(self.inicio, a_segundos(desde)) if desde else 0
+        fin = bisect.bisect_left(self.inicio, a_segundos(hasta)) if hasta else len(self.inicio)
+        return Franja(self, inicio, max(inicio, fin))
+
+    def sesiones_cine(self, codigo, desde=None, hasta=None):
+        """Sesiones de un cine con inicio en [desde, hasta), ordenadas por inicio"""
+        primero, ultimo = self.desplazamientos[codigo], self.desplazamientos[codigo + 1]
+        inicio = bisect.bisect_left(self.inicio_por_cine, a_segundos(desde), primero, ultimo) if desde else primero
+        fin = bisect.bisect_left(self.inicio_por_cine, a_segundos(hasta), primero, ultimo) if hasta else ultimo
+        return Franja(self, inicio, max(inicio, fin), orden=self.orden_cine)
+
+    def por_cine(self):
+        """Número de sesiones de cada cine"""
+        return {
+            nombre: self.desplazamientos[codigo + 1] - self.desplazamientos[codigo]
+            for codigo, nombre in enumerate(self.cines)
+        }
+
+    def proximas(self, n=10, desde=None, cine=None, pelicula=None):
+        """
+        Las N próximas sesiones a partir de un instante
+
+        Args:
+            n: Sesiones como máximo
+            desde: datetime de referencia (por defecto, ahora)
+            cine: Nombre del cine (opcional)
+            pelicula: Palabras del título (opcional; todas deben aparecer)
+
+        Returns:
+            list: dicts de sesión ordenados por inicio
+        """
+        desde = desde or datetime.now()
+        if cine is not None:
+            codigo = self.codigo_cine(cine)
+            if codigo is None:
+                return []
+            franja = self.sesiones_cine(codigo, desde)
+            posiciones = franja.orden
+        else:
+            posiciones = range(self.franja(desde).inicio, len(self.inicio))
+
+        codigos_pelicula = None
+        if pelicula:
+            palabras = normalizar_termino(pelicula).split()
+            codigos_pelicula = {
+                codigo for codigo, (_, titulo) in enumerate(self.peliculas)
+                if all(palabra in normalizar_termino(titulo or '') for palabra in palabras)
+            }
+            if not codigos_pelicula:
+                return []
+
+        resultado = []
+        for posicion in posiciones:
+            if codigos_pelicula is not None and self.pelicula[posicion] not in codigos_pelicula:
+                continue
+            resultado.append(self.fila(posicion))
+            if len(resultado) >= n:
+                break
+        return resultado
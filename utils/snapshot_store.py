@@ -0,0 +1,459 @@
+"""
+Almacén de instantáneas de películas en JSONL
+
+Cada ejecución del scraper añade sus registros a un segmento propio
+(``AAAAMMDD-HHMMSS.jsonl``), una línea JSON compacta por registro:
+
+    {"clave": "HO00001234", "tipo": "pelicula", "fecha": "...", "datos": {...}}
+
+Las escrituras son siempre secuenciales al final del segmento abierto. Un
+índice aparte (``indice.json``) guarda, para cada clave, el segmento, la
+posición y la longitud de su registro más reciente, de modo que leer una
+película es un ``seek`` y una lectura, y cargar una ejecución entera es
+leer un solo fichero. El índice anota también el tamaño de cada segmento:
+si no coincide con lo que hay en disco (el proceso murió antes de
+guardarlo, otro proceso escribió después...) se reconstruye recorriendo
+los segmentos.
+
+``compactar`` reescribe los segmentos cerrados en uno solo con la última
+versión de cada clave, e ``importar_json`` pasa al almacén los JSON de
+película del formato anterior (un fichero por película y día). Cada
+segmento abierto tiene junto a él una marca ``.abierto`` con el PID de su
+proceso, para que la compactación de otro proceso no lo toque.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+from scrapers import cinesa_parser
+from utils.atomic_io import escribir_atomico
+
+logger = logging.getLogger("SnapshotStore")
+
+EXTENSION = ".jsonl"
+EXTENSION_MARCA = ".abierto"
+NOMBRE_INDICE = "indice.json"
+PATRON_SEGMENTO = re.compile(r'^((\d{8})-\d{6})(?:-(\d+))?\.jsonl$')
+PATRON_FECHA_JSON = re.compile(r'_(\d{8})\.json$')
+
+
+def clave_pelicula(pelicula):
+    """ID de la película (desde su URL si hace falta), o la URL, o el título"""
+    if pelicula.get('id_pelicula'):
+        return str(pelicula['id_pelicula'])
+    url = pelicula.get('url')
+    if url:
+        return cinesa_parser.id_pelicula_desde_url(url) or url
+    return pelicula.get('titulo') or 'pelicula_sin_titulo'
+
+
+def orden_segmento(nombre):
+    """
+    Clave de orden cronológico de un segmento
+
+    Los creados en el mismo segundo llevan sufijo (-2, -3...) y van después
+    del que no lo lleva, aunque por orden alfabético irían antes.
+    """
+    coincidencia = PATRON_SEGMENTO.match(nombre)
+    return (coincidencia.group(1), int(coincidencia.group(3) or 1))
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Sin permiso para señalarlo (existe) o plataforma sin señales: se asume vivo
+        return True
+    return True
+
+
+def _serializar(clave, tipo, datos):
+    registro = {'clave': clave, 'tipo': tipo, 'fecha': datetime.now().isoformat(), 'datos': datos}
+    return (json.dumps(registro, ensure_ascii=False, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+class SnapshotStore:
+    """Segmentos JSONL de solo añadido con índice de posiciones por clave"""
+
+    def __init__(self, directorio, guardar_cada=50):
+        """
+        Args:
+            directorio: Directorio de los segmentos y del índice
+            guardar_cada: Registros tras los que se escribe el índice a disco
+        """
+        self.directorio = directorio
+        self.guardar_cada = guardar_cada
+        os.makedirs(directorio, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segmento = None
+        self._fichero = None
+        self._cambios = 0
+        self._segmentos = {}
+        self._entradas = {}
+        self.registros = 0
+
+        self._cargar_indice()
+
+    @classmethod
+    def desde_config(cls, config, directorio_datos):
+        """Crea el almacén a partir de la sección ``scraper.almacen``"""
+        almacen = (config or {}).get('scraper', {}).get('almacen', {}) or {}
+        return cls(os.path.join(directorio_datos, almacen.get('directorio', 'snapshots')))
+
+    # --- Índice ---
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def segmentos(self, desde=None):
+        """
+        Nombres de los segmentos en orden cronológico
+
+        Args:
+            desde: Fecha 'AAAAMMDD' mínima según el nombre del segmento
+        """
+        nombres = []
+        for ruta in glob.glob(os.path.join(self.directorio, f"*{EXTENSION}")):
+            nombre = os.path.basename(ruta)
+            coincidencia = PATRON_SEGMENTO.match(nombre)
+            if coincidencia and (not desde or coincidencia.group(2) >= desde):
+                nombres.append(nombre)
+        return sorted(nombres, key=orden_segmento)
+
+    def _cargar_indice(self):
+        ruta = self._ruta(NOMBRE_INDICE)
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    indice = json.load(f)
+                en_disco = {nombre: os.path.getsize(self._ruta(nombre)) for nombre in self.segmentos()}
+                if indice.get('segmentos') == en_disco:
+                    self._segmentos = en_disco
+                    self._entradas = {clave: tuple(entrada) for clave, entrada in indice.get('entradas', {}).items()}
+                    return
+                logger.info("El índice de instantáneas no coincide con los segmentos; se reconstruye")
+            except (OSError, ValueError) as e:
+                logger.warning(f"No se pudo leer el índice de instantáneas: {e}")
+        self.reconstruir_indice()
+
+    def reconstruir_indice(self):
+        """Recorre todos los segmentos y vuelve a calcular la última posición de cada clave"""
+        with self._lock:
+            self._segmentos = {}
+            self._entradas = {}
+            for nombre in self.segmentos():
+                for posicion, linea in self._lineas(nombre):
+                    registro = self._decodificar(linea, nombre, posicion)
+                    if registro is not None:
+                        self._entradas[registro['clave']] = (nombre, posicion, len(linea), registro['tipo'])
+                self._segmentos[nombre] = os.path.getsize(self._ruta(nombre))
+        self.guardar_indice()
+
+    def guardar_indice(self):
+        """Escribe el índice a disco de forma atómica"""
+        with self._lock:
+            contenido = json.dumps(
+                {'segmentos': self._segmentos, 'entradas': self._entradas},
+                ensure_ascii=False, separators=(',', ':')
+            )
+            self._cambios = 0
+        escribir_atomico(self._ruta(NOMBRE_INDICE), contenido.encode('utf-8'))
+
+    # --- Escritura ---
+
+    def _abrir_segmento(self):
+        # Llamar con el lock adquirido
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        nombre, sufijo = f"{base}{EXTENSION}", 1
+        while os.path.exists(self._ruta(nombre)):
+            sufijo += 1
+            nombre = f"{base}-{sufijo}{EXTENSION}"
+        self._segmento = nombre
+        self._fichero = open(self._ruta(nombre), 'ab')
+        with open(self._ruta(nombre + EXTENSION_MARCA), 'w') as marca:
+            marca.write(str(os.getpid()))
+        self._segmentos[nombre] = 0
+        logger.info(f"Segmento de instantáneas: {nombre}")
+
+    def guardar(self, datos, clave=None, tipo='pelicula'):
+        """
+        Añade un registro al segmento de esta ejecución
+
+        Args:
+            datos: dict serializable a JSON
+            clave: Clave del registro (por defecto, clave_pelicula(datos))
+            tipo: 'pelicula' o 'listado'
+
+        Returns:
+            str: Clave con la que se guardó
+        """
+        clave = clave or clave_pelicula(datos)
+        self.guardar_lote([(datos, clave, tipo)])
+        return clave
+
+    def guardar_lote(self, registros):
+        """
+        Añade varios registros con una sola escritura
+
+        Args:
+            registros: Lista de tuplas (datos, clave, tipo) con la clave ya resuelta
+        """
+        lineas = [(clave, tipo, _serializar(clave, tipo, datos)) for datos, clave, tipo in registros]
+        if not lineas:
+            return
+        with self._lock:
+            if self._fichero is None:
+                self._abrir_segmento()
+            posicion = self._segmentos[self._segmento]
+            self._fichero.write(b''.join(linea for _, _, linea in lineas))
+            self._fichero.flush()
+            for clave, tipo, linea in lineas:
+                self._entradas[clave] = (self._segmento, posicion, len(linea), tipo)
+                posicion += len(linea)
+            self._segmentos[self._segmento] = posicion
+            self.registros += len(lineas)
+            self._cambios += len(lineas)
+            pendiente = self._cambios >= self.guardar_cada
+        if pendiente:
+            self.guardar_indice()
+
+    def cerrar(self):
+        """Cierra el segmento abierto y guarda el índice"""
+        with self._lock:
+            fichero, nombre = self._fichero, self._segmento
+            self._fichero, self._segmento = None, None
+        if fichero is None:
+            return
+        fichero.close()
+        try:
+            os.remove(self._ruta(nombre + EXTENSION_MARCA))
+        except FileNotFoundError:
+            pass
+        self.guardar_indice()
+
+    # --- Lectura ---
+
+    def _lineas(self, nombre):
+        """(posición, línea) de un segmento, leído de una vez"""
+        with open(self._ruta(nombre), 'rb') as f:
+            contenido = f.read()
+        posicion = 0
+        while posicion < len(contenido):
+            fin = contenido.find(b'\n', posicion)
+            if fin < 0:
+                # Línea a medias al final: el proceso murió mientras escribía
+                return
+            yield posicion, contenido[posicion:fin + 1]
+            posicion = fin + 1
+
+    @staticmethod
+    def _decodificar(linea, nombre, posicion):
+        try:
+            return json.loads(linea)
+        except ValueError:
+            logger.warning(f"Registro ilegible en {nombre}:{posicion}")
+            return None
+
+    def version(self):
+        """Tamaño de cada segmento: cambia con cada escritura o compactación"""
+        with self._lock:
+            return dict(self._segmentos)
+
+    def contiene(self, clave):
+        with self._lock:
+            return clave in self._entradas
+
+    def obtener(self, clave):
+        """Última versión guardada de una clave, o None"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if not entrada:
+            return None
+        nombre, posicion, longitud, _ = entrada
+        try:
+            with open(self._ruta(nombre), 'rb') as f:
+                f.seek(posicion)
+                registro = self._decodificar(f.read(longitud), nombre, posicion)
+        except OSError as e:
+            logger.warning(f"No se pudo leer {nombre}: {e}")
+            return None
+        return registro['datos'] if registro else None
+
+    def leer_segmento(self, nombre):
+        """Todos los registros de un segmento (una sola lectura del fichero)"""
+        for posicion, linea in self._lineas(nombre):
+            registro = self._decodificar(linea, nombre, posicion)
+            if registro is not None:
+                yield registro
+
+    def ultimas(self, tipo='pelicula', desde=None):
+        """
+        Última versión de cada clave
+
+        Sin ``desde`` se sirven a partir del índice, agrupadas por segmento;
+        con ``desde`` se recorren solo los segmentos de esa fecha en adelante.
+
+        Yields:
+            dict: Los datos de cada registro
+        """
+        if desde:
+            ultimos = {}
+            for nombre in self.segmentos(desde):
+                for registro in self.leer_segmento(nombre):
+                    if registro['tipo'] == tipo:
+                        ultimos[registro['clave']] = registro['datos']
+            yield from ultimos.values()
+            return
+
+        with self._lock:
+            por_segmento = {}
+            for nombre, posicion, _, tipo_entrada in self._entradas.values():
+                if tipo_entrada == tipo:
+                    por_segmento.setdefault(nombre, set()).add(posicion)
+        for nombre in sorted(por_segmento, key=orden_segmento):
+            posiciones = por_segmento[nombre]
+            for posicion, linea in self._lineas(nombre):
+                if posicion in posiciones:
+                    registro = self._decodificar(linea, nombre, posicion)
+                    if registro is not None:
+                        yield registro['datos']
+
+    # --- Compactación ---
+
+    def segmentos_abiertos(self):
+        """
+        Segmentos que tiene abiertos algún proceso vivo (según su marca)
+
+        Las marcas de procesos que ya no existen se borran.
+        """
+        abiertos = []
+        for nombre in self.segmentos():
+            ruta_marca = self._ruta(nombre + EXTENSION_MARCA)
+            try:
+                with open(ruta_marca, 'r') as marca:
+                    pid = int(marca.read().strip() or 0)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                pid = 0
+            if pid and _proceso_vivo(pid):
+                abiertos.append(nombre)
+            else:
+                logger.info(f"Marca de segmento abierto huérfana: {nombre}")
+                try:
+                    os.remove(ruta_marca)
+                except OSError:
+                    pass
+        return abiertos
+
+    def compactar(self):
+        """
+        Reescribe los segmentos cerrados en uno con la última versión de cada clave
+
+        Solo se compactan los segmentos anteriores al primero que siga
+        abierto (por este u otro proceso), así que las escrituras en curso y
+        el orden entre segmentos se respetan. El resultado sustituye al
+        segmento más reciente de los compactados (conserva su nombre y por
+        tanto su orden); después se borran los anteriores. Un único segmento
+        se reescribe si tiene versiones superadas. Si el proceso muere entre
+        medias, los segmentos que queden solo contienen versiones ya
+        superadas y el índice se reconstruye igual.
+
+        Returns:
+            dict: {'segmentos', 'registros', 'bytes_antes', 'bytes_despues'}
+        """
+        abiertos = self.segmentos_abiertos()
+        limite = orden_segmento(abiertos[0]) if abiertos else None
+        cerrados = [nombre for nombre in self.segmentos() if limite is None or orden_segmento(nombre) < limite]
+
+        # Otro proceso puede haber cerrado segmentos desde que se cargó el índice
+        en_disco = {nombre: os.path.getsize(self._ruta(nombre)) for nombre in cerrados}
+        with self._lock:
+            desactualizado = any(self._segmentos.get(nombre) != tamano for nombre, tamano in en_disco.items())
+        if desactualizado:
+            self.reconstruir_indice()
+
+        with self._lock:
+            resultado = {
+                'segmentos': len(cerrados), 'registros': 0,
+                'bytes_antes': sum(en_disco.values()), 'bytes_despues': 0,
+            }
+            if not cerrados:
+                return resultado
+
+            destino = cerrados[-1]
+            # Posiciones de las versiones vigentes: el resto de líneas se descarta sin decodificarlas
+            vigentes = {(entrada[0], entrada[1]): clave for clave, entrada in self._entradas.items()}
+            lineas = []
+            nuevas = {}
+            posicion = 0
+            total = 0
+            for nombre in cerrados:
+                for inicio, linea in self._lineas(nombre):
+                    total += 1
+                    clave = vigentes.get((nombre, inicio))
+                    if clave is not None:
+                        lineas.append(linea)
+                        nuevas[clave] = (destino, posicion, len(linea), self._entradas[clave][3])
+                        posicion += len(linea)
+
+            resultado['registros'] = len(lineas)
+            if len(cerrados) == 1 and total == len(lineas) and posicion == en_disco[destino]:
+                # Un único segmento sin versiones superadas ni líneas a medias
+                resultado['bytes_despues'] = posicion
+                return resultado
+
+            escribir_atomico(self._ruta(destino), b''.join(lineas))
+            self._entradas.update(nuevas)
+            for nombre in cerrados[:-1]:
+                self._segmentos.pop(nombre, None)
+            self._segmentos[destino] = posicion
+            resultado['bytes_despues'] = posicion
+
+        self.guardar_indice()
+        for nombre in cerrados[:-1]:
+            os.remove(self._ruta(nombre))
+        logger.info(
+            f"Compactados {resultado['segmentos']} segmentos en {destino}: {resultado['registros']} registros, "
+            f"{resultado['bytes_antes'] / 1024:.1f} KB -> {resultado['bytes_despues'] / 1024:.1f} KB"
+        )
+        return resultado
+
+
+def _orden_json(ruta):
+    fecha = PATRON_FECHA_JSON.search(ruta)
+    return (fecha.group(1) if fecha else '', ruta)
+
+
+def importar_json(almacen, directorio):
+    """
+    Añade al almacén los JSON de película de un directorio (formato anterior)
+
+    Se importan por orden de fecha del nombre, así que la versión más
+    reciente de cada película queda como la vigente. Se guardan ya con los
+    campos tipados, para que ``tipar_almacen`` no tenga que reescribirlas.
+
+    Returns:
+        dict: {'ficheros', 'importados'}
+    """
+    # Importación diferida: movie_normalizer importa este módulo
+    from utils.movie_normalizer import tipar_pelicula
+
+    ficheros = sorted(glob.glob(os.path.join(directorio, '*.json')), key=_orden_json)
+    importados = 0
+    for ruta in ficheros:
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                almacen.guardar(tipar_pelicula(json.load(f)))
+            importados += 1
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo importar {ruta}: {e}")
+    return {'ficheros': len(ficheros), 'importados': importados}
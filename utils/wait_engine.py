@@ -0,0 +1,192 @@
+"""
+Esperas basadas en condiciones para Selenium y pausas de cortesía
+
+WaitEngine sustituye las esperas fijas por condiciones de disponibilidad
+(selectores presentes, red inactiva, imagen cargada) con un timeout por
+paso, y anota cuánto dura realmente cada espera. PolitenessDelay es la
+pausa deliberada entre peticiones, configurable aparte.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger("WaitEngine")
+
+# Timeout en segundos de cada paso si la configuración no indica otro
+TIMEOUTS_POR_DEFECTO = {
+    'listado': 20,
+    'detalle': 15,
+    'red': 10,
+    'imagen': 5,
+    'cookies': 5,
+}
+
+SCRIPT_ESTADO_RED = """
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+SCRIPT_SELECTOR_PRESENTE = """
+return document.querySelector(arguments[0]) !== null;
+"""
+
+SCRIPT_IMAGEN_CARGADA = """
+var img = arguments[0];
+return img.complete && img.naturalWidth > 0;
+"""
+
+
+class WaitEngine:
+    """Esperas de Selenium por condición, con timeout por paso y métricas"""
+
+    def __init__(self, timeouts=None, intervalo=0.1):
+        """
+        Inicializar el motor de esperas
+
+        Args:
+            timeouts: dict paso -> segundos que sobrescribe TIMEOUTS_POR_DEFECTO
+            intervalo: Segundos entre comprobaciones de la condición
+        """
+        self.timeouts = {**TIMEOUTS_POR_DEFECTO, **(timeouts or {})}
+        self.intervalo = intervalo
+        self._duraciones = defaultdict(list)
+        self._agotadas = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_config(cls, config):
+        """Crea el motor a partir de la sección ``scraper.waits`` de la configuración"""
+        return cls(timeouts=(config or {}).get('scraper', {}).get('waits'))
+
+    def _registrar(self, paso, duracion, cumplida):
+        with self._lock:
+            self._duraciones[paso].append(duracion)
+            if not cumplida:
+                self._agotadas[paso] += 1
+
+    def esperar(self, driver, paso, condicion, timeout=None):
+        """
+        Espera a que ``condicion(driver)`` devuelva un valor verdadero
+
+        Args:
+            driver: WebDriver sobre el que se evalúa la condición
+            paso: Nombre del paso (para el timeout y las métricas)
+            condicion: Función que recibe el driver
+            timeout: Segundos máximos; por defecto, el configurado para el paso
+
+        Returns:
+            El valor devuelto por la condición, o None si se agotó el timeout
+        """
+        timeout = self.timeouts.get(paso, 10) if timeout is None else timeout
+        inicio = time.monotonic()
+        try:
+            resultado = WebDriverWait(driver, timeout, poll_frequency=self.intervalo).until(condicion)
+            self._registrar(paso, time.monotonic() - inicio, True)
+            return resultado
+        except TimeoutException:
+            duracion = time.monotonic() - inicio
+            self._registrar(paso, duracion, False)
+            logger.warning(f"Espera '{paso}' agotada tras {duracion:.2f} segundos")
+            return None
+
+    def selectores(self, driver, selectores, paso='detalle', timeout=None):
+        """Espera a que exista algún elemento que coincida con alguno de los selectores"""
+        selector = ', '.join(selectores)
+        return self.esperar(
+            driver, paso,
+            lambda d: d.execute_script(SCRIPT_SELECTOR_PRESENTE, selector),
+            timeout
+        )
+
+    def red_inactiva(self, driver, inactividad=0.5, paso='red', timeout=None):
+        """Espera a que el documento esté completo y no se pidan recursos nuevos durante ``inactividad`` segundos"""
+        estado = {'recursos': -1, 'desde': time.monotonic()}
+
+        def condicion(d):
+            listo, recursos = d.execute_script(SCRIPT_ESTADO_RED)
+            ahora = time.monotonic()
+            if listo != 'complete' or recursos != estado['recursos']:
+                estado['recursos'] = recursos
+                estado['desde'] = ahora
+                return False
+            return ahora - estado['desde'] >= inactividad
+
+        return self.esperar(driver, paso, condicion, timeout)
+
+    def imagen_cargada(self, driver, elemento, paso='imagen', timeout=None):
+        """Espera a que un elemento <img> haya terminado de cargar"""
+        def condicion(d):
+            try:
+                return d.execute_script(SCRIPT_IMAGEN_CARGADA, elemento)
+            except WebDriverException:
+                return False
+
+        return self.esperar(driver, paso, condicion, timeout)
+
+    def resumen(self):
+        """
+        Estadísticas de las esperas realizadas
+
+        Returns:
+            dict: paso -> {'esperas', 'total', 'media', 'maximo', 'agotadas'}
+        """
+        with self._lock:
+            return {
+                paso: {
+                    'esperas': len(duraciones),
+                    'total': sum(duraciones),
+                    'media': sum(duraciones) / len(duraciones),
+                    'maximo': max(duraciones),
+                    'agotadas': self._agotadas[paso],
+                }
+                for paso, duraciones in self._duraciones.items()
+            }
+
+    def log_resumen(self):
+        """Escribe en el log el tiempo pasado esperando en cada paso"""
+        resumen = self.resumen()
+        if not resumen:
+            return
+        total = sum(datos['total'] for datos in resumen.values())
+        logger.info(f"Tiempo total en esperas: {total:.2f} segundos")
+        for paso, datos in sorted(resumen.items()):
+            logger.info(
+                f"  {paso}: {datos['esperas']} esperas, {datos['total']:.2f} s en total, "
+                f"media {datos['media']:.2f} s, máximo {datos['maximo']:.2f} s, {datos['agotadas']} agotadas"
+            )
+
+
+class PolitenessDelay:
+    """Pausa de cortesía entre peticiones al sitio, independiente de la carga de la página"""
+
+    def __init__(self, minimo=0.0, maximo=0.0):
+        """
+        Args:
+            minimo: Segundos mínimos de pausa
+            maximo: Segundos máximos de pausa (se elige un valor aleatorio entre ambos)
+        """
+        self.minimo = max(0.0, float(minimo))
+        self.maximo = max(self.minimo, float(maximo))
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_config(cls, config):
+        """Crea la pausa a partir de la sección ``scraper.politeness`` de la configuración"""
+        cortesia = (config or {}).get('scraper', {}).get('politeness', {}) or {}
+        return cls(cortesia.get('min', 0), cortesia.get('max', cortesia.get('min', 0)))
+
+    def esperar(self):
+        """Duerme un tiempo aleatorio entre el mínimo y el máximo configurados"""
+        if self.maximo <= 0:
+            return 0.0
+        tiempo_espera = random.uniform(self.minimo, self.maximo)
+        time.sleep(tiempo_espera)
+        with self._lock:
+            self.total += tiempo_espera
+        return tiempo_espera
@@ -0,0 +1,119 @@
+"""
+Escritura diferida de resultados en un único hilo
+
+Los hilos de scraping no escriben en disco: dejan cada película en una cola
+acotada y siguen con la siguiente descarga. Un único hilo escritor vacía la
+cola por lotes, los serializa y los añade al almacén con una sola escritura
+por lote. Si la cola se llena (el disco no da abasto), ``encolar`` espera,
+de modo que la memoria nunca crece sin límite.
+
+``al_escribir`` recibe cada lote ya guardado, también desde el hilo
+escritor (p. ej. para mantener al día el índice de búsqueda).
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from utils.snapshot_store import clave_pelicula
+
+logger = logging.getLogger("WriteBehind")
+
+# Marca de fin de la cola
+_FIN = object()
+
+
+class WriteBehindWriter:
+    """Cola acotada de registros atendida por un hilo escritor"""
+
+    def __init__(self, almacen, capacidad=256, tamano_lote=32, al_escribir=None):
+        """
+        Args:
+            almacen: SnapshotStore de destino
+            capacidad: Registros que puede haber en cola antes de bloquear a quien encola
+            tamano_lote: Registros como máximo por escritura
+            al_escribir: Función opcional llamada con cada lote tras guardarlo
+        """
+        self.almacen = almacen
+        self.al_escribir = al_escribir
+        self.tamano_lote = tamano_lote
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._cerrado = False
+        self._lock = threading.Lock()
+        # Evita que un registro entre en la cola detrás de la marca de fin
+        self._lock_cierre = threading.Lock()
+
+        self.escritos = 0
+        self.lotes = 0
+        self.fallidos = 0
+        # Claves de los registros que no se pudieron escribir
+        self.claves_fallidas = set()
+        self.tiempo_bloqueado = 0.0
+
+        self._hilo = threading.Thread(target=self._escribir, name="WriteBehind", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, datos, clave=None, tipo='pelicula'):
+        """
+        Deja un registro para que lo escriba el hilo escritor
+
+        Se encola una copia superficial, así que quien llama puede seguir
+        modificando su dict.
+
+        Returns:
+            str: Clave con la que se guardará
+
+        Raises:
+            RuntimeError: Si el escritor ya está cerrado (el registro se perdería)
+        """
+        clave = clave or clave_pelicula(datos)
+        inicio = time.perf_counter()
+        with self._lock_cierre:
+            if self._cerrado:
+                raise RuntimeError(f"Escritura diferida cerrada: no se puede encolar '{clave}'")
+            self._cola.put((dict(datos) if isinstance(datos, dict) else datos, clave, tipo))
+        with self._lock:
+            self.tiempo_bloqueado += time.perf_counter() - inicio
+        return clave
+
+    def _escribir(self):
+        fin = False
+        while not fin:
+            lote = [self._cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            if lote[-1] is _FIN:
+                lote.pop()
+                fin = True
+            try:
+                self.almacen.guardar_lote(lote)
+                self.escritos += len(lote)
+                if lote:
+                    self.lotes += 1
+            except Exception as e:
+                self.fallidos += len(lote)
+                self.claves_fallidas.update(clave for _, clave, _ in lote)
+                logger.error(f"No se pudo escribir un lote de {len(lote)} registros: {e}")
+                continue
+            if lote and self.al_escribir:
+                try:
+                    self.al_escribir(lote)
+                except Exception as e:
+                    logger.warning(f"Error tras escribir un lote de {len(lote)} registros: {e}")
+
+    def cerrar(self):
+        """Escribe lo que quede en cola y detiene el hilo escritor"""
+        with self._lock_cierre:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._cola.put(_FIN)
+        self._hilo.join()
+        logger.info(
+            f"Escritura diferida: {self.escritos} registros en {self.lotes} lotes "
+            f"({self.fallidos} fallidos), {self.tiempo_bloqueado:.2f} s con la cola llena"
+        )